@@ -3,9 +3,14 @@ from pydantic import BaseModel
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 from typing import List, Optional
-import serial
+import os
+import sys
 import time
 
+# Serial devices come from the same manager (SERIAL_ARMS) as the WebRTC server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python_web_rtc"))
+from core.device_manager import device_manager
+
 # ===============================
 # FastAPI setup
 # ===============================
@@ -14,26 +19,32 @@ app = FastAPI()
 # ===============================
 # Serial setup (Arduino)
 # ===============================
-try:
-    ser = serial.Serial("COM8", 115200, timeout=1)
-    time.sleep(2)
-    SERIAL_CONNECTED = True
-    print("🟢 Serial connected to Arduino")
-except Exception as e:
-    ser = None
-    SERIAL_CONNECTED = False
-    print(f"⚠️ Serial not connected: {e}")
-
-def send_command(command: str):
+# Arm for the NLP commands, and for slider updates of arms without a board of their own
+DEFAULT_ARM = os.environ.get("NLP_ARM", "1")
+arm_ports = {}
+
+def get_arm_port(arm=DEFAULT_ARM):
+    """
+    Leased serial port of the arm; connects in the background and reconnects
+    if the board is unplugged.
+    """
+    arm = str(arm) if device_manager.has_arm(arm) else DEFAULT_ARM
+    if arm not in arm_ports:
+        arm_ports[arm] = device_manager.lease(arm)
+    return arm_ports[arm]
+
+# Start connecting now, so the board's reset is over before the first command
+get_arm_port()
+
+def send_command(command: str, arm=DEFAULT_ARM, key: Optional[str] = None):
     """
-    Send command to Arduino if connected, else print it (mock).
+    Send command to the arm's board if connected, else print it (mock).
+    Unsent commands with the same key are replaced by the newer one.
     """
-    if SERIAL_CONNECTED and ser:
-        try:
-            ser.write(f"{command}\n".encode())
-            print(f"📤 Sent command: {command}")
-        except Exception as e:
-            print(f"❌ Error sending command {command}: {e}")
+    port = get_arm_port(arm)
+    if port.connected:
+        port.send(f"{command}\n".encode(), key=key or command)
+        print(f"📤 Sent command: {command}")
     else:
         print(f"💡 [Mock] Command: {command}")
     time.sleep(0.2)
@@ -125,8 +136,8 @@ def predict(data: PredictRequest):
         srv = update.servoIndex
         degree = update.degree
 
-        # Format: "ARM{arm}_SRV{srv} {degree}"
-        send_command(f"ARM{arm}_SRV{srv} {degree}")
+        # Format: "ARM{arm}_SRV{srv} {degree}", on that arm's board when it has one
+        send_command(f"ARM{arm}_SRV{srv} {degree}", arm=arm, key=f"ARM{arm}_SRV{srv}")
 
         # Store for internal reference
         srv_angles[(arm, srv)] = degree
@@ -1,7 +1,11 @@
+import os
 import serial
 import time
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python_web_rtc"))
+from core.device_manager import find_boards
+
 class ESP32Communicator:
     def __init__(self, port=None, baudrate=115200):
         """
@@ -16,19 +20,12 @@ class ESP32Communicator:
             self.port = self.find_esp32_port()
         
     def find_esp32_port(self):
-        """Try to auto-detect ESP32 port"""
-        import serial.tools.list_ports
-        
-        # Common ESP32 board identifiers
-        esp32_identifiers = ['Silicon Labs', 'CP210', 'CH340', 'FTDI', 'USB2.0-Serial']
-        
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            print(f"Found: {port.device} - {port.description}")
-            for identifier in esp32_identifiers:
-                if identifier in port.description:
-                    print(f"Likely ESP32 found on: {port.device}")
-                    return port.device
+        """Try to auto-detect ESP32 port (by USB VID:PID, see core/device_manager.py)"""
+        for board in find_boards(known_only=False):
+            print(f"Found: {board.device} - {board.description}")
+            if board.known:
+                print(f"Likely ESP32 found on: {board.device}")
+                return board.device
         
         raise Exception("ESP32 not found. Please specify port manually.")
     
@@ -4,8 +4,18 @@ from webRTC.peer_factory import create_peer
 
 from media.pi_track_store import set_pi_track
 from media.hand_mirror.state import hand_mirror_state
-from media.yolo.mixed_grid_pi import get_latest_detections
+from media.yolo.mixed_grid_pi import get_latest_snapshot, color_cache_stats
+from media.broadcast_hub import broadcast_hub
+from media.yolo.model_registry import model_registry
+from media.yolo.inference_service import inference_stats
+from media.yolo.adaptive import operating_points
+from media.yolo.detection_feed import detection_feed
+from media.yolo import detection_wire
+from core.device_manager import close_arms, device_stats
+from core.serial_service import serial_stats
 from aiortc import RTCPeerConnection
+import base64
+import json
 import os
 
 pcs = set()
@@ -75,7 +85,7 @@ async def offer(request):
     data = await request.json()
     processor_type = data.get("processor") or data.get("processorType") or "yolo"
 
-    pc = create_peer(processor_type=processor_type)
+    pc = await create_peer(processor_type=processor_type)
     pcs.add(pc)
 
     @pc.on("connectionstatechange")
@@ -83,6 +93,10 @@ async def offer(request):
         print("Connection state is %s" % pc.connectionState)
         if pc.connectionState in ["failed", "closed"]:
             pcs.discard(pc)
+            # Release this viewer's hub subscription
+            for sender in pc.getSenders():
+                if sender.track is not None:
+                    sender.track.stop()
             await pc.close()
     await pc.setRemoteDescription(
         RTCSessionDescription(sdp=data["sdp"], type=data["type"])
@@ -107,18 +121,136 @@ async def hand_mirror_status(_request):
     return web.json_response(hand_mirror_state.to_dict())
 
 
-async def detections_status(_request):
-    return web.json_response({"detections": get_latest_detections()})
+async def detections_status(request):
+    """
+    Latest detections. Pollers pass ?since_version=<version> (or If-None-Match
+    with the ETag) and get an empty 304 while the detections are unchanged.
+
+    "Accept: application/x-elab-detections" selects the compact binary
+    encoding (see media/yolo/detection_wire.py) instead of JSON.
+    """
+    snapshot = get_latest_snapshot()
+    binary = detection_wire.wants_binary(request.headers.get("Accept"))
+    etag = f'"{snapshot.version}{"b" if binary else ""}"'
+    headers = {"ETag": etag, "Vary": "Accept"}
+
+    since = request.query.get("since_version")
+    if (since is not None and since == str(snapshot.version)) or (
+        request.headers.get("If-None-Match") == etag
+    ):
+        return web.Response(status=304, headers=headers)
+
+    if binary:
+        return web.Response(
+            body=detection_wire.encode_snapshot(snapshot),
+            content_type=detection_wire.CONTENT_TYPE,
+            headers=headers,
+        )
+
+    return web.json_response({
+        "version": snapshot.version,
+        "detections": snapshot.to_dicts(),
+    }, headers=headers)
+
+
+async def detections_metrics(_request):
+    """
+    Detector operating points and colour-cache counters. These change without
+    the detections changing, so they live here, uncached, rather than in the
+    ETag'd /detections/status.
+    """
+    return web.json_response({
+        "operating_points": operating_points(),
+        "color_cache": color_cache_stats(),
+    })
+
+
+async def detections_classes(_request):
+    """Class / colour ID tables for binary clients; fetched once."""
+    return web.json_response(detection_wire.class_dictionary(detection_feed.class_names()))
+
+
+async def detections_stream(request):
+    """
+    Server-sent events: one "detections" event per change, carrying the delta
+    since the client's last version. EventSource reconnects send Last-Event-ID,
+    so a client resumes with a delta instead of a full snapshot.
+
+    ?encoding=binary sends each delta in the binary wire format, base64
+    encoded because SSE is a text protocol.
+    """
+    binary = request.query.get("encoding") == "binary"
+    try:
+        version = int(request.headers.get("Last-Event-ID") or request.query.get("since", 0))
+    except ValueError:
+        version = 0
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+    })
+    await response.prepare(request)
+
+    try:
+        while True:
+            update = await detection_feed.next_update(version, timeout=15.0)
+            if update is None:
+                await response.write(b": keep-alive\n\n")
+                continue
+            version = update["version"]
+            if binary:
+                payload = base64.b64encode(detection_wire.encode_update(update)).decode()
+            else:
+                payload = json.dumps(update, separators=(",", ":"))
+            await response.write(
+                f"id: {version}\nevent: detections\ndata: {payload}\n\n".encode()
+            )
+    except ConnectionResetError:
+        pass
+    return response
+
+
+async def tracks_stats(_request):
+    tracks = []
+    for pc in list(pcs):
+        for sender in pc.getSenders():
+            track = sender.track
+            if track is not None and hasattr(track, "stats"):
+                tracks.append(track.stats())
+    return web.json_response({"tracks": tracks, "channels": broadcast_hub.stats()})
+
+
+async def models_status(_request):
+    return web.json_response({
+        "models": model_registry.stats(),
+        "inference": inference_stats(),
+    })
+
+
+async def serial_status(_request):
+    """Per-port writer metrics plus the configured arms and the boards found on USB."""
+    return web.json_response({"ports": serial_stats(), **device_stats()})
+
+
+async def _close_arms(_app: web.Application) -> None:
+    close_arms()
 
 
 app = web.Application()
 app.on_startup.append(_start_robotics)
 app.on_cleanup.append(_stop_robotics)
+app.on_cleanup.append(_close_arms)
 app.router.add_post("/offer", offer)
 app.router.add_post("/pi-offer", pi_offer)
 app.router.add_post("/hand-mirror/mirror", hand_mirror_set)
 app.router.add_get("/hand-mirror/status", hand_mirror_status)
 app.router.add_get("/detections/status", detections_status)
+app.router.add_get("/detections/metrics", detections_metrics)
+app.router.add_get("/detections/stream", detections_stream)
+app.router.add_get("/detections/classes", detections_classes)
+app.router.add_get("/tracks/stats", tracks_stats)
+app.router.add_get("/models/status", models_status)
+app.router.add_get("/serial/status", serial_status)
 
 if __name__ == "__main__":
     print("routes loaded")
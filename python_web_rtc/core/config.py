@@ -5,3 +5,7 @@ FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 
 STUN_SERVERS = ["stun:stun.l.google.com:19302"]
+
+# Channel order of the decoded Pi stream. Decoding with to_ndarray("bgr24") gives
+# true BGR; set to "rgb24" only if the Pi sender publishes red/blue swapped frames.
+PI_STREAM_FORMAT = "bgr24"
@@ -0,0 +1,273 @@
+"""
+Process-wide registry of the robot arms attached over USB serial.
+
+Arms are configured once, by id, in SERIAL_ARMS instead of being hard-coded
+per controller:
+
+    SERIAL_ARMS="1=auto;2=usb:10c4:ea60:0001;hand=COM4@9600"
+
+The default configures arm 1 only. Boards are told apart by USB id alone, so
+an "auto" hand would race arm 1 for the first ESP32 it finds; give the hand a
+fixed port or its usb:VID:PID:SERIAL instead.
+
+Each entry is "<arm>=<device>[@<baud>]" where the device is
+
+    auto                  the next ESP32 / Arduino board found by USB VID:PID
+    usb:VID:PID[:SERIAL]  the board with that USB id (and serial number)
+    anything else         a fixed port name (COM8, /dev/ttyUSB0)
+
+lease_arm() hands out the arm's shared SerialPort (core/serial_service.py),
+so every controller driving an arm uses one connection and one writer thread;
+call release() on it when done. The manager keeps its own lease on every arm
+it has handed out, so the connection stays open between controllers and only
+the first one waits out the board's reset. Discovered arms are matched to
+boards on every reconnect: leased arms take free boards in the order they are
+configured and keep theirs for as long as it stays plugged in.
+"""
+
+import os
+import threading
+
+from core.serial_service import SerialPort, open_ports, open_serial_port
+
+DEFAULT_BAUDRATE = 115200
+DEFAULT_ARMS = "1=auto"
+
+# USB serial bridges on the ESP32 / Arduino boards we use: (VID, PID) -> chip
+KNOWN_USB_IDS = {
+    (0x10C4, 0xEA60): "CP210x",
+    (0x1A86, 0x7523): "CH340",
+    (0x1A86, 0x55D4): "CH9102",
+    (0x0403, 0x6001): "FT232R",
+    (0x0403, 0x6015): "FT231X",
+    (0x303A, 0x1001): "ESP32-S3 USB",
+    (0x2341, 0x0043): "Arduino Uno",
+    (0x2341, 0x0042): "Arduino Mega 2560",
+}
+
+
+class Board:
+    """A USB serial device found on this machine."""
+
+    __slots__ = ("device", "vid", "pid", "serial_number", "description")
+
+    def __init__(self, device: str, vid: int, pid: int, serial_number=None, description=""):
+        self.device = device
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+        self.description = description
+
+    @property
+    def known(self) -> bool:
+        return (self.vid, self.pid) in KNOWN_USB_IDS
+
+    def to_dict(self) -> dict:
+        return {
+            "device": self.device,
+            "usb_id": f"{self.vid:04x}:{self.pid:04x}",
+            "serial_number": self.serial_number,
+            "description": self.description,
+            "chip": KNOWN_USB_IDS.get((self.vid, self.pid)),
+        }
+
+
+def find_boards(known_only: bool = True) -> list[Board]:
+    """USB serial devices, sorted by device name; only known boards by default."""
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return []
+
+    boards = []
+    for info in list_ports.comports():
+        if info.vid is None or info.pid is None:
+            continue
+        board = Board(info.device, info.vid, info.pid, info.serial_number, info.description or "")
+        if board.known or not known_only:
+            boards.append(board)
+    boards.sort(key=lambda board: board.device)
+    return boards
+
+
+class ArmSpec:
+    """Where to find one arm: a fixed port, a USB id, or auto-discovery."""
+
+    __slots__ = ("arm", "port", "usb", "baudrate")
+
+    def __init__(self, arm: str, port=None, usb=None, baudrate: int = DEFAULT_BAUDRATE):
+        self.arm = arm
+        # Fixed device name, or None to discover one
+        self.port = port
+        # (vid, pid, serial number or None) to match, or None for any known board
+        self.usb = usb
+        self.baudrate = baudrate
+
+    @classmethod
+    def parse(cls, arm: str, text: str) -> "ArmSpec":
+        device, _, baud = text.strip().partition("@")
+        baudrate = int(baud) if baud else DEFAULT_BAUDRATE
+        if device.lower() == "auto":
+            return cls(arm, baudrate=baudrate)
+        if device.lower().startswith("usb:"):
+            fields = device[4:].split(":", 2)
+            if len(fields) < 2:
+                raise ValueError(f"Arm {arm}: expected usb:VID:PID[:SERIAL], got {device!r}")
+            serial_number = fields[2] if len(fields) > 2 and fields[2] else None
+            usb = (int(fields[0], 16), int(fields[1], 16), serial_number)
+            return cls(arm, usb=usb, baudrate=baudrate)
+        return cls(arm, port=device, baudrate=baudrate)
+
+    @property
+    def name(self) -> str:
+        """Registry name of the arm's SerialPort; fixed ports share it with direct openers."""
+        return self.port or f"arm {self.arm}"
+
+    def matches(self, board: Board) -> bool:
+        if self.usb is None:
+            return board.known
+        vid, pid, serial_number = self.usb
+        return (
+            board.vid == vid
+            and board.pid == pid
+            and (serial_number is None or board.serial_number == serial_number)
+        )
+
+    def describe(self) -> str:
+        if self.port:
+            return self.port
+        if self.usb is None:
+            return "auto"
+        vid, pid, serial_number = self.usb
+        return f"usb:{vid:04x}:{pid:04x}" + (f":{serial_number}" if serial_number else "")
+
+
+def parse_arms(text: str) -> dict[str, ArmSpec]:
+    """{arm id: ArmSpec} from a SERIAL_ARMS string, in the order given."""
+    arms = {}
+    for entry in text.split(";"):
+        if not entry.strip():
+            continue
+        arm, sep, device = entry.partition("=")
+        if not sep:
+            raise ValueError(f"SERIAL_ARMS entry {entry!r} is not <arm>=<device>")
+        arm = arm.strip()
+        arms[arm] = ArmSpec.parse(arm, device)
+    return arms
+
+
+class DeviceManager:
+    """Maps arm ids to serial devices and leases out their shared ports."""
+
+    def __init__(self, arms: dict[str, ArmSpec]):
+        self.arms = arms
+        # Arm id -> device it was last matched to (discovered arms only)
+        self._assigned: dict[str, str] = {}
+        # The manager's own lease per arm, so its connection (and the board's
+        # reset delay) outlives the controllers that come and go
+        self._persistent: dict[str, SerialPort] = {}
+        self._lock = threading.Lock()
+
+    def has_arm(self, arm) -> bool:
+        return str(arm) in self.arms
+
+    def lease(self, arm, baudrate: int | None = None, negotiate: bool = False) -> SerialPort:
+        """
+        The arm's shared SerialPort, with one more client; release() it when
+        done. negotiate=True probes for the binary protocol (servo_arm*.ino).
+        """
+        spec = self.arms.get(str(arm))
+        if spec is None:
+            raise KeyError(
+                f"Unknown arm {arm!r}; SERIAL_ARMS configures {', '.join(self.arms) or 'none'}"
+            )
+        baudrate = baudrate or spec.baudrate
+        with self._lock:
+            if spec.arm not in self._persistent:
+                self._persistent[spec.arm] = self._open(spec, baudrate, negotiate)
+        return self._open(spec, baudrate, negotiate)
+
+    def close(self) -> None:
+        """Drop the persistent connections; ports close once their last lease is released."""
+        with self._lock:
+            persistent, self._persistent = self._persistent, {}
+        for serial_port in persistent.values():
+            serial_port.release()
+
+    def _open(self, spec: ArmSpec, baudrate: int, negotiate: bool) -> SerialPort:
+        if spec.port:
+            return open_serial_port(spec.port, baudrate, negotiate=negotiate)
+        return open_serial_port(
+            spec.name, baudrate, locate=lambda: self.locate(spec.arm), negotiate=negotiate
+        )
+
+    def locate(self, arm: str) -> str | None:
+        """Device for the arm right now, or None if no matching board is plugged in."""
+        spec = self.arms[arm]
+        if spec.port:
+            return spec.port
+        boards = find_boards(known_only=False)
+        with self._lock:
+            self._assign(boards, arm)
+            return self._assigned.get(arm)
+
+    def _assign(self, boards: list[Board], arm: str) -> None:
+        present = {board.device for board in boards}
+        # The asking arm counts as leased even before its port is registered
+        ports = open_ports()
+        ports.setdefault(self.arms[arm].name, None)
+        # Devices held by fixed-port arms and by ports opened directly
+        discovered = {spec.name for spec in self.arms.values() if not spec.port}
+        held = {device for name, device in ports.items() if device and name not in discovered}
+        held.update(spec.port for spec in self.arms.values() if spec.port)
+
+        # Leased arms keep a board that is still plugged in; the others take
+        # free ones, arms asking for a USB id first, then in configuration
+        # order. Released arms give theirs up.
+        kept = {
+            other: device
+            for other, device in self._assigned.items()
+            if self.arms[other].name in ports and device in present and device not in held
+        }
+        taken = held | set(kept.values())
+        for other, spec in sorted(self.arms.items(), key=lambda item: item[1].usb is None):
+            if spec.port or other in kept or spec.name not in ports:
+                continue
+            for board in boards:
+                if board.device not in taken and spec.matches(board):
+                    kept[other] = board.device
+                    taken.add(board.device)
+                    break
+        self._assigned = kept
+
+    def stats(self) -> dict:
+        ports = open_ports()
+        arms = []
+        for arm, spec in self.arms.items():
+            device = spec.port or self._assigned.get(arm)
+            arms.append({
+                "arm": arm,
+                "spec": spec.describe(),
+                "baudrate": spec.baudrate,
+                "device": device,
+                "leased": spec.name in ports,
+            })
+        return {
+            "arms": arms,
+            "boards": [board.to_dict() for board in find_boards(known_only=False)],
+        }
+
+
+device_manager = DeviceManager(parse_arms(os.environ.get("SERIAL_ARMS", DEFAULT_ARMS)))
+
+
+def lease_arm(arm="1", baudrate: int | None = None, negotiate: bool = False) -> SerialPort:
+    return device_manager.lease(arm, baudrate, negotiate)
+
+
+def close_arms() -> None:
+    device_manager.close()
+
+
+def device_stats() -> dict:
+    return device_manager.stats()
@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+
+_CONVERSIONS = {
+    ("bgr24", "rgb24"): cv2.COLOR_BGR2RGB,
+    ("rgb24", "bgr24"): cv2.COLOR_RGB2BGR,
+}
+
+
+class Frame:
+    """
+    A camera frame plus the pixel format its bytes are actually in.
+
+    The pixel array is read-only and shared: every stage borrows it instead of
+    copying. Converting to another format happens at most once per frame (the
+    result is cached), and a stage that needs to draw asks for writable(), which
+    is the only place a full copy is made.
+    """
+
+    __slots__ = ("data", "format", "_converted")
+
+    def __init__(self, data: np.ndarray, format: str = "bgr24"):
+        data.flags.writeable = False
+        self.data = data
+        self.format = format
+        self._converted = {format: data}
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def to(self, format: str) -> np.ndarray:
+        """Read-only array in the requested format (converted once, then cached)."""
+        converted = self._converted.get(format)
+        if converted is None:
+            code = _CONVERSIONS.get((self.format, format))
+            if code is None:
+                raise ValueError(f"Cannot convert frame from {self.format} to {format}")
+            converted = cv2.cvtColor(self.data, code)
+            converted.flags.writeable = False
+            self._converted[format] = converted
+        return converted
+
+    def bgr(self) -> np.ndarray:
+        return self.to("bgr24")
+
+    def writable(self, format: str = "bgr24") -> np.ndarray:
+        """An owned, writable copy for stages that draw on the frame."""
+        return self.to(format).copy()
+
+
+def as_frame(frame, format: str = "bgr24") -> Frame:
+    """Wrap a bare ndarray (assumed to be in format) as a Frame; Frames pass through."""
+    if isinstance(frame, Frame):
+        return frame
+    return Frame(frame, format)
@@ -1,13 +1,32 @@
 from abc import ABC, abstractmethod
 import numpy as np
 
+from core.frame import Frame, as_frame
+
 
 class VideoSource(ABC):
     @abstractmethod
     def read(self) -> np.ndarray:
         pass
 
+    async def next_frame(
+        self, after_seq: int, timeout: float | None = None
+    ) -> tuple[int, Frame] | None:
+        """
+        Return (seq, Frame) for a frame newer than after_seq, or None if none arrived.
+
+        Sources backed by a FrameRing override this; the fallback polls read() and
+        treats every call as a new BGR frame.
+        """
+        frame = self.read()
+        if frame is None:
+            return None
+        return after_seq + 1, as_frame(frame)
+
+    def stop(self) -> None:
+        pass
+
 class frameProcessor(ABC):
     @abstractmethod
     def process(self, frame: np.ndarray) -> np.ndarray:
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,58 @@
+import threading
+
+
+class LatencyStats:
+    """Thread-safe latency counter: sample count, last, moving average and max (ms)."""
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        with self._lock:
+            self.count += 1
+            self.last_ms = ms
+            self.avg_ms = ms if self.count == 1 else self.avg_ms + self.alpha * (ms - self.avg_ms)
+            self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "last_ms": round(self.last_ms, 2),
+                "avg_ms": round(self.avg_ms, 2),
+                "max_ms": round(self.max_ms, 2),
+            }
+
+
+class StageMetrics:
+    """Named LatencyStats per pipeline stage plus simple event counters."""
+
+    def __init__(self, *stages: str):
+        self.stages = {name: LatencyStats() for name in stages}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            with self._lock:
+                stats = self.stages.setdefault(stage, LatencyStats())
+        stats.add(seconds)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "stages": {name: stats.to_dict() for name, stats in self.stages.items()},
+            "counters": counters,
+        }
@@ -0,0 +1,493 @@
+"""
+Shared, non-blocking serial ports for the robot controllers.
+
+Controllers never write to pyserial directly. open_serial_port() hands them
+the SerialPort for their device, shared by every controller using the same
+port name, and send() only drops the command into a small latest-wins table.
+One writer thread per port opens the device (including the board's reset
+delay), writes, and reopens it after errors, so a slow or unplugged
+USB-serial link never adds latency to the frame path.
+
+Joint setpoints sent with send_joints() use the binary framing from
+core/servo_protocol.py when the firmware answers the negotiation, and their
+text form otherwise. Only ports opened with negotiate=True are probed: the
+servo_arm.ino and servo_arm2.ino (hand mirror) controllers ask for it, boards
+driven by plain text commands never see the "PROTO?" line. Firmware
+announcing a trajectory buffer also accepts stream_trajectory(): whole joint
+trajectories fed to the board's ring buffer in chunks, paced by the free-slot
+credit it reports back.
+
+A port opened with a locate callable (see core/device_manager.py) is named
+after its arm rather than a device path; the writer asks locate() for the
+device on every (re)connect, so a board that re-enumerates under another
+name after being unplugged is picked up again.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from core import servo_protocol
+from core.metrics import StageMetrics
+
+# Boards reset when the port opens; the first write has to wait this long
+OPEN_DELAY_S = 2.0
+RECONNECT_S = 2.0
+# Distinct command keys buffered per port; beyond this the oldest is dropped
+MAX_PENDING = 4
+# How long to wait for the firmware's "PROTO BIN" reply after opening
+NEGOTIATE_TIMEOUT_S = 1.5
+# Set to 0 to keep every port on the text commands, even those asking to negotiate
+BINARY_ENABLED = os.environ.get("SERIAL_BINARY", "1").lower() not in ("0", "false", "no")
+# A trajectory stream gives up after this long without a buffer report
+STREAM_TIMEOUT_S = 2.0
+# While waiting for buffer credit, poll the board this often
+STREAM_POLL_S = 0.1
+
+
+class JointCommand:
+    """Joint setpoint plus its text form, encoded when the writer takes it."""
+
+    __slots__ = ("angles", "text")
+
+    def __init__(self, angles, text: bytes):
+        self.angles = angles
+        self.text = text
+
+
+class TrajectoryChunk:
+    """Up to MAX_CHUNK_POINTS trajectory points (six angle bytes each); empty polls."""
+
+    __slots__ = ("period_ms", "points", "count")
+
+    def __init__(self, period_ms: int, points: bytes = b""):
+        self.period_ms = period_ms
+        self.points = points
+        self.count = len(points) // servo_protocol.NUM_JOINTS
+
+
+# Queued by abort_trajectory(); encoded as CMD_ABORT
+_ABORT = TrajectoryChunk(0)
+
+
+class SerialPort:
+    """
+    One serial device and its writer thread.
+
+    Commands are keyed setpoints: a command that has not been written yet is
+    replaced by the next one with the same key ("coalesced"), so the device
+    always receives the newest state and a backlog can never build up.
+
+    Joint commands are delta-encoded against what was actually written, at
+    write time, so coalescing never loses a joint change. In binary mode a
+    reader thread takes the board's CMD_STATE replies as position feedback.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int,
+        open_delay_s: float = OPEN_DELAY_S,
+        max_pending: int = MAX_PENDING,
+        locate=None,
+        negotiate: bool = False,
+    ):
+        self.port = port
+        self.locate = locate
+        # Probe for the binary protocol on connect (firmware known to answer it)
+        self.negotiate = negotiate
+        # Device path currently in use (None while a located port is closed)
+        self.device = None if locate is not None else port
+        self.baudrate = baudrate
+        self.open_delay_s = open_delay_s
+        self.max_pending = max_pending
+        self.metrics = StageMetrics("queue", "write", "ack")
+        self.connected = False
+        self.binary = False
+        # Angles last reported by the board (binary mode only)
+        self.feedback: list[int] | None = None
+        self.clients = 0
+
+        self._ser = None
+        self._encoder = servo_protocol.JointDeltaEncoder()
+        self._ack_sent: dict[int, float] = {}
+        self._reader = None
+        self._warned = False
+
+        # Trajectory streaming: ring size the firmware announced (0 = none),
+        # its last reported free slots, chunks waiting for the writer (sent
+        # before any setpoint) and written chunks not yet answered (seq -> points)
+        self.trajectory_buffer = 0
+        self._buffer_free = 0
+        self._buffer_reply_at = 0.0
+        self._chunks: deque[TrajectoryChunk] = deque()
+        self._queued_points = 0
+        self._unacked: OrderedDict[int, int] = OrderedDict()
+        self._stream_id = 0
+        self._pending: OrderedDict[str, tuple[bytes | JointCommand, float]] = OrderedDict()
+        self._cond = threading.Condition()
+        self._running = True
+        self._stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, name=f"serial-{port}", daemon=True
+        )
+        self.thread.start()
+
+    def send(self, payload: bytes | JointCommand, key: str = "default") -> bool:
+        """Queue payload for the writer thread; never blocks on the device."""
+        with self._cond:
+            if not self._running:
+                self.metrics.incr("dropped")
+                return False
+            if self._pending.pop(key, None) is not None:
+                self.metrics.incr("coalesced")
+            elif len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.metrics.incr("dropped")
+            self._pending[key] = (payload, time.perf_counter())
+            self._cond.notify()
+        return True
+
+    def send_joints(self, angles, text: bytes, key: str = "joints") -> bool:
+        """Queue a joint setpoint; framed as binary or sent as text depending on the firmware."""
+        return self.send(JointCommand(tuple(angles), text), key=key)
+
+    def stream_trajectory(
+        self,
+        points,
+        period_s: float,
+        chunk_points: int = servo_protocol.MAX_CHUNK_POINTS,
+    ) -> bool:
+        """
+        Play a joint trajectory on the board: points is a sequence of 6-angle
+        rows, one every period_s. Blocks (on the caller's thread) until the
+        board has played the last point. Returns False if the firmware has no
+        trajectory buffer, the stream was aborted, or the board stopped
+        answering.
+        """
+        period_ms = int(round(period_s * 1000))
+        chunk_points = max(1, min(int(chunk_points), servo_protocol.MAX_CHUNK_POINTS))
+        rows = [
+            bytes(min(max(int(round(a)), 0), servo_protocol.MAX_ANGLE) for a in row[:6])
+            for row in points
+        ]
+        with self._cond:
+            if not (self.binary and self.trajectory_buffer):
+                return False
+            stream_id = self._stream_id
+        started = time.monotonic()
+
+        for start in range(0, len(rows), chunk_points):
+            chunk = TrajectoryChunk(period_ms, b"".join(rows[start:start + chunk_points]))
+            if not self._reserve(chunk.count, stream_id, started, period_ms, chunk):
+                return False
+        # Done once every slot is free again and nothing is in flight
+        if not self._reserve(self.trajectory_buffer, stream_id, started, period_ms):
+            return False
+        self.metrics.incr("trajectories")
+        return True
+
+    def abort_trajectory(self) -> None:
+        """Stop a running stream and empty the board's trajectory buffer."""
+        with self._cond:
+            self._stream_id += 1
+            self._queued_points = 0
+            self._chunks.clear()
+            if self.binary and self.trajectory_buffer:
+                self._chunks.append(_ABORT)
+            self._cond.notify_all()
+
+    def _reserve(
+        self,
+        count: int,
+        stream_id: int,
+        started: float,
+        period_ms: int,
+        chunk: TrajectoryChunk | None = None,
+    ) -> bool:
+        """Wait for count free slots, then queue chunk (if any) against them."""
+        with self._cond:
+            while True:
+                if self._stream_id != stream_id or not (self.binary and self._running):
+                    return False
+                in_flight = sum(self._unacked.values()) + self._queued_points
+                if self._buffer_free - in_flight >= count:
+                    if chunk is not None:
+                        self._chunks.append(chunk)
+                        self._queued_points += chunk.count
+                        self.metrics.incr("trajectory_points", chunk.count)
+                        self._cond.notify_all()
+                    return True
+                if time.monotonic() - max(started, self._buffer_reply_at) > STREAM_TIMEOUT_S:
+                    self.metrics.incr("stream_timeouts")
+                    print(f"Trajectory stream on {self.port} timed out")
+                    return False
+                if not self._cond.wait(STREAM_POLL_S) and not self._chunks:
+                    # Quiet link: poll, so a lost buffer report cannot stall the stream
+                    self._chunks.append(TrajectoryChunk(period_ms))
+                    self._cond.notify_all()
+
+    def release(self) -> None:
+        """Drop one client; the port closes when the last one releases it."""
+        _release_port(self)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._stopped.set()
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        try:
+            import serial
+        except ImportError:
+            print(f"pyserial is not installed; serial output on {self.port} disabled")
+            with self._cond:
+                self._running = False
+            return
+
+        while True:
+            if not self.connected and not self._open(serial):
+                if self._stopped.wait(RECONNECT_S):
+                    break
+                continue
+
+            with self._cond:
+                self._cond.wait_for(lambda: self._chunks or self._pending or not self._running)
+                if self._chunks:
+                    payload, queued_at = self._chunks.popleft(), None
+                elif self._pending:
+                    _key, (payload, queued_at) = self._pending.popitem(last=False)
+                else:
+                    break
+
+            start = time.perf_counter()
+            if queued_at is not None:
+                self.metrics.add("queue", start - queued_at)
+            payload = self._encode(payload)
+            if payload is None:
+                self.metrics.incr("unchanged")
+                continue
+            try:
+                self._ser.write(payload)
+            except Exception as exc:
+                self.metrics.incr("errors")
+                print(f"Serial write error on {self.port}: {exc}")
+                self._disconnect()
+                continue
+            self.metrics.add("write", time.perf_counter() - start)
+            self.metrics.incr("sent")
+            self.metrics.incr("bytes", len(payload))
+
+        self._disconnect()
+
+    def _open(self, serial) -> bool:
+        device = self.locate() if self.locate is not None else self.port
+        if device is None:
+            if not self._warned:
+                print(f"⚠ No board found for {self.port}; waiting for one in background")
+                self._warned = True
+            return False
+        try:
+            ser = serial.Serial(device, self.baudrate, timeout=1)
+        except Exception as exc:
+            if not self._warned:
+                print(f"⚠ Could not open serial port {device}: {exc}; retrying in background")
+                self._warned = True
+            return False
+
+        self._stopped.wait(self.open_delay_s)
+        self._ser = ser
+        self.device = device
+        self._warned = False
+        if self.negotiate and BINARY_ENABLED:
+            version, buffer_points = self._negotiate(ser)
+        else:
+            version, buffer_points = 0, 0
+        with self._cond:
+            self.binary = version >= 1
+            self.trajectory_buffer = self._buffer_free = buffer_points
+        self._encoder.reset()
+        self.connected = True
+        self.metrics.incr("connects")
+        if self.binary:
+            self._reader = threading.Thread(
+                target=self._read_loop, args=(ser,), name=f"serial-{self.port}-rx", daemon=True
+            )
+            self._reader.start()
+        mode = "binary" if self.binary else "text"
+        if self.trajectory_buffer:
+            mode += f", {self.trajectory_buffer}-point trajectory buffer"
+        name = self.port if device == self.port else f"{self.port} ({device})"
+        print(f"🟢 Serial connected on {name} @ {self.baudrate} ({mode})")
+        return True
+
+    def _negotiate(self, ser) -> tuple[int, int]:
+        try:
+            ser.reset_input_buffer()
+            ser.write(servo_protocol.QUERY)
+            deadline = time.monotonic() + NEGOTIATE_TIMEOUT_S
+            ser.timeout = NEGOTIATE_TIMEOUT_S / 5
+            # Skip boot banners and echoes until the reply or the deadline
+            while time.monotonic() < deadline:
+                version, buffer_points = servo_protocol.parse_reply(ser.readline())
+                if version >= 1:
+                    return version, buffer_points
+        except Exception as exc:
+            print(f"Serial protocol negotiation on {self.port} failed: {exc}")
+        finally:
+            ser.timeout = 1
+        return 0, 0
+
+    def _encode(self, payload: bytes | JointCommand | TrajectoryChunk) -> bytes | None:
+        if isinstance(payload, TrajectoryChunk):
+            return self._encode_chunk(payload)
+        if not isinstance(payload, JointCommand):
+            return payload
+        if not self.binary:
+            return payload.text
+        frame, ack = self._encoder.encode(payload.angles)
+        if ack:
+            self._ack_sent[self._encoder.seq] = time.perf_counter()
+        return frame
+
+    def _encode_chunk(self, chunk: TrajectoryChunk) -> bytes | None:
+        if not self.binary:
+            return None
+        seq = self._encoder.next_seq()
+        with self._cond:
+            if chunk is _ABORT:
+                self._unacked.clear()
+                return servo_protocol.encode_frame(seq, servo_protocol.CMD_ABORT)
+            self._queued_points -= chunk.count
+            self._unacked[seq] = chunk.count
+        return servo_protocol.encode_trajectory(seq, chunk.period_ms, chunk.points)
+
+    def _read_loop(self, ser) -> None:
+        decoder = servo_protocol.FrameDecoder()
+        while self._ser is ser:
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except Exception:
+                break
+            for seq, cmd, payload in decoder.feed(data):
+                if cmd == servo_protocol.CMD_BUFFER and payload:
+                    self._buffer_report(seq, payload[0])
+                    self.feedback = list(payload[1:])
+                    continue
+                if cmd != servo_protocol.CMD_STATE:
+                    continue
+                self.feedback = list(payload)
+                self.metrics.incr("acks")
+                sent = self._ack_sent.pop(seq, None)
+                if sent is not None:
+                    self.metrics.add("ack", time.perf_counter() - sent)
+            if decoder.crc_errors:
+                self.metrics.incr("crc_errors", decoder.crc_errors)
+                decoder.crc_errors = 0
+
+    def _buffer_report(self, seq: int, free: int) -> None:
+        with self._cond:
+            # The board answers in order: this reply also covers earlier chunks
+            if seq in self._unacked:
+                while self._unacked.popitem(last=False)[0] != seq:
+                    pass
+            self._buffer_free = free
+            self._buffer_reply_at = time.monotonic()
+            self._cond.notify_all()
+
+    def _disconnect(self) -> None:
+        with self._cond:
+            self._chunks.clear()
+            self._queued_points = 0
+            self._unacked.clear()
+            self.trajectory_buffer = self._buffer_free = 0
+            self._cond.notify_all()
+        if self._ser is None:
+            return
+        try:
+            self._ser.close()
+        except Exception:
+            pass
+        self._ser = None
+        self.connected = False
+        self.binary = False
+        self._ack_sent.clear()
+        if self.locate is not None:
+            self.device = None
+        print(f"🔴 Serial connection {self.port} closed")
+
+    def stats(self) -> dict:
+        data = self.metrics.to_dict()
+        with self._cond:
+            pending = len(self._pending)
+        data.update(
+            port=self.port,
+            device=self.device,
+            baudrate=self.baudrate,
+            connected=self.connected,
+            protocol="binary" if self.binary else "text",
+            feedback=self.feedback,
+            trajectory_buffer=self.trajectory_buffer,
+            clients=self.clients,
+            pending=pending,
+        )
+        return data
+
+
+# =====================================================
+# One SerialPort per device, shared by its controllers
+# =====================================================
+
+_ports: dict[str, SerialPort] = {}
+_ports_lock = threading.Lock()
+
+
+def open_serial_port(
+    port: str, baudrate: int, locate=None, negotiate: bool = False
+) -> SerialPort:
+    """
+    Attach a client to the port's writer, starting it if needed. With
+    locate, port is only a name and locate() returns the device to open.
+    negotiate=True asks for the binary protocol (servo_arm*.ino firmware); a
+    port already connected on text picks it up at its next reconnect.
+    """
+    with _ports_lock:
+        serial_port = _ports.get(port)
+        if serial_port is None:
+            serial_port = SerialPort(port, baudrate, locate=locate, negotiate=negotiate)
+            _ports[port] = serial_port
+        elif negotiate:
+            serial_port.negotiate = True
+        elif serial_port.baudrate != baudrate:
+            print(
+                f"⚠ {port} is already open at {serial_port.baudrate} baud; "
+                f"ignoring requested {baudrate}"
+            )
+        serial_port.clients += 1
+        return serial_port
+
+
+def _release_port(serial_port: SerialPort) -> None:
+    with _ports_lock:
+        serial_port.clients -= 1
+        if serial_port.clients > 0:
+            return
+        if _ports.get(serial_port.port) is serial_port:
+            del _ports[serial_port.port]
+    serial_port.stop()
+
+
+def open_ports() -> dict[str, str | None]:
+    """{port name: device path it holds, None while a located port has none}."""
+    with _ports_lock:
+        return {name: serial_port.device for name, serial_port in _ports.items()}
+
+
+def serial_stats() -> list[dict]:
+    with _ports_lock:
+        ports = list(_ports.values())
+    return [serial_port.stats() for serial_port in ports]
@@ -0,0 +1,199 @@
+"""
+Compact binary servo framing, negotiated alongside the text commands.
+
+The host sends the text line "PROTO?" after the board has reset; firmware
+that understands frames answers "PROTO BIN <version> [<buffer points>]",
+anything else (an older sketch answers "ARM: UNKNOWN COMMAND") keeps the port
+on text. Version 2 adds trajectory streaming into a ring buffer of the
+announced size. Frames start with SYNC, which never occurs in the ASCII
+commands, so the firmware accepts both on the same link.
+
+Frame layout:
+
+    sync   0xA5
+    len    payload length
+    seq    sequence number, wraps at 256
+    cmd    host -> board: CMD_JOINTS (FLAG_ACK set asks for a reply),
+           CMD_TRAJECTORY, CMD_ABORT
+           board -> host: CMD_STATE (the six current angles),
+           CMD_BUFFER (free ring slots, then the six current angles)
+    payload
+    crc    CRC-8 (poly 0x07) over len, seq, cmd and payload
+
+A CMD_JOINTS payload is a joint mask (bit i = joint i follows) and one angle
+byte (0-180 degrees) per set bit, so a frame moving two joints is 8 bytes
+against 18-24 for "90,90,90,90,90,90\\n": about 8 ms instead of 20 ms at
+9600 baud.
+
+A CMD_TRAJECTORY payload is the sample period in ms and a point count, then
+six angle bytes per point. The board appends the points to its ring buffer,
+plays one per period and answers every chunk with CMD_BUFFER, which the host
+uses as flow-control credit; a chunk of zero points only polls. CMD_ABORT
+empties the buffer.
+"""
+
+SYNC = 0xA5
+PROTOCOL_VERSION = 2
+QUERY = b"PROTO?\n"
+REPLY_PREFIX = b"PROTO BIN "
+
+CMD_JOINTS = 0x01
+CMD_STATE = 0x02
+CMD_TRAJECTORY = 0x03
+CMD_BUFFER = 0x04
+CMD_ABORT = 0x05
+FLAG_ACK = 0x80
+
+NUM_JOINTS = 6
+MAX_ANGLE = 180
+# A full frame (all joints, with ACK) goes out at least this often, so a frame
+# lost on the wire can only leave a joint stale for a moment
+KEYFRAME_INTERVAL = 15
+# Trajectory points per frame (the firmware's frame buffer is sized for this)
+MAX_CHUNK_POINTS = 10
+
+
+def _crc_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc8(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = _CRC_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(seq: int, cmd: int, payload: bytes = b"") -> bytes:
+    body = bytes((len(payload), seq & 0xFF, cmd)) + payload
+    return bytes((SYNC,)) + body + bytes((crc8(body),))
+
+
+def encode_joints(seq: int, joints: dict[int, int], ack: bool = False) -> bytes:
+    """A CMD_JOINTS frame for {joint index: angle}."""
+    mask = 0
+    angles = bytearray()
+    for index in sorted(joints):
+        mask |= 1 << index
+        angles.append(min(max(int(round(joints[index])), 0), MAX_ANGLE))
+    cmd = CMD_JOINTS | (FLAG_ACK if ack else 0)
+    return encode_frame(seq, cmd, bytes((mask,)) + bytes(angles))
+
+
+def encode_trajectory(seq: int, period_ms: int, points: bytes) -> bytes:
+    """A CMD_TRAJECTORY frame; points is six angle bytes per point."""
+    count = len(points) // NUM_JOINTS
+    if count > MAX_CHUNK_POINTS:
+        raise ValueError(f"At most {MAX_CHUNK_POINTS} points per chunk, got {count}")
+    header = bytes((min(max(int(period_ms), 1), 255), count))
+    return encode_frame(seq, CMD_TRAJECTORY, header + points)
+
+
+def parse_reply(line: bytes) -> tuple[int, int]:
+    """
+    (protocol version, trajectory buffer points) from a "PROTO BIN ..." reply
+    line; (0, 0) for anything else.
+    """
+    fields = line.strip().split()
+    if len(fields) < 3 or fields[:2] != REPLY_PREFIX.split():
+        return 0, 0
+    try:
+        version = int(fields[2])
+        buffer_points = int(fields[3]) if len(fields) > 3 and version >= 2 else 0
+    except ValueError:
+        return 0, 0
+    return version, buffer_points
+
+
+class JointDeltaEncoder:
+    """
+    Frames joint setpoints for one device, carrying only the joints that
+    changed since the last frame written.
+
+    Every KEYFRAME_INTERVAL-th frame is a full one with FLAG_ACK set, and so
+    is the first frame after motion stops, so the board always converges on
+    the last setpoint even if a delta was lost.
+    """
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._last: list[int] | None = None
+        self._since_keyframe = 0
+
+    def reset(self) -> None:
+        """Forget the device state (after a reconnect the next frame is full)."""
+        self._last = None
+
+    def encode(self, angles) -> tuple[bytes | None, bool]:
+        """(frame or None if nothing needs sending, whether it asks for an ACK)."""
+        angles = [min(max(int(round(a)), 0), MAX_ANGLE) for a in angles[:NUM_JOINTS]]
+        if self._last is None:
+            changed = dict(enumerate(angles))
+        else:
+            changed = {i: a for i, a in enumerate(angles) if a != self._last[i]}
+
+        keyframe = self._last is None or self._since_keyframe >= self.keyframe_interval
+        if not changed and not keyframe:
+            if self._since_keyframe == 0:
+                return None, False
+            # Motion stopped: confirm the final pose once
+            keyframe = True
+
+        if keyframe:
+            changed = dict(enumerate(angles))
+            self._since_keyframe = 0
+        else:
+            self._since_keyframe += 1
+
+        self._last = angles
+        return encode_joints(self.next_seq(), changed, ack=keyframe), keyframe
+
+    def next_seq(self) -> int:
+        """Sequence number for the next frame on this link (shared by all frame types)."""
+        self.seq = (self.seq + 1) & 0xFF
+        return self.seq
+
+
+class FrameDecoder:
+    """Incremental parser for frames from the board; skips text and bad CRCs."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data: bytes) -> list[tuple[int, int, bytes]]:
+        """Append received bytes; returns complete (seq, cmd, payload) frames."""
+        buffer = self._buffer
+        buffer.extend(data)
+        frames = []
+        while True:
+            start = buffer.find(SYNC)
+            if start < 0:
+                buffer.clear()
+                break
+            del buffer[:start]
+            if len(buffer) < 5:
+                break
+            length = buffer[1]
+            end = 4 + length + 1
+            if len(buffer) < end:
+                break
+            body = bytes(buffer[1:end - 1])
+            if crc8(body) != buffer[end - 1]:
+                # Not a frame after all (or corrupted); resync on the next SYNC
+                self.crc_errors += 1
+                del buffer[:1]
+                continue
+            frames.append((body[1], body[2], body[3:]))
+            del buffer[:end]
+        return frames
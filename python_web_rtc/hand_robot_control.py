@@ -1,25 +1,41 @@
 import os
-import time
+
+from core.device_manager import device_manager, lease_arm
+from core.serial_service import open_serial_port
 
 
 class HandRobotController:
-    """Sends 6 comma-separated servo angles to the hand-mirror Arduino firmware."""
+    """
+    Sends 6 comma-separated servo angles to the hand-mirror Arduino firmware.
 
-    def __init__(self, serial_port: str | None = None, baudrate: int | None = None):
-        self.serial_port = serial_port or os.environ.get("HAND_MIRROR_SERIAL_PORT", "COM4")
-        self.baudrate = int(baudrate or os.environ.get("HAND_MIRROR_BAUD", "9600"))
-        self.ser = None
-        self.connected = False
+    Writes go through the shared serial writer: send_angles() returns at once
+    and an angle set the link has not taken yet is replaced by the newer one.
+    The port is probed for the binary framing (core/servo_protocol.py):
+    servo_arm2.ino answers it and then gets only the joints that changed,
+    firmware that does not keeps receiving the text line.
 
-        try:
-            import serial
+    The board is HAND_MIRROR_SERIAL_PORT if set, else the HAND_MIRROR_ARM
+    arm (default "hand") when SERIAL_ARMS (core/device_manager.py) configures
+    it, else COM4. The hand is never auto-discovered by default, so it cannot
+    take the servo arm's board.
+    """
+
+    def __init__(self, serial_port: str | None = None, baudrate: int | None = None):
+        self.serial_port = serial_port or os.environ.get("HAND_MIRROR_SERIAL_PORT")
+        baudrate = baudrate or os.environ.get("HAND_MIRROR_BAUD")
+        arm = os.environ.get("HAND_MIRROR_ARM", "hand")
+        if not self.serial_port and device_manager.has_arm(arm):
+            self.port = lease_arm(arm, int(baudrate) if baudrate else None, negotiate=True)
+        else:
+            self.port = open_serial_port(
+                self.serial_port or "COM4", int(baudrate or 9600), negotiate=True
+            )
+        self.serial_port = self.port.port
+        self.baudrate = self.port.baudrate
 
-            self.ser = serial.Serial(self.serial_port, self.baudrate, timeout=1)
-            time.sleep(2)
-            self.connected = True
-            print(f"Hand mirror serial connected on {self.serial_port} @ {self.baudrate}")
-        except Exception as exc:
-            print(f"Hand mirror serial not connected ({self.serial_port}): {exc}")
+    @property
+    def connected(self) -> bool:
+        return self.port is not None and self.port.connected
 
     def send_angles(
         self,
@@ -32,21 +48,18 @@ class HandRobotController:
     ) -> None:
         msg = f"{base},{shoulder},{elbow},{wrist_pitch},{wrist_roll},{gripper}\n"
 
-        if self.ser is None:
+        if self.port is None:
             return
 
-        try:
-            self.ser.write(msg.encode())
-            self.connected = True
-        except Exception as exc:
-            self.connected = False
-            print(f"Hand mirror serial error: {exc}")
+        # Binary delta frames when the firmware negotiated them, this text line otherwise
+        self.port.send_joints(
+            (base, shoulder, elbow, wrist_pitch, wrist_roll, gripper), msg.encode(), key="angles"
+        )
 
     def close(self) -> None:
-        if self.ser:
-            self.ser.close()
-            self.ser = None
-            self.connected = False
+        if self.port is not None:
+            self.port.release()
+            self.port = None
 
 
 _controller: HandRobotController | None = None
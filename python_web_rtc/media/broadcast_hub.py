@@ -0,0 +1,216 @@
+import threading
+import time
+from typing import Callable, Hashable
+
+from core.interface import VideoSource, frameProcessor
+from core.metrics import StageMetrics
+from media.frame_ring import FrameRing
+
+
+class PassthroughProcessor(frameProcessor):
+    """Viewer-side processor for hub subscribers: the hub already did the work."""
+
+    def process(self, frame):
+        return frame
+
+
+class ProcessingChannel:
+    """
+    Runs one processor over one source, once per new source frame.
+
+    Annotated frames go into an output FrameRing that any number of viewer
+    tracks read from, so inference cost no longer scales with viewer count.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        source: VideoSource,
+        processor: frameProcessor,
+        owns_source: bool = False,
+    ):
+        self.key = key
+        self.source = source
+        self.processor = processor
+        self.owns_source = owns_source
+        self.output = FrameRing()
+        self.subscribers = 0
+        self.metrics = StageMetrics("process")
+        self.running = True
+
+        self.thread = threading.Thread(
+            target=self._run, name=f"hub-{key}", daemon=True
+        )
+        self.thread.start()
+
+    def _run(self):
+        source = self.source
+        last_seq = 0
+        while self.running:
+            if self.source is not source:
+                # Rebound to a new source: its ring counts from the start again
+                source = self.source
+                last_seq = 0
+            entry = source.ring.wait(last_seq, timeout=0.5)
+            if entry is None:
+                continue
+            last_seq, frame = entry
+
+            start = time.perf_counter()
+            try:
+                annotated = self.processor.process(frame.bgr())
+            except Exception as exc:
+                self.metrics.incr("errors")
+                print(f"Hub channel {self.key} processing error:", exc)
+                continue
+            self.metrics.add("process", time.perf_counter() - start)
+
+            self.output.push(annotated)
+
+    def rebind(self, source: VideoSource) -> None:
+        """Switch to a new source; viewers keep reading the same output ring."""
+        self.source = source
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=2.0)
+        _close(self.key, self.processor, self.source if self.owns_source else None)
+
+    def stats(self) -> dict:
+        data = self.metrics.to_dict()
+        data["key"] = str(self.key)
+        data["subscribers"] = self.subscribers
+        data["frames"] = self.output.seq
+        return data
+
+
+class HubSubscription(VideoSource):
+    """A viewer's handle on a channel; behaves like any other VideoSource."""
+
+    def __init__(self, hub: "BroadcastHub", channel: ProcessingChannel):
+        self.hub = hub
+        self.channel = channel
+        self.ring = channel.output
+        self._closed = False
+
+    def read(self):
+        latest = self.ring.latest()
+        if latest is None:
+            return None
+        return latest[1].writable()
+
+    async def next_frame(self, after_seq: int, timeout: float | None = None):
+        return await self.ring.next_frame(after_seq, timeout)
+
+    def stop(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.hub.unsubscribe(self.channel.key)
+
+
+class BroadcastHub:
+    """
+    Keeps one ProcessingChannel per (processor type, source) and fans its output
+    out to every subscribed viewer. Late joiners attach to the running channel;
+    the channel and its processor are torn down when the last viewer leaves.
+    """
+
+    def __init__(self):
+        self._channels: dict[Hashable, ProcessingChannel] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        key: Hashable,
+        source_factory: Callable[[], VideoSource],
+        processor_factory: Callable[[], frameProcessor],
+        owns_source: bool = False,
+    ) -> HubSubscription:
+        """
+        Join the channel for key, creating it from the factories on first use.
+
+        owns_source=True stops the source along with the channel (e.g. a local
+        webcam); shared sources such as the Pi ingest stream are left running.
+
+        The factories run outside the hub lock (opening a camera or loading a
+        model takes seconds) and may block, so call this off the event loop.
+        If another caller created the channel meanwhile, the copy built here is
+        closed again.
+        """
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is not None:
+                channel.subscribers += 1
+                return HubSubscription(self, channel)
+
+        source = source_factory()
+        try:
+            processor = processor_factory()
+        except Exception:
+            if owns_source:
+                source.stop()
+            raise
+
+        with self._lock:
+            channel = self._channels.get(key)
+            built = channel is None
+            if built:
+                channel = ProcessingChannel(key, source, processor, owns_source=owns_source)
+                self._channels[key] = channel
+            channel.subscribers += 1
+        if not built:
+            _close(key, processor, source if owns_source else None)
+        return HubSubscription(self, channel)
+
+    def unsubscribe(self, key: Hashable) -> None:
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                return
+            channel.subscribers -= 1
+            if channel.subscribers > 0:
+                return
+            del self._channels[key]
+        channel.stop()
+
+    def rebind_source(
+        self, old_source: VideoSource, source_factory: Callable[[], VideoSource]
+    ) -> int:
+        """
+        Move every channel reading old_source (which has gone away, e.g. the Pi
+        reconnected) onto a fresh source from source_factory. Returns how many
+        channels were moved.
+        """
+        with self._lock:
+            if not any(channel.source is old_source for channel in self._channels.values()):
+                return 0
+        source = source_factory()
+        if source is None:
+            return 0
+        with self._lock:
+            channels = [
+                channel for channel in self._channels.values() if channel.source is old_source
+            ]
+            for channel in channels:
+                channel.rebind(source)
+        return len(channels)
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            channels = list(self._channels.values())
+        return [channel.stats() for channel in channels]
+
+
+def _close(key: Hashable, processor: frameProcessor, source: VideoSource | None) -> None:
+    stop = getattr(processor, "stop", None)
+    if stop is not None:
+        try:
+            stop()
+        except Exception as exc:
+            print(f"Hub channel {key} stop error:", exc)
+    if source is not None:
+        source.stop()
+
+
+broadcast_hub = BroadcastHub()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from core.frame import Frame, as_frame
+
+
+class FrameRing:
+    """
+    Small ring of the most recent camera frames, each tagged with a sequence number.
+
+    Producers (capture threads or asyncio reader tasks) call push(). Consumers remember
+    the last sequence number they handled and wait for a newer one, so they only do
+    work when a fresh frame exists instead of re-processing whatever sits in the slot.
+
+    Entries hold read-only Frame objects shared between consumers; use
+    Frame.writable() to get a copy that may be drawn on.
+    """
+
+    def __init__(self, capacity: int = 4):
+        self._slots: deque[tuple[int, Frame]] = deque(maxlen=capacity)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.last_push_time = 0.0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def push(self, frame: np.ndarray | Frame, format: str = "bgr24") -> int:
+        frame = as_frame(frame, format)
+
+        with self._lock:
+            self._seq += 1
+            entry = (self._seq, frame)
+            self._slots.append(entry)
+            self.last_push_time = time.time()
+            waiters, self._waiters = self._waiters, []
+            self._cond.notify_all()
+
+        for loop, future in waiters:
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(_resolve, future, entry)
+
+        return entry[0]
+
+    def latest(self) -> tuple[int, Frame] | None:
+        with self._lock:
+            return self._slots[-1] if self._slots else None
+
+    def get(self, seq: int) -> Frame | None:
+        """Return the frame with the given sequence number if it is still buffered."""
+        with self._lock:
+            for slot_seq, frame in self._slots:
+                if slot_seq == seq:
+                    return frame
+        return None
+
+    def wait(self, after_seq: int, timeout: float | None = None) -> tuple[int, Frame] | None:
+        """Block the calling thread until a frame newer than after_seq exists."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq, timeout=timeout)
+            if self._seq <= after_seq:
+                return None
+            return self._slots[-1]
+
+    async def next_frame(
+        self, after_seq: int, timeout: float | None = None
+    ) -> tuple[int, Frame] | None:
+        """Await a frame newer than after_seq; returns None on timeout."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            if self._seq > after_seq:
+                return self._slots[-1]
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+
+def _resolve(future: asyncio.Future, entry) -> None:
+    if not future.done():
+        future.set_result(entry)
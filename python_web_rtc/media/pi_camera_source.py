@@ -1,7 +1,8 @@
 from core.interface import VideoSource
 from core.config import FRAME_WIDTH, FRAME_HEIGHT
+from media.frame_ring import FrameRing
 from picamera2 import Picamera2
-import cv2
+import threading
 import numpy as np
 
 class PiCamera2Source(VideoSource):
@@ -15,8 +16,30 @@ class PiCamera2Source(VideoSource):
         self.picam2.configure(config)
         self.picam2.start()
 
+        self.ring = FrameRing()
+        self.running = True
+
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _capture_loop(self):
+        while self.running:
+            frame = self.picam2.capture_array()
+            if frame is None:
+                continue
+            # Tagged as RGB; consumers asking for BGR convert once, lazily
+            self.ring.push(frame, "rgb24")
+
     def read(self):
-        frame = self.picam2.capture_array()
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        latest = self.ring.latest()
+        if latest is None:
+            return None
+        return latest[1].writable()
+
+    async def next_frame(self, after_seq: int, timeout: float | None = None):
+        return await self.ring.next_frame(after_seq, timeout)
 
-        return frame
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+        self.picam2.stop()
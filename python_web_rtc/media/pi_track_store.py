@@ -1,8 +1,32 @@
 pi_track = None
+pi_source = None
 
 def set_pi_track(track):
-    global pi_track
+    """
+    Switch to a new Pi track. Hub channels processing the old stream are moved
+    onto the new one, so their viewers keep watching instead of a dead source.
+    """
+    global pi_track, pi_source
+    old_source = pi_source
+    if pi_source is not None:
+        pi_source.stop()
+        pi_source = None
     pi_track = track
+    if old_source is not None:
+        from media.broadcast_hub import broadcast_hub
+
+        moved = broadcast_hub.rebind_source(old_source, get_pi_source)
+        if moved:
+            print(f"🔁 Pi stream replaced; {moved} processing channel(s) moved to it")
 
 def get_pi_track():
     return pi_track
+
+def get_pi_source():
+    """One shared WebRTCCameraSource per Pi track; multiple readers would steal frames."""
+    global pi_source
+    if pi_source is None and pi_track is not None:
+        from media.webrtc_camera_source import WebRTCCameraSource
+
+        pi_source = WebRTCCameraSource(pi_track)
+    return pi_source
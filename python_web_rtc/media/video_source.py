@@ -1,8 +1,11 @@
 import os
+import threading
+import time
 
 import cv2
 from core.interface import VideoSource
 from core.config import CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT
+from media.frame_ring import FrameRing
 
 
 def _open_capture(index: int, backend: int | None) -> cv2.VideoCapture | None:
@@ -44,9 +47,30 @@ def open_webcam(index: int = CAMERA_INDEX) -> cv2.VideoCapture:
 class OpenCVCameraSource(VideoSource):
     def __init__(self):
         self.cap = open_webcam(CAMERA_INDEX)
+        self.ring = FrameRing()
+        self.running = True
+
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _capture_loop(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self.ring.push(frame)
 
     def read(self):
-        ret, frame = self.cap.read()
-        if not ret:
-            raise RuntimeError("Failed to read frame from camera")
-        return frame
+        latest = self.ring.latest()
+        if latest is None:
+            return None
+        return latest[1].writable()
+
+    async def next_frame(self, after_seq: int, timeout: float | None = None):
+        return await self.ring.next_frame(after_seq, timeout)
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+        self.cap.release()
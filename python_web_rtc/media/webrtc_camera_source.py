@@ -1,16 +1,20 @@
 import cv2
 import asyncio
 
-class WebRTCCameraSource:
+from core.interface import VideoSource
+from core.config import PI_STREAM_FORMAT
+from media.frame_ring import FrameRing
+
+class WebRTCCameraSource(VideoSource):
 
     def __init__(self, track):
 
        self.track = track
-       self.frame = None
+       self.ring = FrameRing()
 
        loop = asyncio.get_running_loop()
     
-       loop.create_task(
+       self.reader_task = loop.create_task(
        self.reader()
     )
 
@@ -24,11 +28,21 @@ class WebRTCCameraSource:
                 format="bgr24"
             )
 
-            self.frame = img
+            self.ring.push(img, PI_STREAM_FORMAT)
 
     def read(self):
 
-        if self.frame is None:
+        latest = self.ring.latest()
+
+        if latest is None:
             return None
 
-        return self.frame.copy()
\ No newline at end of file
+        return latest[1].writable()
+
+    async def next_frame(self, after_seq, timeout=None):
+
+        return await self.ring.next_frame(after_seq, timeout)
+
+    def stop(self):
+
+        self.reader_task.cancel()
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+import weakref
+
+# Inference sizes from best quality to cheapest
+LEVELS = [960, 640, 480, 320]
+DEFAULT_LEVEL = 1   # 640 px — the previous hard-coded setting
+
+# Sparsest submit cadence the backlog control may fall back to
+MAX_SUBMIT_EVERY_N = 4
+# Results arriving this much slower than frames are submitted count as a backlog
+BACKLOG_TOLERANCE = 0.25
+
+TARGET_LATENCY_MS = float(os.environ.get("DETECTION_TARGET_MS", "150"))
+
+_controllers = weakref.WeakSet()
+_controllers_lock = threading.Lock()
+
+
+class AdaptiveInferenceController:
+    """
+    Closed-loop controller for one detection stream, with two independent loops.
+
+    Resolution: every measured model call feeds an exponential moving average.
+    When the average stays above the target the controller steps one imgsz down
+    the LEVELS ladder; when it stays well below the target it steps back up.
+
+    Cadence: a sparser submit cadence cannot make a model call faster, so it
+    follows throughput instead. When results come back slower than frames are
+    submitted (frames are being replaced before the model sees them) the stream
+    submits every n+1 frames; once one frame fewer between submits would still
+    fit the measured call time, it steps back.
+
+    Separate patience counters give hysteresis so a single slow frame does not
+    flip either setting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target_ms: float = TARGET_LATENCY_MS,
+        level: int = DEFAULT_LEVEL,
+        submit_every_n: int = 1,
+        min_level: int = 0,
+        alpha: float = 0.2,
+        down_patience: int = 3,
+        up_patience: int = 15,
+        up_margin: float = 0.6,
+    ):
+        self.name = name
+        self.target_ms = target_ms
+        self.level = level
+        self.submit_every_n = max(1, min(submit_every_n, MAX_SUBMIT_EVERY_N))
+        self.min_level = min_level
+        self.alpha = alpha
+        self.down_patience = down_patience
+        self.up_patience = up_patience
+        self.up_margin = up_margin
+
+        self.avg_ms = None
+        self.last_ms = 0.0
+        self.changes = 0
+        self._over = 0
+        self._under = 0
+
+        # Throughput: moving averages of the submit and result intervals
+        self._submit_s = None
+        self._result_s = None
+        self._last_submit = None
+        self._last_result = None
+        self._backlog = 0
+        self._spare = 0
+
+        with _controllers_lock:
+            _controllers.add(self)
+
+    @property
+    def imgsz(self) -> int:
+        return LEVELS[self.level]
+
+    def update(self, inference_s: float) -> bool:
+        """Record the duration of one model call; returns True when imgsz changed."""
+        ms = inference_s * 1000.0
+        self.last_ms = ms
+        self.avg_ms = ms if self.avg_ms is None else self.avg_ms + self.alpha * (ms - self.avg_ms)
+
+        if self.avg_ms > self.target_ms:
+            self._over += 1
+            self._under = 0
+        elif self.avg_ms < self.target_ms * self.up_margin:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.down_patience and self.level < len(LEVELS) - 1:
+            return self._set_level(self.level + 1)
+        if self._under >= self.up_patience and self.level > self.min_level:
+            return self._set_level(self.level - 1)
+        return False
+
+    def submitted(self) -> None:
+        """Record that a frame was handed to the model."""
+        self._last_submit, self._submit_s = self._tick(self._last_submit, self._submit_s)
+
+    def delivered(self) -> bool:
+        """Record that a result came back; returns True when the cadence changed."""
+        self._last_result, self._result_s = self._tick(self._last_result, self._result_s)
+        if self._submit_s is None or self._result_s is None:
+            return False
+
+        n = self.submit_every_n
+        if self._result_s > self._submit_s * (1 + BACKLOG_TOLERANCE):
+            self._backlog += 1
+            self._spare = 0
+            if self._backlog >= self.down_patience and n < MAX_SUBMIT_EVERY_N:
+                return self._set_cadence(n + 1)
+            return False
+
+        self._backlog = 0
+        # Step back once a call fits between submits at one frame fewer, with
+        # the same tolerance, so the two rules do not undo each other
+        frame_s = self._submit_s / n
+        call_s = None if self.avg_ms is None else self.avg_ms / 1000.0
+        if n > 1 and call_s is not None and call_s * (1 + BACKLOG_TOLERANCE) < frame_s * (n - 1):
+            self._spare += 1
+            if self._spare >= self.up_patience:
+                return self._set_cadence(n - 1)
+        else:
+            self._spare = 0
+        return False
+
+    def _tick(self, last, avg):
+        now = time.perf_counter()
+        if last is None:
+            return now, avg
+        interval = now - last
+        return now, interval if avg is None else avg + self.alpha * (interval - avg)
+
+    def _set_level(self, level: int) -> bool:
+        self.level = level
+        self.changes += 1
+        self._over = self._under = 0
+        # Let the average re-settle at the new operating point
+        self.avg_ms = None
+        return True
+
+    def _set_cadence(self, submit_every_n: int) -> bool:
+        self.submit_every_n = submit_every_n
+        self.changes += 1
+        self._backlog = self._spare = 0
+        # Intervals measured at the old cadence no longer apply
+        self._submit_s = self._result_s = None
+        self._last_submit = self._last_result = None
+        return True
+
+    def close(self) -> None:
+        with _controllers_lock:
+            _controllers.discard(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "imgsz": self.imgsz,
+            "submit_every_n": self.submit_every_n,
+            "level": self.level,
+            "target_ms": self.target_ms,
+            "avg_ms": None if self.avg_ms is None else round(self.avg_ms, 1),
+            "last_ms": round(self.last_ms, 1),
+            "submit_fps": _fps(self._submit_s),
+            "result_fps": _fps(self._result_s),
+            "changes": self.changes,
+        }
+
+
+def _fps(interval_s):
+    return round(1.0 / interval_s, 1) if interval_s else None
+
+
+def operating_points() -> list[dict]:
+    with _controllers_lock:
+        controllers = list(_controllers)
+    return [controller.to_dict() for controller in controllers]
+
+
+def level_for(imgsz: int) -> int:
+    """Index of the LEVELS entry matching a fixed imgsz, or the default."""
+    try:
+        return LEVELS.index(imgsz)
+    except ValueError:
+        return DEFAULT_LEVEL
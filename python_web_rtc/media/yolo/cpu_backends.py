@@ -0,0 +1,253 @@
+"""
+Exported-model detector backends (ONNX Runtime / OpenVINO) for CPU-only machines.
+
+The .pt weights are exported once with ultralytics and the artifact is cached next
+to them (best-5.pt -> best-5.onnx / best-5_openvino_model/). The "onnx_int8"
+backend loads best-5.int8.onnx produced by media/yolo/quantize.py. Pre-processing
+(letterbox) and post-processing (box decode + NMS) run in NumPy, and results are
+returned as ultralytics Results objects so every caller keeps working unchanged.
+"""
+
+import ast
+import os
+
+import cv2
+import numpy as np
+
+BACKENDS = ("ultralytics", "onnx", "onnx_int8", "openvino")
+EXPORT_IMG_SIZE = 640
+
+
+def export_path(weights: str, backend: str) -> str:
+    stem, _ = os.path.splitext(weights)
+    if backend == "onnx":
+        return stem + ".onnx"
+    if backend == "onnx_int8":
+        return stem + ".int8.onnx"
+    if backend == "openvino":
+        return stem + "_openvino_model"
+    raise ValueError(f"Unknown export backend: {backend}")
+
+
+def is_exported(weights: str, backend: str) -> bool:
+    """Whether the backend's artifact exists and is not older than the weights."""
+    artifact = export_path(weights, backend)
+    return os.path.exists(artifact) and (
+        not os.path.exists(weights) or os.path.getmtime(artifact) >= os.path.getmtime(weights)
+    )
+
+
+def ensure_exported(weights: str, backend: str) -> str:
+    """Export weights for backend unless an up-to-date artifact already exists."""
+    artifact = export_path(weights, backend)
+    if is_exported(weights, backend):
+        return artifact
+
+    if backend == "onnx_int8":
+        if os.path.exists(artifact):
+            state = "Stale INT8 model (older than the weights)"
+        else:
+            state = "No INT8 model"
+        raise FileNotFoundError(
+            f"{state} at {artifact}. Re-quantize it with: "
+            f"python -m media.yolo.quantize --weights {weights} --frames <dir>"
+        )
+
+    from ultralytics import YOLO
+
+    print(f"Exporting {weights} to {backend} (one-time) ...")
+    # dynamic=True keeps the batch and image-size axes free for batched inference
+    exported = YOLO(weights).export(
+        format=backend, imgsz=EXPORT_IMG_SIZE, dynamic=True, simplify=backend == "onnx"
+    )
+    return str(exported or artifact)
+
+
+def letterbox(frame: np.ndarray, size: int):
+    """Resize keeping aspect ratio and pad to size x size; returns image, gain, (pad_x, pad_y)."""
+    h, w = frame.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    frame = cv2.copyMakeBorder(
+        frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+    return frame, gain, (left, top)
+
+
+def preprocess_batch(frames, imgsz: int):
+    """Letterbox BGR frames into one (B, 3, imgsz, imgsz) float32 RGB tensor in [0, 1]."""
+    batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+    letterboxes = []
+    for i, frame in enumerate(frames):
+        padded, gain, pad = letterbox(frame, imgsz)
+        batch[i] = padded[:, :, ::-1].transpose(2, 0, 1) * (1.0 / 255.0)
+        letterboxes.append((gain, pad))
+    return batch, letterboxes
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression on xyxy boxes; returns kept indices by score."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+def decode_predictions(
+    pred: np.ndarray,
+    conf: float,
+    iou: float,
+    max_det: int,
+    agnostic_nms: bool,
+) -> np.ndarray:
+    """
+    Decode one YOLOv8 output of shape (4 + nc, anchors) into (N, 6) rows of
+    x1, y1, x2, y2, conf, cls in letterboxed pixel coordinates.
+    """
+    pred = pred.T
+    scores_all = pred[:, 4:]
+    cls = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(len(cls)), cls]
+
+    mask = scores >= conf
+    if not mask.any():
+        return np.zeros((0, 6), dtype=np.float32)
+    xywh, scores, cls = pred[mask, :4], scores[mask], cls[mask]
+
+    boxes = np.empty_like(xywh)
+    boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+    # Offset boxes per class so class-aware NMS is one pass
+    offsets = 0.0 if agnostic_nms else cls[:, None].astype(np.float32) * 7680.0
+    keep = nms(boxes + offsets, scores, iou)[:max_det]
+
+    return np.concatenate(
+        [boxes[keep], scores[keep, None], cls[keep, None].astype(np.float32)], axis=1
+    ).astype(np.float32)
+
+
+class ExportedYOLO:
+    """
+    Drop-in stand-in for ultralytics.YOLO inference on an exported model.
+
+    Supports the subset the processors use: predict(frames, ...), __call__ and names.
+    """
+
+    def __init__(self, weights: str, backend: str):
+        if backend not in ("onnx", "onnx_int8", "openvino"):
+            raise ValueError(f"Unsupported exported backend: {backend}")
+        self.weights = weights
+        self.backend = backend
+        self.artifact = ensure_exported(weights, backend)
+
+        if backend in ("onnx", "onnx_int8"):
+            import onnxruntime as ort
+
+            self._session = ort.InferenceSession(
+                self.artifact, providers=["CPUExecutionProvider"]
+            )
+            self._input_name = self._session.get_inputs()[0].name
+            metadata = self._session.get_modelmeta().custom_metadata_map
+            self.names = _parse_names(metadata.get("names"))
+        else:
+            import openvino as ov
+
+            xml = next(
+                os.path.join(self.artifact, f)
+                for f in os.listdir(self.artifact) if f.endswith(".xml")
+            )
+            core = ov.Core()
+            self._compiled = core.compile_model(
+                core.read_model(xml), "CPU", {"PERFORMANCE_HINT": "LATENCY"}
+            )
+            self.names = _read_openvino_names(self.artifact)
+
+        if not self.names:
+            from ultralytics import YOLO
+
+            self.names = YOLO(weights).names
+
+    def __call__(self, source, **kwargs):
+        return self.predict(source, **kwargs)
+
+    def predict(self, source, **kwargs):
+        from ultralytics.engine.results import Results
+
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        detections = self.detect(frames, **kwargs)
+        return [
+            Results(frame, path="", names=self.names, boxes=det)
+            for frame, det in zip(frames, detections)
+        ]
+
+    def detect(
+        self,
+        frames,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        imgsz: int = EXPORT_IMG_SIZE,
+        agnostic_nms: bool = False,
+        max_det: int = 300,
+        **_ignored,
+    ) -> list[np.ndarray]:
+        """Raw (N, 6) x1, y1, x2, y2, conf, cls arrays in frame pixels, one per frame."""
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = imgsz[0]
+        imgsz = int(np.ceil(imgsz / 32) * 32)
+
+        batch, letterboxes = preprocess_batch(frames, imgsz)
+        outputs = self._infer(batch)
+
+        detections = []
+        for frame, output, (gain, (pad_x, pad_y)) in zip(frames, outputs, letterboxes):
+            det = decode_predictions(output, conf, iou, max_det, agnostic_nms)
+            if len(det):
+                det[:, [0, 2]] = ((det[:, [0, 2]] - pad_x) / gain).clip(0, frame.shape[1])
+                det[:, [1, 3]] = ((det[:, [1, 3]] - pad_y) / gain).clip(0, frame.shape[0])
+            detections.append(det)
+        return detections
+
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        if self.backend in ("onnx", "onnx_int8"):
+            return self._session.run(None, {self._input_name: batch})[0]
+        return self._compiled([batch])[self._compiled.output(0)]
+
+
+def _parse_names(raw) -> dict:
+    if not raw:
+        return {}
+    if isinstance(raw, dict):
+        return {int(k): v for k, v in raw.items()}
+    return {int(k): v for k, v in ast.literal_eval(raw).items()}
+
+
+def _read_openvino_names(artifact_dir: str) -> dict:
+    path = os.path.join(artifact_dir, "metadata.yaml")
+    if not os.path.isfile(path):
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return _parse_names((yaml.safe_load(handle) or {}).get("names"))
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+from collections import deque
+from typing import NamedTuple
+
+# Versions kept for computing deltas; older consumers get a full snapshot
+HISTORY = 32
+
+
+class Detection(NamedTuple):
+    """One published detection; immutable so snapshots can be shared freely."""
+
+    id: int
+    name: str
+    color: str
+    confidence: float
+    x: int
+    y: int
+    z: float
+    cls: int = -1
+
+    def to_dict(self) -> dict:
+        data = self._asdict()
+        data["z_unit"] = "normalized"
+        return data
+
+
+class DetectionSnapshot(NamedTuple):
+    version: int
+    detections: tuple[Detection, ...]
+
+    def to_dicts(self) -> list[dict]:
+        return [detection.to_dict() for detection in self.detections]
+
+
+class DetectionFeed:
+    """
+    Versioned publish/subscribe channel for the latest detections.
+
+    The detection worker publishes the full current list of Detection records
+    (each with a stable id, the ByteTrack track ID). The version only
+    advances when that list actually changes, so consumers do no work while
+    the scene is static. Each change is published as an immutable
+    DetectionSnapshot; latest() is a single reference read, no lock or copy.
+
+    Consumers remember the last version they saw and ask for what changed
+    since: threads block in wait() / wait_snapshot(), asyncio handlers await
+    next_update(). Updates are deltas ("upserts" and "removed" IDs) against
+    the consumer's version, or a full snapshot when that version is no longer
+    buffered (first request, slow consumer, server restart).
+    """
+
+    def __init__(self, history: int = HISTORY):
+        self._version = 0
+        self._snapshot = DetectionSnapshot(0, ())
+        self._current: dict = {}
+        self._history: deque = deque([(0, {})], maxlen=history)
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        # Class name -> feed-wide class ID. Shared by every publishing model and
+        # append-only, so an ID keeps its meaning when streams run different
+        # models; Detection.cls and the binary wire format carry these IDs
+        self._class_ids: dict[str, int] = {}
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def register_classes(self, names) -> None:
+        """Give each class name a feed-wide ID; new names keep the order given."""
+        with self._lock:
+            for name in names:
+                self._class_ids.setdefault(name, len(self._class_ids))
+
+    def class_id(self, name: str) -> int:
+        """Feed-wide ID of a class name, registering it if it is new."""
+        cls = self._class_ids.get(name)
+        if cls is None:
+            with self._lock:
+                cls = self._class_ids.setdefault(name, len(self._class_ids))
+        return cls
+
+    def class_names(self) -> dict[int, str]:
+        """Feed-wide class ID -> name."""
+        with self._lock:
+            return {cls: name for name, cls in self._class_ids.items()}
+
+    def publish(self, records) -> bool:
+        """Publish the current Detection records; returns True if they changed."""
+        records = tuple(records)
+        snapshot = {record.id: record for record in records}
+
+        with self._lock:
+            if snapshot == self._current:
+                return False
+            self._version += 1
+            self._current = snapshot
+            self._history.append((self._version, snapshot))
+            self._snapshot = DetectionSnapshot(self._version, records)
+            waiters, self._waiters = self._waiters, []
+            self._cond.notify_all()
+
+        for loop, future in waiters:
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(_resolve, future)
+        return True
+
+    def latest(self) -> DetectionSnapshot:
+        return self._snapshot
+
+    def changes_since(self, version: int) -> dict | None:
+        """Delta from version to now, or None if nothing changed."""
+        with self._lock:
+            return self._changes_locked(version)
+
+    def wait(self, after_version: int, timeout: float | None = None) -> dict | None:
+        """Block the calling thread until the detections differ from after_version."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != after_version, timeout=timeout)
+            return self._changes_locked(after_version)
+
+    def wait_snapshot(
+        self, after_version: int, timeout: float | None = None
+    ) -> tuple[int, list[dict]] | None:
+        """Like wait(), but returns (version, full detection list) for in-process consumers."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != after_version, timeout=timeout)
+            if self._version == after_version:
+                return None
+            return self._version, self._snapshot.to_dicts()
+
+    async def next_update(self, after_version: int, timeout: float | None = None) -> dict | None:
+        """Await the delta from after_version; returns None on timeout."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            changes = self._changes_locked(after_version)
+            if changes is not None:
+                return changes
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+        return self.changes_since(after_version)
+
+    def _changes_locked(self, version: int) -> dict | None:
+        if version == self._version:
+            return None
+
+        base = None
+        if version < self._version:
+            base = next((snap for v, snap in self._history if v == version), None)
+
+        if base is None:
+            return {
+                "version": self._version,
+                "base_version": 0,
+                "full": True,
+                "upserts": self._snapshot.to_dicts(),
+                "removed": [],
+            }
+
+        return {
+            "version": self._version,
+            "base_version": version,
+            "full": False,
+            "upserts": [
+                record.to_dict() for track_id, record in self._current.items()
+                if base.get(track_id) != record
+            ],
+            "removed": [track_id for track_id in base if track_id not in self._current],
+        }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+detection_feed = DetectionFeed()
@@ -0,0 +1,148 @@
+"""
+Compact binary encoding of detection snapshots and deltas.
+
+Clients opt in by sending "Accept: application/x-elab-detections". Class and
+colour names are not repeated per object: they travel once, as the JSON
+dictionary from /detections/classes, and each record carries small integer IDs.
+Class IDs are feed-wide and append-only, so streams running different models
+agree on them; a client meeting an unknown ID refetches the dictionary.
+
+Layout (little-endian):
+
+    header   "<2sBBIIHH"  magic b"ED", format version, flags (bit 0 = full
+                          snapshot), version, base_version, n_records,
+                          n_removed                                 -- 16 bytes
+    record   "<iHBBHHf"   track id, class id (0xFFFF = unknown),
+                          colour id (255 = unknown), confidence in percent,
+                          x, y, z                          -- 16 bytes each
+    removed  "<i"         track id of every removed object
+
+A full snapshot of 20 objects is 336 bytes, against roughly 3 KB of JSON.
+decode() turns a message back into dicts, with the unknown class as -1.
+"""
+
+import struct
+
+from .liquid_color import COLOR_NAMES
+
+CONTENT_TYPE = "application/x-elab-detections"
+MAGIC = b"ED"
+FORMAT_VERSION = 1
+FLAG_FULL = 0x01
+UNKNOWN_COLOR_ID = 255
+# Class IDs are uint16; the top value stands for "no class" (-1 in the JSON)
+UNKNOWN_CLASS_ID = 0xFFFF
+
+_HEADER = struct.Struct("<2sBBIIHH")
+_RECORD = struct.Struct("<iHBBHHf")
+_REMOVED = struct.Struct("<i")
+
+_COLOR_IDS = {name: i for i, name in enumerate(COLOR_NAMES)}
+
+
+def wants_binary(accept: str | None) -> bool:
+    """True when an Accept header asks for the binary encoding."""
+    return bool(accept) and CONTENT_TYPE in accept
+
+
+def class_dictionary(class_names: dict) -> dict:
+    """The ID -> name tables a binary client fetches once."""
+    return {
+        "format_version": FORMAT_VERSION,
+        "classes": {str(cls): name for cls, name in sorted(class_names.items())},
+        "colors": {str(i): name for i, name in enumerate(COLOR_NAMES)},
+        "unknown_color": UNKNOWN_COLOR_ID,
+        "unknown_class": UNKNOWN_CLASS_ID,
+    }
+
+
+def _pack_record(buffer: bytearray, offset: int, record) -> None:
+    # Accepts Detection records and their to_dict() form alike
+    get = record.get if isinstance(record, dict) else lambda key: getattr(record, key)
+    cls = int(get("cls"))
+    _RECORD.pack_into(
+        buffer,
+        offset,
+        int(get("id")),
+        cls if 0 <= cls < UNKNOWN_CLASS_ID else UNKNOWN_CLASS_ID,
+        _COLOR_IDS.get(get("color"), UNKNOWN_COLOR_ID),
+        min(max(int(round(float(get("confidence")) * 100)), 0), 100),
+        min(max(int(get("x")), 0), 0xFFFF),
+        min(max(int(get("y")), 0), 0xFFFF),
+        float(get("z")),
+    )
+
+
+def encode(version: int, records, removed=(), base_version: int = 0, full: bool = True) -> bytes:
+    records = list(records)
+    removed = list(removed)
+
+    buffer = bytearray(_HEADER.size + _RECORD.size * len(records) + _REMOVED.size * len(removed))
+    _HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, FLAG_FULL if full else 0,
+        version, base_version, len(records), len(removed),
+    )
+
+    offset = _HEADER.size
+    for record in records:
+        _pack_record(buffer, offset, record)
+        offset += _RECORD.size
+    for track_id in removed:
+        _REMOVED.pack_into(buffer, offset, int(track_id))
+        offset += _REMOVED.size
+
+    return bytes(buffer)
+
+
+def encode_snapshot(snapshot) -> bytes:
+    """A DetectionSnapshot as one full binary message."""
+    return encode(snapshot.version, snapshot.detections)
+
+
+def encode_update(update: dict) -> bytes:
+    """A DetectionFeed delta (as returned by next_update / changes_since)."""
+    return encode(
+        update["version"],
+        update["upserts"],
+        removed=update["removed"],
+        base_version=update["base_version"],
+        full=update["full"],
+    )
+
+
+def decode(data: bytes) -> dict:
+    """
+    A binary message as {"version", "base_version", "full", "records",
+    "removed"}; records are shaped like to_dict(), with cls -1 and colour
+    "unknown" where the message says unknown.
+    """
+    magic, format_version, flags, version, base_version, n_records, n_removed = (
+        _HEADER.unpack_from(data, 0)
+    )
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError(f"Not a format {FORMAT_VERSION} detections message")
+
+    records = []
+    offset = _HEADER.size
+    for _ in range(n_records):
+        track_id, cls, color, confidence, x, y, z = _RECORD.unpack_from(data, offset)
+        records.append({
+            "id": track_id,
+            "cls": -1 if cls == UNKNOWN_CLASS_ID else cls,
+            "color": COLOR_NAMES[color] if color < len(COLOR_NAMES) else "unknown",
+            "confidence": confidence / 100.0,
+            "x": x,
+            "y": y,
+            "z": z,
+        })
+        offset += _RECORD.size
+    removed = [
+        _REMOVED.unpack_from(data, offset + i * _REMOVED.size)[0] for i in range(n_removed)
+    ]
+    return {
+        "version": version,
+        "base_version": base_version,
+        "full": bool(flags & FLAG_FULL),
+        "records": records,
+        "removed": removed,
+    }
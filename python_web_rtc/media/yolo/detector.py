@@ -1,12 +1,20 @@
-from ultralytics import YOLO
+from .model_registry import model_registry
 import cv2
 class YoloDetector:
     def __init__(self, model_path: str, target_class="cup",imgsz=320):
-        self.model = YOLO(model_path)
+        self.shared_model = model_registry.acquire(model_path)
+        self.model = self.shared_model.model
         self.class_names = self.model.names
         self.target_class = target_class
         self.imgsz = imgsz
     
     def detect(self, frame):
-        results = self.model(frame, imgsz=self.imgsz, conf=0.4, verbose=False)
-        return results
\ No newline at end of file
+        with self.shared_model.lock:
+            results = self.model(
+                frame, imgsz=self.imgsz, conf=0.4, verbose=False,
+                device=self.shared_model.device,
+            )
+        return results
+
+    def close(self):
+        self.shared_model.release()
@@ -0,0 +1,274 @@
+import threading
+import time
+from typing import Callable
+
+from core.metrics import StageMetrics
+from .tiling import TiledDetector
+from .tracking import apply_tracker, create_tracker
+
+# How long the service waits for other streams to submit before running a batch
+BATCH_WINDOW_S = 0.010
+MAX_BATCH = 4
+
+
+class InferenceStream:
+    """
+    One camera stream feeding an InferenceService.
+
+    submit() is latest-wins: if the service has not picked up the previous
+    frame yet it is replaced. Results are delivered to callback(frame, result)
+    on the service thread, with this stream's own ByteTrack state applied.
+
+    With tiled=True the stream runs the two-stage TiledDetector instead of a
+    plain predict() and is not batched with other streams, unless its frames
+    turn out too small for tiling to pay off (see media/yolo/tiling.py).
+    """
+
+    def __init__(
+        self,
+        service: "InferenceService",
+        callback: Callable,
+        conf: float = 0.40,
+        iou: float = 0.35,
+        imgsz: int = 640,
+        max_det: int = 20,
+        agnostic_nms: bool = True,
+        tracker_cfg: str | None = "bytetrack.yaml",
+        tiled: bool = False,
+    ):
+        self.service = service
+        self.callback = callback
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+        self.max_det = max_det
+        self.agnostic_nms = agnostic_nms
+        self.tracker_cfg = tracker_cfg
+        self.tracker = None
+        self.tiler = TiledDetector() if tiled else None
+        self.pending = None
+        self.submitted_at = 0.0
+        # Duration of the model call that produced the last delivered result
+        # (the whole batch, or all tiles), without the time spent waiting for it
+        self.last_inference_s = 0.0
+
+    def submit(self, frame) -> None:
+        self.service._submit(self, frame)
+
+    def close(self) -> None:
+        self.service._close_stream(self)
+
+    def batch_key(self) -> tuple:
+        # Only frames sharing all predict arguments can go through one forward pass
+        if self.tiler is not None:
+            return ("tiled", id(self))
+        return (self.conf, self.iou, self.imgsz, self.max_det, self.agnostic_nms)
+
+    def track(self, result, frame):
+        if self.tracker_cfg is None:
+            return result
+        if self.tracker is None:
+            self.tracker = create_tracker(self.tracker_cfg)
+        return apply_tracker(self.tracker, result, frame)
+
+
+class InferenceService:
+    """
+    Single inference thread per model shared by all active streams.
+
+    As soon as one stream submits a frame the service waits up to BATCH_WINDOW_S
+    for the other streams, then runs one batched predict() over everything pending
+    and routes each result back to its stream.
+    """
+
+    def __init__(self, shared_model, batch_window_s=BATCH_WINDOW_S, max_batch=MAX_BATCH):
+        self.shared_model = shared_model
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self.metrics = StageMetrics("batch_wait", "inference", "postprocess")
+
+        self._streams: list[InferenceStream] = []
+        self._cond = threading.Condition()
+        self._running = True
+        self.thread = threading.Thread(
+            target=self._run, name="yolo-inference", daemon=True
+        )
+        self.thread.start()
+
+    def open_stream(self, callback: Callable, **kwargs) -> InferenceStream:
+        stream = InferenceStream(self, callback, **kwargs)
+        with self._cond:
+            self._streams.append(stream)
+        return stream
+
+    def stream_count(self) -> int:
+        with self._cond:
+            return len(self._streams)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout=2.0)
+
+    def _submit(self, stream: InferenceStream, frame) -> None:
+        with self._cond:
+            if stream.pending is not None:
+                self.metrics.incr("replaced")
+            else:
+                stream.submitted_at = time.perf_counter()
+            stream.pending = frame
+            self._cond.notify_all()
+
+    def _close_stream(self, stream: InferenceStream) -> None:
+        with self._cond:
+            if stream in self._streams:
+                self._streams.remove(stream)
+            stream.pending = None
+        _release_service(self)
+
+    def _collect(self) -> list[tuple[InferenceStream, object, float]]:
+        with self._cond:
+            self._cond.wait_for(
+                lambda: not self._running or any(s.pending is not None for s in self._streams),
+                timeout=0.5,
+            )
+            if not self._running:
+                return []
+
+            first = next((s for s in self._streams if s.pending is not None), None)
+            if first is None:
+                return []
+
+            # Give the other streams a short window to join this batch
+            deadline = first.submitted_at + self.batch_window_s
+            while True:
+                ready = [s for s in self._streams if s.pending is not None]
+                remaining = deadline - time.perf_counter()
+                if len(ready) >= min(len(self._streams), self.max_batch) or remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+
+            key = first.batch_key()
+            batch = []
+            for stream in self._streams:
+                if stream.pending is None or stream.batch_key() != key:
+                    continue
+                self.metrics.add("batch_wait", time.perf_counter() - stream.submitted_at)
+                batch.append((stream, stream.pending, stream.submitted_at))
+                stream.pending = None
+                if len(batch) >= self.max_batch:
+                    break
+            return batch
+
+    def _run(self) -> None:
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            stream = batch[0][0]
+            frames = [frame for _, frame, _ in batch]
+
+            start = time.perf_counter()
+            try:
+                if stream.tiler is not None:
+                    results = [self._detect_tiled(stream, frames[0])]
+                else:
+                    results = self._predict(stream, frames, stream.imgsz, stream.conf)
+            except Exception as exc:
+                self.metrics.incr("errors")
+                print("YOLO batch inference error:", exc)
+                continue
+            inference_s = time.perf_counter() - start
+            self.metrics.add("inference", inference_s)
+            self.metrics.incr("batches")
+            self.metrics.incr("frames", len(frames))
+
+            for (stream, frame, submitted_at), result in zip(batch, results):
+                start = time.perf_counter()
+                stream.last_inference_s = inference_s
+                try:
+                    result = stream.track(result, frame)
+                    stream.callback(frame, result)
+                except Exception as exc:
+                    self.metrics.incr("errors")
+                    print("YOLO stream post-processing error:", exc)
+                self.metrics.add("postprocess", time.perf_counter() - start)
+
+    def _predict(self, stream: InferenceStream, frames, imgsz, conf):
+        with self.shared_model.lock:
+            return self.shared_model.model.predict(
+                frames,
+                conf=conf,
+                iou=stream.iou,
+                imgsz=imgsz,
+                agnostic_nms=stream.agnostic_nms,
+                max_det=stream.max_det,
+                verbose=False,
+                device=self.shared_model.device,
+            )
+
+    def _detect_tiled(self, stream: InferenceStream, frame):
+        result = stream.tiler.detect(
+            frame,
+            lambda frames, imgsz, conf: self._predict(stream, frames, imgsz, conf),
+            names=self.shared_model.names,
+            conf=stream.conf,
+            iou=stream.iou,
+            imgsz=stream.imgsz,
+            max_det=stream.max_det,
+            agnostic_nms=stream.agnostic_nms,
+        )
+        if stream.tiler.last_budget == 0:
+            # Frames this small never tile; batch them with the other streams instead
+            stream.tiler = None
+            self.metrics.incr("tiling_disabled")
+        elif stream.tiler.last_full_frame:
+            self.metrics.incr("tiled_full_frame")
+        else:
+            self.metrics.incr("tiles", stream.tiler.last_tiles)
+        return result
+
+    def stats(self) -> dict:
+        data = self.metrics.to_dict()
+        data["weights"] = self.shared_model.key[0]
+        data["streams"] = self.stream_count()
+        frames = data["counters"].get("frames", 0)
+        batches = data["counters"].get("batches", 0)
+        data["avg_batch_size"] = round(frames / batches, 2) if batches else 0.0
+        return data
+
+
+# =====================================================
+# One service per loaded model
+# =====================================================
+
+_services: dict[tuple, InferenceService] = {}
+_services_lock = threading.Lock()
+
+
+def open_inference_stream(shared_model, callback: Callable, **kwargs) -> InferenceStream:
+    """Attach a stream to the model's inference service, starting it if needed."""
+    with _services_lock:
+        service = _services.get(shared_model.key)
+        if service is None:
+            service = InferenceService(shared_model)
+            _services[shared_model.key] = service
+        return service.open_stream(callback, **kwargs)
+
+
+def _release_service(service: InferenceService) -> None:
+    with _services_lock:
+        if service.stream_count() > 0:
+            return
+        if _services.get(service.shared_model.key) is service:
+            del _services[service.shared_model.key]
+    service.stop()
+
+
+def inference_stats() -> list[dict]:
+    with _services_lock:
+        services = list(_services.values())
+    return [service.stats() for service in services]
@@ -0,0 +1,183 @@
+"""
+Table-driven liquid colour classification.
+
+Every possible OpenCV HSV triple (180 x 256 x 256) is mapped once to a bit
+mask of the colour ranges it falls in. Classifying an ROI is then one gather
+through that table plus a bincount, instead of an inRange / bitwise_and /
+countNonZero pass per colour. Ranges may overlap (a pixel can count towards
+both "orange" and "brown"), exactly as with the per-colour inRange loop.
+
+classify_hsv_batch() and resample_rois() do the same for every ROI of a frame
+at once, so colour cost stays nearly flat as the number of detections grows.
+
+The table is built at import and cached on disk, keyed by a hash of the ranges.
+"""
+
+import hashlib
+import os
+
+import cv2
+import numpy as np
+
+COLOR_RANGES = {
+    "transparent": [((0,   0,  200), (180,  30, 255))],
+    "red":         [((0,   80,  40), ( 10, 255, 255)),
+                    ((170, 80,  40), (180, 255, 255))],
+    "blue":        [((95,  60,  40), (140, 255, 255))],
+    "green":       [((35,  40,  40), ( 85, 255, 255))],
+    "yellow":      [((18,  70,  80), ( 35, 255, 255))],
+    "orange":      [((8,   70,  70), ( 24, 255, 255))],
+    "purple":      [((120, 40,  40), (160, 255, 255))],
+    "brown":       [((5,   80,  20), ( 18, 200, 140))],
+}
+COLOR_NAMES = tuple(COLOR_RANGES)
+
+# Minimum share of the masked ROI the winning colour must cover
+MIN_COVERAGE = 0.08
+
+# Gamma 1.1 curve applied to ROIs before classification (cv2.LUT table)
+GAMMA_LUT = np.clip(
+    np.power(np.arange(256) / 255.0, 1.1) * 255.0, 0, 255
+).astype(np.uint8).reshape(1, 256)
+
+CACHE_DIR = os.environ.get(
+    "LIQUID_COLOR_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "e-lab")
+)
+
+
+def build_color_lut(ranges: dict = COLOR_RANGES) -> np.ndarray:
+    """(180, 256, 256) uint8 table; bit i is set where colour i's ranges match."""
+    if len(ranges) > 8:
+        raise ValueError("At most 8 colours fit in the uint8 lookup table")
+
+    h = np.arange(180, dtype=np.int16)[:, None, None]
+    s = np.arange(256, dtype=np.int16)[None, :, None]
+    v = np.arange(256, dtype=np.int16)[None, None, :]
+
+    lut = np.zeros((180, 256, 256), dtype=np.uint8)
+    for bit, color_ranges in enumerate(ranges.values()):
+        for (h_lo, s_lo, v_lo), (h_hi, s_hi, v_hi) in color_ranges:
+            match = (
+                ((h >= h_lo) & (h <= h_hi))
+                & ((s >= s_lo) & (s <= s_hi))
+                & ((v >= v_lo) & (v <= v_hi))
+            )
+            lut[match] |= np.uint8(1 << bit)
+    return lut
+
+
+def load_color_lut(ranges: dict = COLOR_RANGES, cache_dir: str = CACHE_DIR) -> np.ndarray:
+    """Load the table from the disk cache, building and saving it on a miss."""
+    digest = hashlib.sha1(repr(sorted(ranges.items())).encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f"liquid_color_lut_{digest}.npy")
+
+    try:
+        lut = np.load(path)
+        if lut.shape == (180, 256, 256) and lut.dtype == np.uint8:
+            return lut
+    except (OSError, ValueError):
+        pass
+
+    lut = build_color_lut(ranges)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            np.save(handle, lut)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        print("Liquid colour LUT not cached:", exc)
+    return lut
+
+
+COLOR_LUT = load_color_lut()
+_FLAT_LUT = COLOR_LUT.reshape(-1)
+
+# Bit code -> which colours it counts towards, for turning a code histogram
+# into per-colour pixel counts with one matrix product
+_CODE_BITS = (
+    (np.arange(256)[:, None] >> np.arange(len(COLOR_NAMES))[None, :]) & 1
+).astype(np.int64)
+
+
+def resample_rois(image: np.ndarray, rects: np.ndarray, size: int) -> np.ndarray:
+    """
+    Bilinearly resample each x1, y1, x2, y2 rect of image to size x size.
+
+    Uses the same pixel-centre mapping as cv2.resize(INTER_LINEAR), but all
+    rects go through a single cv2.remap call; returns an (N, size, size, C)
+    uint8 stack.
+    """
+    rects = np.asarray(rects, dtype=np.float32).reshape(-1, 4)
+    n = len(rects)
+    t = (np.arange(size, dtype=np.float32) + 0.5) / size
+
+    def axis(lo, hi):
+        src = lo[:, None] + t[None, :] * (hi - lo)[:, None] - 0.5
+        return np.clip(src, lo[:, None], (hi - 1)[:, None])
+
+    xs = axis(rects[:, 0], rects[:, 2])
+    ys = axis(rects[:, 1], rects[:, 3])
+    map_x = np.broadcast_to(xs[:, None, :], (n, size, size)).reshape(n * size, size)
+    map_y = np.broadcast_to(ys[:, :, None], (n, size, size)).reshape(n * size, size)
+
+    stack = cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR,
+                      borderMode=cv2.BORDER_REPLICATE)
+    return stack.reshape(n, size, size, *image.shape[2:])
+
+
+def roi_signatures(image: np.ndarray, rects: np.ndarray, size: int = 8) -> np.ndarray:
+    """
+    Cheap appearance signature per ROI: a size x size block-mean thumbnail,
+    (N, size, size, C) float32. Far cheaper than classification, and it moves
+    whenever the liquid's colour or level does.
+    """
+    stack = resample_rois(image, rects, size * 2).astype(np.float32)
+    n = len(stack)
+    return stack.reshape(n, size, 2, size, 2, -1).mean(axis=(2, 4))
+
+
+def classify_hsv_batch(hsv: np.ndarray, mask: np.ndarray,
+                       min_coverage: float = MIN_COVERAGE) -> list[str]:
+    """
+    Dominant colour of each image in an (N, H, W, 3) HSV stack, counting only
+    pixels where the (H, W) mask is True.
+    """
+    n = len(hsv)
+    area = int(np.count_nonzero(mask))
+    if n == 0:
+        return []
+    if area == 0:
+        return ["unknown"] * n
+
+    # Flat table index h << 16 | s << 8 | v for every pixel, then keep the masked ones
+    hsv = hsv.reshape(n, -1, 3)
+    index = (
+        (hsv[..., 0].astype(np.int32) << 16)
+        | (hsv[..., 1].astype(np.int32) << 8)
+        | hsv[..., 2]
+    )
+    codes = _FLAT_LUT.take(index[:, np.flatnonzero(mask)])
+
+    # One bincount for all ROIs: give each ROI its own block of 256 codes
+    offsets = (np.arange(n, dtype=np.int32) * 256)[:, None]
+    hist = np.bincount((codes + offsets).ravel(), minlength=n * 256).reshape(n, 256)
+    counts = hist @ _CODE_BITS
+
+    best = counts.argmax(axis=1)
+    top = counts[np.arange(n), best]
+    found = (top > 0) & (top / area >= min_coverage)
+    return [COLOR_NAMES[b] if ok else "unknown" for b, ok in zip(best, found)]
+
+
+def classify_hsv(hsv: np.ndarray, mask: np.ndarray | None = None,
+                 min_coverage: float = MIN_COVERAGE) -> str:
+    """
+    Dominant colour of an HSV image, counting only pixels where mask is True.
+
+    Returns "unknown" when no colour covers at least min_coverage of the
+    counted pixels.
+    """
+    if mask is None:
+        mask = np.ones(hsv.shape[:2], dtype=bool)
+    return classify_hsv_batch(hsv[None], mask, min_coverage)[0]
@@ -2,36 +2,28 @@ import os
 import cv2
 import time
 import threading
+import weakref
 import numpy as np
-from collections import deque, Counter
-from ultralytics import YOLO
 
 from core.interface import frameProcessor
 from robot_control import RobotController
 from .tracking import estimate_distance
-import torch
+from .model_registry import model_registry
+from .inference_service import open_inference_stream
+from .adaptive import AdaptiveInferenceController, level_for
+from .tiling import TILED_INFERENCE
+from .liquid_color import (
+    GAMMA_LUT, classify_hsv, classify_hsv_batch, resample_rois, roi_signatures,
+)
+from .track_state import TrackStateStore
+from .detection_feed import Detection, detection_feed
 
 # =====================================================
-# INFERENCE DEVICE — prefer GPU, fall back to CPU safely
+# MODEL — loaded lazily through the shared registry,
+# so importing this module does not pull in torch
 # =====================================================
 
-def _resolve_inference_device():
-    if not torch.cuda.is_available() or torch.cuda.device_count() < 1:
-        return "cpu"
-    try:
-        torch.zeros(1, device="cuda:0")
-        return 0
-    except RuntimeError:
-        return "cpu"
-
-INFERENCE_DEVICE = _resolve_inference_device()
-print(f"YOLO inference device: {INFERENCE_DEVICE}")
-
-# =====================================================
-# LOAD MODEL
-# =====================================================
-
-model = YOLO("media/yolo/best-5.pt")
+MODEL_WEIGHTS = "media/yolo/best-5.pt"
 
 # =====================================================
 # CAMERA STREAM
@@ -122,11 +114,10 @@ class CameraStream:
 # NOTE: CameraStream and script execution are only started in the main() entrypoint below.
 
 CONF_THRESHOLD = 0.40
-color_histories = {}
-z_histories     = {}
-box_history     = {}
-color_cache     = {}
-COLOR_EVERY_N   = 10
+# Colour is re-classified when a track's ROI changes (see track_state);
+# this only bounds how long an unchanged result may be reused
+COLOR_MAX_AGE   = 300
+# Starting operating point; the adaptive controller moves it at runtime
 INFERENCE_IMG_SIZE = 640
 SUBMIT_EVERY_N = 1   # submit every 2 display frames for faster real-time performance
 last_results    = []
@@ -135,95 +126,85 @@ last_results    = []
 # DETECTION SETTINGS
 # =====================================================
 
+# Built once: the elliptical centre mask that keeps the glass walls out of
+# the colour vote
+LIQUID_MASK = np.zeros((50, 50), dtype=np.uint8)
+cv2.ellipse(LIQUID_MASK, (25, 25), (18, 22), 0, 0, 360, 255, -1)
+LIQUID_MASK = LIQUID_MASK.astype(bool)
+
+
 def detect_liquid_color(roi):
     if roi.size == 0:
         return "unknown"
     roi = cv2.resize(roi, (50, 50))
-
-    lut = np.array([
-        np.clip(pow(i / 255.0, 1.1) * 255.0, 0, 255)
-        for i in range(256)
-    ], dtype=np.uint8).reshape(1, 256)
-    roi = cv2.LUT(roi, lut)
-
-    mask_base = np.zeros((50, 50), dtype=np.uint8)
-    cv2.ellipse(mask_base, (25, 25), (18, 22), 0, 0, 360, 255, -1)
-
+    roi = cv2.LUT(roi, GAMMA_LUT)
     hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-
-    colors = {
-        "transparent": [((0,   0,  200), (180,  30, 255))],
-        "red":         [((0,   80,  40), ( 10, 255, 255)),
-                        ((170, 80,  40), (180, 255, 255))],
-        "blue":        [((95,  60,  40), (140, 255, 255))],
-        "green":       [((35,  40,  40), ( 85, 255, 255))],
-        "yellow":      [((18,  70,  80), ( 35, 255, 255))],
-        "orange":      [((8,   70,  70), ( 24, 255, 255))],
-        "purple":      [((120, 40,  40), (160, 255, 255))],
-        "brown":       [((5,   80,  20), ( 18, 200, 140))],
-    }
-
-    detected_color = "unknown"
-    max_pixels     = 0
-
-    for color_name, ranges in colors.items():
-        total = 0
-        for lower, upper in ranges:
-            cm = cv2.inRange(hsv, np.array(lower), np.array(upper))
-            cm = cv2.bitwise_and(cm, mask_base)
-            total += cv2.countNonZero(cm)
-        if total > max_pixels:
-            max_pixels     = total
-            detected_color = color_name
-
-    total_area = cv2.countNonZero(mask_base)
-    if max_pixels / total_area < 0.08:
-        return "unknown"
-
-    return detected_color
+    return classify_hsv(hsv, LIQUID_MASK)
 
 # =====================================================
 # LIQUID ROI EXTRACTION
 # =====================================================
 
+# Liquid region inside the box, as (x1, y1, x2, y2) fractions of its size
+_ROI_GROUPS = [
+    (("Beaker", "Measuring_Cylinder", "Test_Tube",
+      "Reagent_Bottle", "Wash_Bottle"),
+     (0.20, 0.35, 0.80, 0.90)),
+    (("Conical_Flask", "Volumetric_Flask",
+      "Round_Bottom_Flask_Borosilicate_Glass_1_Neck",
+      "Round_Bottom_Flask_Borosilicate_Glass_2_Neck",
+      "Round_Bottom_Flask_Borosilicate_Glass_3_Neck"),
+     (0.25, 0.45, 0.75, 0.92)),
+    (("Separating_Funnel", "Funnel", "Buchner_Funnel"),
+     (0.20, 0.25, 0.80, 0.85)),
+]
+ROI_OFFSETS = {name: offsets for names, offsets in _ROI_GROUPS for name in names}
+FULL_ROI = (0.0, 0.0, 1.0, 1.0)
+
+
 def get_liquid_roi(frame, x1, y1, x2, y2, object_name):
+    rx1o, ry1o, rx2o, ry2o = ROI_OFFSETS.get(object_name, FULL_ROI)
     h = y2 - y1
     w = x2 - x1
-
-    if object_name in ["Beaker", "Measuring_Cylinder", "Test_Tube",
-                        "Reagent_Bottle", "Wash_Bottle"]:
-        roi = frame[y1 + int(h*0.35): y1 + int(h*0.90),
-                    x1 + int(w*0.20): x1 + int(w*0.80)]
-        return roi, 0.20, 0.35, 0.80, 0.90
-
-    elif object_name in ["Conical_Flask", "Volumetric_Flask",
-                          "Round_Bottom_Flask_Borosilicate_Glass_1_Neck",
-                          "Round_Bottom_Flask_Borosilicate_Glass_2_Neck",
-                          "Round_Bottom_Flask_Borosilicate_Glass_3_Neck"]:
-        roi = frame[y1 + int(h*0.45): y1 + int(h*0.92),
-                    x1 + int(w*0.25): x1 + int(w*0.75)]
-        return roi, 0.25, 0.45, 0.75, 0.92
-
-    elif object_name in ["Separating_Funnel", "Funnel", "Buchner_Funnel"]:
-        roi = frame[y1 + int(h*0.25): y1 + int(h*0.85),
-                    x1 + int(w*0.20): x1 + int(w*0.80)]
-        return roi, 0.20, 0.25, 0.80, 0.85
-
-    else:
-        return frame[y1:y2, x1:x2], 0.0, 0.0, 1.0, 1.0
-
-# =====================================================
-# BOX SMOOTHING
-# =====================================================
-
-def smooth_box(object_id, box, alpha=0.3):
-    if object_id not in box_history:
-        box_history[object_id] = box
-        return box
-    old = box_history[object_id]
-    smoothed = [int(alpha * old[i] + (1 - alpha) * box[i]) for i in range(4)]
-    box_history[object_id] = smoothed
-    return smoothed
+    roi = frame[y1 + int(h*ry1o): y1 + int(h*ry2o),
+                x1 + int(w*rx1o): x1 + int(w*rx2o)]
+    return roi, rx1o, ry1o, rx2o, ry2o
+
+
+def get_liquid_rois(frame_shape, boxes, object_names):
+    """
+    Vectorised get_liquid_roi for all boxes of a frame.
+
+    Returns (rects, offsets): (N, 4) liquid ROI rectangles clipped to the frame
+    and the (N, 4) box fractions they were cut at.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    offsets = np.array([ROI_OFFSETS.get(name, FULL_ROI) for name in object_names],
+                       dtype=np.float64).reshape(-1, 4)
+    size = np.tile(boxes[:, 2:] - boxes[:, :2], 2)
+    rects = np.tile(boxes[:, :2], 2) + (size * offsets).astype(np.int64)
+    rects[:, [0, 2]] = rects[:, [0, 2]].clip(0, frame_shape[1])
+    rects[:, [1, 3]] = rects[:, [1, 3]].clip(0, frame_shape[0])
+    return rects, offsets
+
+
+def detect_liquid_colors(frame, rects):
+    """
+    Batched detect_liquid_color: one colour per ROI rect, None where the ROI is
+    empty. All ROIs are resampled into one stack and classified in one pass.
+    """
+    colors = [None] * len(rects)
+    valid = np.flatnonzero((rects[:, 2] > rects[:, 0]) & (rects[:, 3] > rects[:, 1]))
+    if len(valid) == 0:
+        return colors
+
+    stack = resample_rois(frame, rects[valid], 50).reshape(-1, 50, 3)
+    stack = cv2.LUT(stack, GAMMA_LUT)
+    hsv = cv2.cvtColor(stack, cv2.COLOR_BGR2HSV).reshape(-1, 50, 50, 3)
+
+    for i, color in zip(valid, classify_hsv_batch(hsv, LIQUID_MASK)):
+        colors[i] = color
+    return colors
 
 # =====================================================
 # DRAW INFO PANEL
@@ -283,167 +264,231 @@ def draw_info_panel(frame, detections):
                  (fx - margin - 8,           y_off - 4),
                  (50, 50, 50), 1)
 
+# Live workers, for the colour-cache counters in /detections/metrics
+_workers = weakref.WeakSet()
+
+
+def color_cache_stats():
+    return [worker.color_cache_stats() for worker in list(_workers)]
+
 # =====================================================
-# YOLO WORKER — runs inference in a background thread
-# so the main loop (camera display) never freezes.
-# Preserves all original logic: smooth_box, color
-# cache, color_histories, get_liquid_roi, etc.
+# YOLO WORKER — submits frames to the shared batched
+# inference service so the main loop (camera display)
+# never freezes. Box smoothing, the colour cache and
+# the colour / distance histories live per ByteTrack
+# track in a TrackStateStore owned by the worker.
 # =====================================================
 
 class YOLOWorker:
-    def __init__(self, model, conf_threshold=0.40):
-        self.model          = model
+    def __init__(self, shared_model, conf_threshold=0.40,
+                 imgsz=INFERENCE_IMG_SIZE, submit_every_n=SUBMIT_EVERY_N,
+                 adaptive=True, tiled=TILED_INFERENCE, name="mixed_grid"):
+        self.name           = name
+        self.shared_model   = shared_model
+        self.model          = shared_model.model
         self.conf_threshold = conf_threshold
 
-        self._input_frame  = None
-        self._results      = []
-        self._result_lock  = threading.Lock()
-        self._input_lock   = threading.Lock()
-        self._running      = True
-        self._new_frame    = threading.Event()
+        # closed-loop imgsz control against DETECTION_TARGET_MS, submit
+        # cadence against the stream's throughput
+        self.controller = None
+        self._submit_every_n = submit_every_n
+        if adaptive:
+            self.controller = AdaptiveInferenceController(
+                name, level=level_for(imgsz), submit_every_n=submit_every_n)
+            imgsz = self.controller.imgsz
 
-        # per-worker frame counter (mirrors original COLOR_EVERY_N logic)
-        self._frame_count  = 0
+        self._results      = ()
 
-        self.thread = threading.Thread(target=self._run, daemon=True)
-        self.thread.start()
+        # per-worker frame counter, used for track TTL and colour age
+        self._frame_count  = 0
+        self.color_hits    = 0
+        self.color_misses  = 0
+        # per-track state, isolated per stream and evicted when tracks vanish
+        self.tracks        = TrackStateStore()
+        _workers.add(self)
+        names = self.model.names
+        detection_feed.register_classes(names[cls] for cls in sorted(names))
+
+        # Inference itself runs on the model's shared InferenceService thread,
+        # batched with any other stream using the same weights; this stream
+        # keeps its own ByteTrack state.
+        self.stream = open_inference_stream(
+            shared_model,
+            self._on_result,
+            conf=conf_threshold,
+            iou=0.35,
+            imgsz=imgsz,
+            max_det=20,
+            agnostic_nms=True,
+            tracker_cfg="bytetrack.yaml",
+            tiled=tiled,
+        )
 
     def submit(self, frame):
-        """Hand a new frame to the worker. Non-blocking — returns instantly."""
-        with self._input_lock:
-            self._input_frame = frame.copy()
-        self._new_frame.set()
+        """
+        Hand a new frame to the worker. Non-blocking — returns instantly.
+
+        Ring frames are read-only and never mutated, so the worker borrows the
+        array instead of taking a copy.
+        """
+        self.stream.submit(frame)
+        if self.controller is not None:
+            self.controller.submitted()
 
     def get_results(self):
-        """Fetch the latest detection list. Non-blocking."""
-        with self._result_lock:
-            return list(self._results)
+        """Latest detections as an immutable tuple. Non-blocking, no copy."""
+        return self._results
+
+    @property
+    def submit_every_n(self):
+        """How many display frames to skip between submits (set by the controller)."""
+        if self.controller is not None:
+            return self.controller.submit_every_n
+        return self._submit_every_n
 
     def set_conf(self, value):
         self.conf_threshold = value
+        self.stream.conf = value
 
-    def _run(self):
-        while self._running:
-            triggered = self._new_frame.wait(timeout=0.5)
-            if not triggered:
-                continue
-            self._new_frame.clear()
-
-            with self._input_lock:
-                frame = self._input_frame
-            if frame is None:
-                continue
-
-            self._frame_count += 1
-
-            results = self.model.track(
-                    source=frame,
-                    persist=True,
-                    tracker="bytetrack.yaml",
+    def _on_result(self, frame, result):
+        self._frame_count += 1
 
-                    conf=self.conf_threshold,
-                    iou=0.35,
+        if self.controller is not None:
+            if self.controller.update(self.stream.last_inference_s):
+                self.stream.imgsz = self.controller.imgsz
+            self.controller.delivered()
 
-                    imgsz=INFERENCE_IMG_SIZE,
+        candidates = []
+        boxes = result.boxes if result.boxes is not None else []
 
-                    agnostic_nms=True,
-                    max_det=20,
+        for idx, box in enumerate(boxes):
+            # ByteTrack ID; untracked boxes get a negative per-frame ID and a
+            # throwaway state, so they never share history across frames
+            if box.id is not None:
+                track_id = int(box.id[0])
+                state = self.tracks.get(track_id, self._frame_count)
+            else:
+                track_id = -(idx + 1)
+                state = self.tracks.transient(self._frame_count)
 
-                    verbose=False,
-                    device=INFERENCE_DEVICE,
-                )
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            x1, y1, x2, y2 = state.smooth_box([x1, y1, x2, y2])
 
-            detections = []
+            cls_id      = int(box.cls[0])
+            confidence  = float(box.conf[0])
+            object_name = self.model.names[cls_id]
 
-            for result in results:
-                if result.boxes is None:
-                    continue
+            if (x2 - x1) < 10 or (y2 - y1) < 10:
+                continue
+            candidates.append(
+                (state, (x1, y1, x2, y2), object_name, confidence, track_id, cls_id))
+
+        self.tracks.evict_stale(self._frame_count)
+
+        # ── colour detection: a cheap ROI signature decides which tracks
+        #    changed; only those are classified, together in one batch ──
+        rects, roi_offsets = get_liquid_rois(
+            frame.shape, [c[1] for c in candidates], [c[2] for c in candidates])
+        signatures = [None] * len(candidates)
+        valid = np.flatnonzero((rects[:, 2] > rects[:, 0]) & (rects[:, 3] > rects[:, 1]))
+        if len(valid):
+            for i, signature in zip(valid, roi_signatures(frame, rects[valid])):
+                signatures[i] = signature
+
+        due = [
+            i for i, (state, box, *_) in enumerate(candidates)
+            if state.color_is_stale(signatures[i], box, self._frame_count, COLOR_MAX_AGE)
+        ]
+        self.color_hits += len(candidates) - len(due)
+        self.color_misses += len(due)
+
+        skipped = set()
+        if due:
+            for i, color in zip(due, detect_liquid_colors(frame, rects[due])):
+                if color is None:
+                    skipped.add(i)
+                else:
+                    state, box = candidates[i][:2]
+                    state.set_color(color, signatures[i], box, self._frame_count)
+
+        detections = []
+        for i, candidate in enumerate(candidates):
+            state, (x1, y1, x2, y2), object_name, confidence, track_id, cls_id = candidate
+            if i in skipped or state.color is None:
+                continue
+            rx1o, ry1o, rx2o, ry2o = roi_offsets[i].tolist()
+            stable_color = state.push_color(state.color)
+
+            cx_px = (x1 + x2) // 2
+            cy_px = (y1 + y2) // 2
+            bbox_area = (x2 - x1) * (y2 - y1)
+            z_norm = state.push_z(estimate_distance(bbox_area))
+
+            detections.append({
+                "id":          track_id,
+                "cls":         cls_id,
+                "name":        object_name,
+                "color":       stable_color,
+                "confidence":  confidence,
+                "x":           int(cx_px),
+                "y":           int(cy_px),
+                "z":           round(z_norm, 3),
+                "box":         (x1, y1, x2, y2),
+                "roi_offsets": (rx1o, ry1o, rx2o, ry2o),
+            })
+
+        # Published once per inference result, not once per displayed frame
+        self._results = tuple(detections)
+        _set_latest_detections(detections)
 
-                for idx, box in enumerate(result.boxes):
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    x1, y1, x2, y2 = smooth_box(idx, [x1, y1, x2, y2])
-
-                    cls_id      = int(box.cls[0])
-                    confidence  = float(box.conf[0])
-                    object_name = self.model.names[cls_id]
-
-                    if (x2 - x1) < 10 or (y2 - y1) < 10:
-                        continue
-
-                    # ── colour detection with original cache logic ──
-                    cached_frame = color_cache.get(idx, (None, -999))[1]
-                    if self._frame_count - cached_frame >= COLOR_EVERY_N:
-                        liquid_roi, rx1o, ry1o, rx2o, ry2o = get_liquid_roi(
-                            frame, x1, y1, x2, y2, object_name)
-                        if liquid_roi.size == 0:
-                            continue
-                        raw_color = detect_liquid_color(liquid_roi)
-                        color_cache[idx] = (raw_color, self._frame_count)
-                    else:
-                        raw_color        = color_cache[idx][0]
-                        rx1o, ry1o, rx2o, ry2o = 0.0, 0.0, 1.0, 1.0
-
-                    if idx not in color_histories:
-                        color_histories[idx] = deque(maxlen=10)
-                    color_histories[idx].append(raw_color)
-                    stable_color = Counter(color_histories[idx]).most_common(1)[0][0]
-
-                    cx_px = (x1 + x2) // 2
-                    cy_px = (y1 + y2) // 2
-                    bbox_area = (x2 - x1) * (y2 - y1)
-
-                    if idx not in z_histories:
-                        z_histories[idx] = deque(maxlen=8)
-                    z_histories[idx].append(estimate_distance(bbox_area))
-                    z_norm = float(np.mean(z_histories[idx]))
-
-                    detections.append({
-                        "name":        object_name,
-                        "color":       stable_color,
-                        "confidence":  confidence,
-                        "x":           int(cx_px),
-                        "y":           int(cy_px),
-                        "z":           round(z_norm, 3),
-                        "box":         (x1, y1, x2, y2),
-                        "roi_offsets": (rx1o, ry1o, rx2o, ry2o),
-                    })
-
-            with self._result_lock:
-                self._results = detections
+    def color_cache_stats(self):
+        lookups = self.color_hits + self.color_misses
+        return {
+            "name": self.name,
+            "hits": self.color_hits,
+            "misses": self.color_misses,
+            "hit_rate": round(self.color_hits / lookups, 3) if lookups else 0.0,
+            **self.tracks.stats(),
+        }
 
     def stop(self):
-        self._running = False
-        self._new_frame.set()   # unblock the wait() so thread exits cleanly
-        self.thread.join()
+        self.stream.close()
+        if self.controller is not None:
+            self.controller.close()
+        self.tracks.clear()
+        _workers.discard(self)
 
 # =====================================================
 # LATEST DETECTIONS (for API consumers)
 # =====================================================
 
-_latest_detections = []
-_detections_lock = threading.Lock()
+def get_latest_snapshot():
+    """Immutable, versioned snapshot of the latest detections (no lock, no copy)."""
+    return detection_feed.latest()
 
 
 def get_latest_detections():
-    with _detections_lock:
-        return [
-            {
-                "name": d["name"],
-                "color": d["color"],
-                "confidence": d["confidence"],
-                "x": d["x"],
-                "y": d["y"],
-                "z": d["z"],
-                "z_unit": "normalized",
-            }
-            for d in _latest_detections
-        ]
+    return detection_feed.latest().to_dicts()
 
 
 def _set_latest_detections(detections):
-    global _latest_detections
-    with _detections_lock:
-        _latest_detections = list(detections)
+    # Publishes a new snapshot only if the public view changed; push consumers
+    # (/detections/stream, robotics bridge) only hear about real changes
+    detection_feed.publish(
+        Detection(
+            id=d["id"],
+            name=d["name"],
+            color=d["color"],
+            # Rounded so sub-percent jitter alone does not count as a change
+            confidence=round(d["confidence"], 2),
+            x=d["x"],
+            y=d["y"],
+            z=d["z"],
+            # Feed-wide ID: streams running different models share one table
+            cls=detection_feed.class_id(d["name"]),
+        )
+        for d in detections
+    )
 
 
 # =====================================================
@@ -455,20 +500,18 @@ class MixedGridProcessor(frameProcessor):
                  conf_threshold=CONF_THRESHOLD,
                  submit_every_n=SUBMIT_EVERY_N):
         self.robot_controller = robot_controller
-        self.yolo_worker = YOLOWorker(model, conf_threshold=conf_threshold)
+        self.model = model_registry.acquire(MODEL_WEIGHTS)
+        self.yolo_worker = YOLOWorker(self.model, conf_threshold=conf_threshold,
+                                      submit_every_n=submit_every_n)
         self.frame_counter = 0
-        self.submit_every_n = submit_every_n
 
     def process(self, frame: np.ndarray) -> np.ndarray:
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
         self.frame_counter += 1
-        if self.frame_counter % self.submit_every_n == 0:
+        if self.frame_counter % self.yolo_worker.submit_every_n == 0:
             self.yolo_worker.submit(frame)
 
         annotated = frame.copy()
         detections = self.yolo_worker.get_results()
-        _set_latest_detections(detections)
 
         for d in detections:
             x1, y1, x2, y2        = d["box"]
@@ -495,6 +538,7 @@ class MixedGridProcessor(frameProcessor):
 
     def stop(self):
         self.yolo_worker.stop()
+        self.model.release()
         if self.robot_controller is not None:
             try:
                 self.robot_controller.close()
@@ -503,7 +547,9 @@ class MixedGridProcessor(frameProcessor):
 
 
 def main():
+    global CONF_THRESHOLD
     cam = CameraStream(width=640, height=640)
+    model = model_registry.acquire(MODEL_WEIGHTS)
     yolo_worker = YOLOWorker(model, conf_threshold=CONF_THRESHOLD)
     frame_count = 0
 
@@ -516,11 +562,10 @@ def main():
         annotated = frame.copy()
         frame_count += 1
 
-        if frame_count % SUBMIT_EVERY_N == 0:
+        if frame_count % yolo_worker.submit_every_n == 0:
             yolo_worker.submit(frame)
 
         detections = yolo_worker.get_results()
-        _set_latest_detections(detections)
 
         for d in detections:
             x1, y1, x2, y2        = d["box"]
@@ -565,6 +610,7 @@ def main():
             print("Confidence:", round(CONF_THRESHOLD, 2))
 
     yolo_worker.stop()
+    model.release()
     cam.stop()
     cv2.destroyAllWindows()
 
@@ -0,0 +1,222 @@
+import gc
+import os
+import threading
+import time
+
+import numpy as np
+
+# Seconds a model may sit unused before its weights are dropped from memory
+IDLE_UNLOAD_S = 120.0
+WARMUP_IMG_SIZE = 640
+
+# "ultralytics" (PyTorch, default), "onnx" / "onnx_int8" (ONNX Runtime) or "openvino"
+DEFAULT_BACKEND = os.environ.get("YOLO_BACKEND", "ultralytics").strip().lower()
+# Per-model overrides by weights file name, e.g. "best-5.pt=onnx_int8,yolov8n.pt=onnx"
+MODEL_BACKENDS = {
+    name.strip(): backend.strip().lower()
+    for name, sep, backend in (
+        entry.partition("=") for entry in os.environ.get("YOLO_BACKENDS", "").split(",")
+    )
+    if sep
+}
+
+
+_device = None
+
+
+def resolve_inference_device():
+    """Prefer the first CUDA GPU, fall back to CPU safely. Resolved once, on first use."""
+    global _device
+    if _device is not None:
+        return _device
+
+    import torch
+
+    if not torch.cuda.is_available() or torch.cuda.device_count() < 1:
+        _device = "cpu"
+    else:
+        try:
+            torch.zeros(1, device="cuda:0")
+            _device = 0
+        except RuntimeError:
+            _device = "cpu"
+
+    print(f"YOLO inference device: {_device}")
+    return _device
+
+
+class SharedModel:
+    """
+    A reference-counted handle on a registry model.
+
+    Ultralytics models are not safe to call from several threads at once, so
+    callers hold `lock` around inference.
+    """
+
+    def __init__(self, registry: "ModelRegistry", key: tuple, model):
+        self.registry = registry
+        self.key = key
+        self.model = model
+        self.lock = threading.Lock()
+        self.refs = 0
+        self.idle_since = None
+        self.load_time_s = 0.0
+
+    @property
+    def names(self):
+        return self.model.names
+
+    @property
+    def device(self):
+        return self.key[1]
+
+    @property
+    def backend(self):
+        return self.key[2]
+
+    def release(self) -> None:
+        self.registry.release(self)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of YOLO models keyed by (weights path, device, backend).
+
+    Models load on first acquire() and are warmed up with a dummy inference so the
+    first real frame does not pay for lazy initialisation. Models nobody holds are
+    unloaded after IDLE_UNLOAD_S.
+    """
+
+    def __init__(self, idle_unload_s: float = IDLE_UNLOAD_S):
+        self.idle_unload_s = idle_unload_s
+        self._models: dict[tuple, SharedModel] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, weights: str, device=None, backend: str | None = None) -> SharedModel:
+        backend = _resolve_backend(weights, backend)
+        if backend != "ultralytics":
+            # Exported backends run on the CPU execution providers
+            device = "cpu"
+        elif device is None:
+            device = resolve_inference_device()
+        key = (_normalize_weights(weights), device, backend)
+
+        with self._lock:
+            shared = self._models.get(key)
+            if shared is None:
+                shared = self._load(key)
+                self._models[key] = shared
+            shared.refs += 1
+            shared.idle_since = None
+            return shared
+
+    def release(self, shared: SharedModel) -> None:
+        with self._lock:
+            if shared.refs > 0:
+                shared.refs -= 1
+            if shared.refs > 0:
+                return
+            shared.idle_since = time.time()
+
+        timer = threading.Timer(self.idle_unload_s, self.unload_idle)
+        timer.daemon = True
+        timer.start()
+
+    def unload_idle(self, max_idle_s: float | None = None) -> int:
+        """Drop models that have been unreferenced for at least max_idle_s."""
+        if max_idle_s is None:
+            max_idle_s = self.idle_unload_s
+        now = time.time()
+
+        with self._lock:
+            idle = [
+                key for key, shared in self._models.items()
+                if shared.refs == 0
+                and shared.idle_since is not None
+                and now - shared.idle_since >= max_idle_s
+            ]
+            for key in idle:
+                del self._models[key]
+
+        if idle:
+            for key in idle:
+                print(f"YOLO model unloaded: {key[0]} ({key[1]}, {key[2]})")
+            gc.collect()
+            _empty_device_cache()
+        return len(idle)
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "weights": key[0],
+                    "device": str(key[1]),
+                    "backend": key[2],
+                    "refs": shared.refs,
+                    "idle_s": None if shared.idle_since is None
+                    else round(time.time() - shared.idle_since, 1),
+                    "load_time_s": round(shared.load_time_s, 2),
+                }
+                for key, shared in self._models.items()
+            ]
+
+    def _load(self, key: tuple) -> SharedModel:
+        weights, device, backend = key
+        start = time.time()
+
+        if backend == "ultralytics":
+            from ultralytics import YOLO
+
+            model = YOLO(weights)
+        else:
+            from .cpu_backends import ExportedYOLO
+
+            model = ExportedYOLO(weights, backend)
+
+        # Warm-up: fuse layers and allocate buffers before the first real frame
+        dummy = np.zeros((WARMUP_IMG_SIZE, WARMUP_IMG_SIZE, 3), dtype=np.uint8)
+        model.predict(dummy, imgsz=WARMUP_IMG_SIZE, device=device, verbose=False)
+
+        shared = SharedModel(self, key, model)
+        shared.load_time_s = time.time() - start
+        print(
+            f"YOLO model loaded: {weights} ({device}, {backend}) in {shared.load_time_s:.2f}s"
+        )
+        return shared
+
+
+def _resolve_backend(weights: str, backend: str | None) -> str:
+    """
+    Backend for weights: the explicit one, else its YOLO_BACKENDS entry, else
+    YOLO_BACKEND. INT8 needs an up-to-date quantized file per model
+    (media/yolo/quantize.py); models without one, or whose weights changed
+    since, fall back to the fp32 ONNX export.
+    """
+    backend = backend or MODEL_BACKENDS.get(os.path.basename(weights), DEFAULT_BACKEND)
+    if backend == "onnx_int8":
+        from .cpu_backends import export_path, is_exported
+
+        if not is_exported(weights, backend):
+            state = "Stale" if os.path.exists(export_path(weights, backend)) else "No"
+            print(f"{state} INT8 model for {weights}; using fp32 ONNX (see media/yolo/quantize.py)")
+            return "onnx"
+    return backend
+
+
+def _normalize_weights(weights: str) -> str:
+    # Bare names like "yolov8n.pt" are resolved (and downloaded) by ultralytics itself
+    if os.path.isfile(weights):
+        return os.path.abspath(weights)
+    return weights
+
+
+def _empty_device_cache() -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+model_registry = ModelRegistry()
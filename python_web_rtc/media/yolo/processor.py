@@ -4,10 +4,10 @@ from threading import Thread
 from queue import Queue, Empty
 import time
 
-from ultralytics import YOLO
-
 from core.interface import frameProcessor
 from .tracking import norm_to_angle, estimate_distance
+from .model_registry import model_registry
+from .adaptive import AdaptiveInferenceController
 from robot_control import RobotController
 
 
@@ -16,7 +16,8 @@ class YoloFrameProcessor(frameProcessor):
     def __init__(self, robot_controller: RobotController):
 
         # ================= YOLO =================
-        self.model = YOLO("yolov8n.pt")
+        self.shared_model = model_registry.acquire("yolov8n.pt")
+        self.model = self.shared_model.model
         self.target_class = "cup"
         self.class_names = self.model.names
 
@@ -38,6 +39,12 @@ class YoloFrameProcessor(frameProcessor):
         self.frame_counter = 0
         self.skip_rate = 1
 
+        # ================= ADAPTIVE IMGSZ =================
+        # skip_rate stays fixed: the worker always takes the newest frame once
+        # the previous call returns, so a backlog cannot build up here
+        self.controller = AdaptiveInferenceController("yolo")
+        self.imgsz = self.controller.imgsz
+
         # ================= THREADS =================
         self.camera_thread = Thread(target=self._frame_worker, daemon=True)
         self.yolo_thread = Thread(target=self._yolo_worker, daemon=True)
@@ -47,10 +54,7 @@ class YoloFrameProcessor(frameProcessor):
 
     # ================= INPUT =================
     def process(self, frame: np.ndarray) -> np.ndarray:
-
-        # ================= GLOBAL COLOR FIX (IMPORTANT) =================
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
+        # Frames arrive as true BGR (the source tags its pixel format), so no swap here
         self._latest_frame = frame
 
         try:
@@ -90,12 +94,18 @@ class YoloFrameProcessor(frameProcessor):
                 continue
 
             # ================= YOLO INFERENCE =================
-            results = self.model(
-                latest_frame,
-                imgsz=640,
-                conf=0.4,
-                verbose=False
-            )
+            start = time.perf_counter()
+            with self.shared_model.lock:
+                results = self.model(
+                    latest_frame,
+                    imgsz=self.imgsz,
+                    conf=0.4,
+                    verbose=False,
+                    device=self.shared_model.device,
+                )
+
+            if self.controller.update(time.perf_counter() - start):
+                self.imgsz = self.controller.imgsz
 
             if self.yolo_queue.full():
                 self.yolo_queue.get_nowait()
@@ -180,4 +190,6 @@ class YoloFrameProcessor(frameProcessor):
         self.running = False
         self.camera_thread.join()
         self.yolo_thread.join()
+        self.shared_model.release()
+        self.controller.close()
         self.robot_controller.close()
\ No newline at end of file
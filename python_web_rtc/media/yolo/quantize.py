@@ -0,0 +1,211 @@
+"""
+INT8 post-training quantization for the CPU (ONNX Runtime) detector backend.
+
+Calibrates on a directory of recorded frames, writes <weights>.int8.onnx next to
+the weights (picked up with YOLO_BACKENDS=best-5.pt=onnx_int8, or for every
+model that has one with YOLO_BACKEND=onnx_int8) and reports per-class
+agreement of the INT8 model against the FP32 export on held-out frames.
+
+    python -m media.yolo.quantize --weights media/yolo/best-5.pt --frames recordings/
+"""
+
+import argparse
+import os
+import random
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from .cpu_backends import (
+    EXPORT_IMG_SIZE,
+    ExportedYOLO,
+    ensure_exported,
+    export_path,
+    preprocess_batch,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_frames(frames_dir: str) -> list[str]:
+    paths = [
+        os.path.join(frames_dir, name)
+        for name in sorted(os.listdir(frames_dir))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    if not paths:
+        raise FileNotFoundError(f"No image frames found in {frames_dir}")
+    return paths
+
+
+class FrameCalibrationReader:
+    """Feeds letterboxed frames to onnxruntime's static calibration, one at a time."""
+
+    def __init__(self, paths: list[str], input_name: str, imgsz: int):
+        self._paths = iter(paths)
+        self._input_name = input_name
+        self._imgsz = imgsz
+
+    def get_next(self):
+        for path in self._paths:
+            frame = cv2.imread(path)
+            if frame is None:
+                continue
+            batch, _ = preprocess_batch([frame], self._imgsz)
+            return {self._input_name: batch}
+        return None
+
+    def rewind(self):
+        pass
+
+
+def quantize(weights: str, calib_paths: list[str], imgsz: int = EXPORT_IMG_SIZE) -> str:
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    fp32_path = ensure_exported(weights, "onnx")
+    int8_path = export_path(weights, "onnx_int8")
+    prepared_path = int8_path.replace(".int8.onnx", ".prep.onnx")
+
+    input_name = ort.InferenceSession(
+        fp32_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    quant_pre_process(fp32_path, prepared_path)
+    try:
+        quantize_static(
+            prepared_path,
+            int8_path,
+            FrameCalibrationReader(calib_paths, input_name, imgsz),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+    finally:
+        if os.path.exists(prepared_path):
+            os.remove(prepared_path)
+
+    # Keep the ultralytics metadata (class names, stride) on the quantized model
+    fp32_model = onnx.load(fp32_path)
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, int8_path)
+
+    return int8_path
+
+
+def _iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    w = (np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0])).clip(0)
+    h = (np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1])).clip(0)
+    inter = w * h
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / (area + areas - inter + 1e-9)
+
+
+def compare_models(
+    reference: ExportedYOLO,
+    candidate: ExportedYOLO,
+    paths: list[str],
+    conf: float = 0.40,
+    iou_match: float = 0.5,
+    imgsz: int = EXPORT_IMG_SIZE,
+) -> dict:
+    """
+    Per-class agreement of candidate against reference detections.
+
+    FP32 detections act as ground truth: recall = matched / reference count,
+    precision = matched / candidate count, conf_delta = mean confidence change
+    of matched boxes.
+    """
+    counts = defaultdict(lambda: {"reference": 0, "candidate": 0, "matched": 0, "conf_delta": []})
+
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        ref = reference.detect([frame], conf=conf, imgsz=imgsz)[0]
+        cand = candidate.detect([frame], conf=conf, imgsz=imgsz)[0]
+
+        for row in cand:
+            counts[int(row[5])]["candidate"] += 1
+
+        used = np.zeros(len(cand), dtype=bool)
+        for row in ref:
+            cls = int(row[5])
+            counts[cls]["reference"] += 1
+            same = np.flatnonzero((cand[:, 5] == row[5]) & ~used) if len(cand) else []
+            if len(same) == 0:
+                continue
+            ious = _iou(row[:4], cand[same, :4])
+            best = int(ious.argmax())
+            if ious[best] >= iou_match:
+                used[same[best]] = True
+                counts[cls]["matched"] += 1
+                counts[cls]["conf_delta"].append(float(cand[same[best], 4] - row[4]))
+
+    report = {}
+    for cls, c in sorted(counts.items()):
+        report[reference.names.get(cls, str(cls))] = {
+            "fp32": c["reference"],
+            "int8": c["candidate"],
+            "recall": c["matched"] / c["reference"] if c["reference"] else None,
+            "precision": c["matched"] / c["candidate"] if c["candidate"] else None,
+            "conf_delta": float(np.mean(c["conf_delta"])) if c["conf_delta"] else None,
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    print(f"{'class':<46}{'fp32':>6}{'int8':>6}{'recall':>8}{'prec':>8}{'dconf':>8}")
+    for name, row in report.items():
+        print(
+            f"{name:<46}{row['fp32']:>6}{row['int8']:>6}"
+            f"{fmt(row['recall'], '.3f'):>8}{fmt(row['precision'], '.3f'):>8}"
+            f"{fmt(row['conf_delta'], '+.3f'):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weights", default="media/yolo/best-5.pt")
+    parser.add_argument("--frames", required=True, help="directory of recorded frames")
+    parser.add_argument("--calib", type=int, default=200, help="frames used for calibration")
+    parser.add_argument("--eval", type=int, default=100, help="held-out frames for the report")
+    parser.add_argument("--imgsz", type=int, default=EXPORT_IMG_SIZE)
+    parser.add_argument("--conf", type=float, default=0.40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = list_frames(args.frames)
+    random.Random(args.seed).shuffle(paths)
+    calib_paths = paths[: args.calib]
+    eval_paths = paths[args.calib: args.calib + args.eval] or calib_paths[: args.eval]
+
+    print(f"Calibrating on {len(calib_paths)} frames ...")
+    int8_path = quantize(args.weights, calib_paths, args.imgsz)
+    fp32_size = os.path.getsize(export_path(args.weights, "onnx"))
+    int8_size = os.path.getsize(int8_path)
+    print(f"INT8 model: {int8_path} ({int8_size / 1e6:.1f} MB, FP32 {fp32_size / 1e6:.1f} MB)")
+
+    print(f"Comparing against FP32 on {len(eval_paths)} frames ...")
+    report = compare_models(
+        ExportedYOLO(args.weights, "onnx"),
+        ExportedYOLO(args.weights, "onnx_int8"),
+        eval_paths,
+        conf=args.conf,
+        imgsz=args.imgsz,
+    )
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
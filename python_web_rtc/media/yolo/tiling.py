@@ -0,0 +1,185 @@
+"""
+Two-stage region-of-interest inference for small objects.
+
+A cheap low-resolution pass over the whole frame finds where things are; the
+frame is then cropped around those detections, around last frame's boxes and
+around anything that moved, and only those crops are inferred at native
+resolution. Coarse and crop detections are merged with NMS and returned as one
+ultralytics Results object, so tracking and the processors work unchanged.
+
+On a mostly static bench this resolves small test tubes at close to full-frame
+high-resolution accuracy for a fraction of the compute. Tiling only pays off on
+frames larger than the detector's imgsz (e.g. 1280x720 at imgsz=960), and only
+while the coarse pass plus the crops cost no more than one full pass; frames where
+it cannot (a 640x640 stream at imgsz=640) always get the single full-frame pass,
+as does a frame whose activity needs more crops than that budget allows.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from .cpu_backends import nms
+
+# Set YOLO_TILED=1 to run the detectors in tiled mode where it is cheaper
+TILED_INFERENCE = os.environ.get("YOLO_TILED", "0").strip() == "1"
+
+COARSE_IMG_SIZE = 320
+TILE_SIZE = 480          # crop side in frame pixels, inferred at the same size
+MAX_TILES = 4
+MOTION_SCALE = 0.25      # frame-difference runs on a quarter-size grey image
+MOTION_THRESHOLD = 25
+MOTION_MIN_AREA = 12     # in downscaled pixels
+
+
+def _boxes_array(result) -> np.ndarray:
+    """(N, 6) x1, y1, x2, y2, conf, cls rows from an ultralytics Results."""
+    if result.boxes is None or len(result.boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    return np.asarray(result.boxes.cpu().numpy().data[:, :6], dtype=np.float32)
+
+
+def _pass_pixels(w: int, h: int, imgsz: int) -> float:
+    """Input pixels of one letterboxed pass over a w x h image at imgsz (never upscaled)."""
+    gain = min(imgsz / max(w, h), 1.0)
+    return (w * gain) * (h * gain)
+
+
+def tile_budget(w: int, h: int, imgsz: int, coarse_imgsz: int = COARSE_IMG_SIZE,
+                tile_size: int = TILE_SIZE) -> int:
+    """
+    Most crops the coarse pass plus crops can afford while costing no more than
+    one full pass at imgsz (compute scales with input pixels). 0 when the full pass
+    already runs at native resolution, since crops would then add nothing.
+    """
+    if max(w, h) <= imgsz:
+        return 0
+    size = min(tile_size, w, h)
+    spare = _pass_pixels(w, h, imgsz) - _pass_pixels(w, h, coarse_imgsz)
+    return max(int(spare // (size * size)), 0)
+
+
+class TiledDetector:
+    """
+    Per-stream tiled inference state: the previous grey frame for motion and the
+    previous detections, which are re-inspected at high resolution next frame.
+    """
+
+    def __init__(
+        self,
+        coarse_imgsz: int = COARSE_IMG_SIZE,
+        tile_size: int = TILE_SIZE,
+        max_tiles: int = MAX_TILES,
+    ):
+        self.coarse_imgsz = coarse_imgsz
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self._prev_grey = None
+        self._prev_boxes = np.zeros((0, 4), dtype=np.float32)
+        self.last_tiles = 0
+        self.last_full_frame = False
+        # Crops the last frame's size allowed (0: tiling can never pay off)
+        self.last_budget = max_tiles
+
+    def detect(self, frame, predict, names, conf, iou, imgsz, max_det, agnostic_nms):
+        """
+        Run the coarse + crop passes on one frame.
+
+        predict(frames, imgsz, conf) runs the shared model on a list of BGR
+        arrays and returns one Results per array. imgsz is only used for the
+        full-frame fallback.
+        """
+        from ultralytics.engine.results import Results
+
+        h, w = frame.shape[:2]
+        max_tiles = min(self.max_tiles, tile_budget(w, h, imgsz, self.coarse_imgsz,
+                                                    self.tile_size))
+        self.last_budget = max_tiles
+        tiles = None
+        if max_tiles > 0:
+            # Stage 1: where is anything? A lower threshold keeps faint small objects
+            coarse = predict([frame], self.coarse_imgsz, conf * 0.5)[0]
+            coarse_det = _boxes_array(coarse)
+
+            regions = [coarse_det[:, :4], self._prev_boxes, self._motion_regions(frame)]
+            tiles = self._plan_tiles(np.concatenate(regions), w, h, max_tiles)
+
+        if tiles is None:
+            # Small frame, or activity everywhere: one full pass is the cheaper option
+            self.last_tiles, self.last_full_frame = 0, True
+            result = predict([frame], imgsz, conf)[0]
+            self._prev_boxes = _boxes_array(result)[:, :4]
+            return result
+
+        self.last_tiles, self.last_full_frame = len(tiles), False
+
+        # Stage 2: native-resolution crops, one batched forward pass
+        parts = [coarse_det[coarse_det[:, 4] >= conf]]
+        if tiles:
+            crops = [np.ascontiguousarray(frame[y1:y2, x1:x2]) for x1, y1, x2, y2 in tiles]
+            crop_results = predict(crops, self.tile_size, conf)
+            for (x1, y1, _, _), crop_result in zip(tiles, crop_results):
+                det = _boxes_array(crop_result)
+                det[:, [0, 2]] += x1
+                det[:, [1, 3]] += y1
+                parts.append(det)
+
+        det = np.concatenate(parts)
+        if len(det):
+            offsets = 0.0 if agnostic_nms else det[:, 5:6] * 7680.0
+            keep = nms(det[:, :4] + offsets, det[:, 4], iou)[:max_det]
+            det = det[keep]
+
+        self._prev_boxes = det[:, :4]
+        return Results(frame, path="", names=names, boxes=det)
+
+    def _motion_regions(self, frame) -> np.ndarray:
+        small = cv2.resize(frame, None, fx=MOTION_SCALE, fy=MOTION_SCALE,
+                           interpolation=cv2.INTER_AREA)
+        grey = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        prev, self._prev_grey = self._prev_grey, grey
+        if prev is None or prev.shape != grey.shape:
+            return np.zeros((0, 4), dtype=np.float32)
+
+        _, mask = cv2.threshold(cv2.absdiff(grey, prev), MOTION_THRESHOLD, 255,
+                                cv2.THRESH_BINARY)
+        mask = cv2.dilate(mask, None, iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        boxes = [
+            (x, y, x + bw, y + bh)
+            for x, y, bw, bh in map(cv2.boundingRect, contours)
+            if bw * bh >= MOTION_MIN_AREA
+        ]
+        if not boxes:
+            return np.zeros((0, 4), dtype=np.float32)
+        return np.asarray(boxes, dtype=np.float32) / MOTION_SCALE
+
+    def _plan_tiles(self, regions: np.ndarray, w: int, h: int, max_tiles: int):
+        """
+        Cover every region with tile_size crops (greedy, largest region first).
+
+        Regions bigger than a tile are left to the coarse pass, which already
+        resolves large objects. Returns None when more than max_tiles crops
+        would be needed.
+        """
+        size = min(self.tile_size, w, h)
+        half = size // 2
+        tiles = []
+
+        sizes = (regions[:, 2] - regions[:, 0]) * (regions[:, 3] - regions[:, 1])
+        for x1, y1, x2, y2 in regions[np.argsort(-sizes)]:
+            if x2 - x1 > size * 0.8 or y2 - y1 > size * 0.8:
+                continue
+            if any(tx1 <= x1 and ty1 <= y1 and x2 <= tx2 and y2 <= ty2
+                   for tx1, ty1, tx2, ty2 in tiles):
+                continue
+            if len(tiles) == max_tiles:
+                return None
+
+            cx = int(min(max((x1 + x2) / 2, half), w - half))
+            cy = int(min(max((y1 + y2) / 2, half), h - half))
+            tiles.append((cx - half, cy - half, cx - half + size, cy - half + size))
+
+        return tiles
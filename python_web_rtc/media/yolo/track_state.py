@@ -0,0 +1,173 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from .liquid_color import COLOR_NAMES
+
+# Index used in the colour ring for "unknown" (and anything not in COLOR_NAMES)
+UNKNOWN_COLOR = len(COLOR_NAMES)
+_COLOR_INDEX = {name: i for i, name in enumerate(COLOR_NAMES)}
+
+# A track not seen for this many processed frames is dropped
+TRACK_TTL_FRAMES = 30
+# Hard cap on tracks kept per stream; least recently seen go first
+MAX_TRACKS = 64
+
+# Colour is re-classified only when the ROI signature drifts by more than this
+# (mean absolute difference, 0-255 scale) or the box moves / resizes by more
+# than BOX_CHANGE_FRACTION of its size since the last classification
+SIGNATURE_DRIFT = 10.0
+BOX_CHANGE_FRACTION = 0.15
+
+
+class RingBuffer:
+    """Fixed-size numeric history backed by one preallocated array."""
+
+    __slots__ = ("values", "size", "_next")
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        self.values = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+        self._next = 0
+
+    def push(self, value) -> None:
+        self.values[self._next] = value
+        self._next = (self._next + 1) % len(self.values)
+        self.size = min(self.size + 1, len(self.values))
+
+    def view(self) -> np.ndarray:
+        return self.values[:self.size]
+
+    def mean(self) -> float:
+        return float(self.view().mean())
+
+    def mode(self) -> int:
+        return int(np.bincount(self.view()).argmax())
+
+
+class TrackState:
+    """Everything the detection worker remembers about one ByteTrack track."""
+
+    __slots__ = (
+        "box", "colors", "z", "color", "color_frame", "color_box", "signature", "last_seen",
+    )
+
+    def __init__(self, color_window: int, z_window: int):
+        self.box = None
+        self.colors = RingBuffer(color_window, dtype=np.int8)
+        self.z = RingBuffer(z_window, dtype=np.float32)
+        self.color = None            # last classified raw colour
+        self.color_frame = -(1 << 30)
+        self.color_box = None        # box and ROI signature at that classification
+        self.signature = None
+        self.last_seen = 0
+
+    def smooth_box(self, box, alpha=0.3):
+        if self.box is None:
+            self.box = list(box)
+            return self.box
+        self.box = [int(alpha * old + (1 - alpha) * new) for old, new in zip(self.box, box)]
+        return self.box
+
+    def color_is_stale(self, signature, box, frame_index: int, max_age: int) -> bool:
+        """True when the cached colour must be re-classified for this ROI."""
+        if self.color is None or self.signature is None or signature is None:
+            return True
+        if frame_index - self.color_frame >= max_age:
+            return True
+        if float(np.abs(signature - self.signature).mean()) > SIGNATURE_DRIFT:
+            return True
+
+        x1, y1, x2, y2 = box
+        ox1, oy1, ox2, oy2 = self.color_box
+        scale = max(ox2 - ox1, oy2 - oy1, 1) * BOX_CHANGE_FRACTION
+        return (
+            abs((x1 + x2) - (ox1 + ox2)) / 2 > scale
+            or abs((y1 + y2) - (oy1 + oy2)) / 2 > scale
+            or abs((x2 - x1) - (ox2 - ox1)) > scale
+            or abs((y2 - y1) - (oy2 - oy1)) > scale
+        )
+
+    def set_color(self, color: str, signature, box, frame_index: int) -> None:
+        self.color = color
+        self.color_frame = frame_index
+        self.signature = signature
+        self.color_box = tuple(box)
+
+    def push_color(self, color: str) -> str:
+        """Record one raw colour; returns the most frequent colour in the window."""
+        self.colors.push(_COLOR_INDEX.get(color, UNKNOWN_COLOR))
+        stable = self.colors.mode()
+        return COLOR_NAMES[stable] if stable < UNKNOWN_COLOR else "unknown"
+
+    def push_z(self, z: float) -> float:
+        """Record one distance estimate; returns the windowed mean."""
+        self.z.push(z)
+        return self.z.mean()
+
+
+class TrackStateStore:
+    """
+    Per-stream map of track ID -> TrackState.
+
+    Tracks not seen for ttl_frames are evicted, and at most max_tracks are kept
+    (least recently seen dropped first), so state stays bounded over long
+    sessions and a new object never inherits another object's history.
+    """
+
+    def __init__(
+        self,
+        ttl_frames: int = TRACK_TTL_FRAMES,
+        max_tracks: int = MAX_TRACKS,
+        color_window: int = 10,
+        z_window: int = 8,
+    ):
+        self.ttl_frames = ttl_frames
+        self.max_tracks = max_tracks
+        self.color_window = color_window
+        self.z_window = z_window
+        self._tracks: OrderedDict[int, TrackState] = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def transient(self, frame_index: int) -> TrackState:
+        """
+        Fresh state for a box without a track ID. It is never stored, so no
+        smoothing or colour history carries over to the next frame's boxes.
+        """
+        state = TrackState(self.color_window, self.z_window)
+        state.last_seen = frame_index
+        return state
+
+    def get(self, track_id: int, frame_index: int) -> TrackState:
+        state = self._tracks.get(track_id)
+        if state is None:
+            state = TrackState(self.color_window, self.z_window)
+            self._tracks[track_id] = state
+            while len(self._tracks) > self.max_tracks:
+                self._tracks.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._tracks.move_to_end(track_id)
+        state.last_seen = frame_index
+        return state
+
+    def evict_stale(self, frame_index: int) -> int:
+        # Ordered by last access, so stale tracks are all at the front
+        dropped = 0
+        while self._tracks:
+            track_id, state = next(iter(self._tracks.items()))
+            if frame_index - state.last_seen <= self.ttl_frames:
+                break
+            del self._tracks[track_id]
+            dropped += 1
+        self.evicted += dropped
+        return dropped
+
+    def clear(self) -> None:
+        self._tracks.clear()
+
+    def stats(self) -> dict:
+        return {"tracks": len(self._tracks), "evicted": self.evicted}
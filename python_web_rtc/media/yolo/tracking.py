@@ -15,3 +15,34 @@ def estimate_distance(area):
 
     z = 1-((area - MIN_AREA) / (MAX_AREA - MIN_AREA))
     return clamp(z, 0 ,1)
+
+
+def create_tracker(tracker_cfg: str = "bytetrack.yaml", frame_rate: int = 30):
+    """Build a standalone ByteTrack instance, as model.track(persist=True) would."""
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace
+    from ultralytics.utils.checks import check_yaml
+
+    try:
+        from ultralytics.utils import YAML
+
+        cfg = YAML.load(check_yaml(tracker_cfg))
+    except ImportError:
+        from ultralytics.utils import yaml_load
+
+        cfg = yaml_load(check_yaml(tracker_cfg))
+    return BYTETracker(args=IterableSimpleNamespace(**cfg), frame_rate=frame_rate)
+
+
+def apply_tracker(tracker, result, frame):
+    """Same post-processing as ultralytics' on_predict_postprocess_end, for one stream."""
+    import torch
+
+    det = result.boxes.cpu().numpy()
+    tracks = tracker.update(det, frame)
+    if len(tracks) == 0:
+        return result
+    idx = tracks[:, -1].astype(int)
+    result = result[idx]
+    result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+    return result
@@ -1,49 +1,50 @@
+import os
 import cv2
 import numpy as np
 from threading import Thread
 from queue import Queue, Empty
 from core.interface import frameProcessor
+from core.device_manager import lease_arm
+from core.serial_service import open_serial_port
 from media.yolo.tracking import norm_to_angle, estimate_distance
 
 # ------------------------- ROBOT CONTROLLER -------------------------
+# Print every command sent (off by default: it runs in the frame path)
+VERBOSE = os.environ.get("ROBOT_CONTROL_VERBOSE", "").lower() in ("1", "true", "yes")
+# Arm (see SERIAL_ARMS in core/device_manager.py) driven by the tracking processors
+ROBOT_ARM = os.environ.get("ROBOT_ARM", "1")
+
+
 class RobotController:
-    """Handles sending servo commands to Arduino/ESP32."""
-    
-    def __init__(self, serial_port="COM8", baudrate=115200):
-        self.ser = None
-        try:
-            import serial
-            self.ser = serial.Serial(serial_port, baudrate, timeout=1)
-            import time
-            time.sleep(2)
-            print("🟢 Serial connected to Arduino/ESP32")
-        except Exception:
-            print("⚠ WARNING: Could not open serial port")
-            self.ser = None
+    """Sends servo commands to Arduino/ESP32 through the shared serial writer."""
+
+    def __init__(self, serial_port=None, baudrate=None, arm=ROBOT_ARM):
+        # Opening happens on the port's writer thread; this never blocks.
+        # Without an explicit port the arm's shared connection is leased.
+        # servo_arm.ino answers the binary protocol probe.
+        if serial_port:
+            self.port = open_serial_port(serial_port, baudrate or 115200, negotiate=True)
+        else:
+            self.port = lease_arm(arm, baudrate, negotiate=True)
+
+    @property
+    def connected(self) -> bool:
+        return self.port is not None and self.port.connected
 
     def send_state(self, x: int, y: int, z: float):
-        grip_state = "CLOSE" if z < 0.10 else "OPEN"
         msg = f"X:{x},Y:{y},Z:{z:.2f}\n"
 
-        print("\n" + "="*60)
-        print("🤖 ROBOT COMMAND")
-        print(f"Base (X)        : {x}")
-        print(f"Shoulder (Y)    : {y}")
-        print(f"Distance (Z)    : {z:.2f}")
-        print(f"Gripper         : {grip_state}")
-        print(f"Serial Message  : {msg.strip()}")
-        print("="*60)
-
-        if self.ser is None:
-            print("[NO SERIAL] Skipping send")
+        if VERBOSE:
+            grip_state = "CLOSE" if z < 0.10 else "OPEN"
+            print(f"🤖 ROBOT COMMAND {msg.strip()} (gripper {grip_state})")
+
+        if self.port is None:
             return
 
-        try:
-            self.ser.write(msg.encode())
-        except Exception as e:
-            print("❌ Serial error:", e)
+        # Latest-wins: an unsent older state is replaced, never queued behind
+        self.port.send(msg.encode(), key="state")
 
     def close(self):
-        if self.ser:
-            self.ser.close()
-            print("🔴 Serial connection closed")
\ No newline at end of file
+        if self.port is not None:
+            self.port.release()
+            self.port = None
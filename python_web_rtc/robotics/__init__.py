@@ -1,13 +1,23 @@
 """6-DOF robotics pipeline: detection geometry, IK interface, and motion planning."""
 
-from robotics.camera_geometry import normalized_depth_to_meters, pixel_to_camera
+from robotics.camera_geometry import (
+    normalized_depth_to_meters,
+    normalized_depths_to_meters,
+    pixel_to_camera,
+    pixels_to_camera,
+)
 from robotics.config import (
+    ArmConfig,
+    BoardConfig,
     CameraIntrinsics,
     DepthConfig,
     GraspOrientationConfig,
+    KinematicsConfig,
     MotionPlannerConfig,
     PipelineConfig,
     RoboticsConfig,
+    ServoConfig,
+    TrajectoryConfig,
 )
 from robotics.coordinate_transform import CoordinateTransformer
 from robotics.ik_solver import IKSolver, UnconfiguredIKSolver
@@ -22,8 +32,14 @@ from robotics.pipeline import DetectionRoboticsBridge, RoboticsPipeline, TargetS
 from robotics.pose import JointAngles, Point3D, Pose
 from robotics.pose_generator import DetectedObject, GraspPoseGenerator
 from robotics.robot_controller import NullRobotController, RobotController
+from robotics.serial_controller import SerialRobotController
+from robotics.servo_arm_ik import ServoArmIKSolver, ServoArmKinematics, UnreachablePoseError
+from robotics.trajectory import JointTrajectory, TrajectoryGenerator
+from robotics.visual_servo import ServoPhase, VisualServoController
 
 __all__ = [
+    "ArmConfig",
+    "BoardConfig",
     "CameraIntrinsics",
     "CoordinateTransformer",
     "DepthConfig",
@@ -33,6 +49,8 @@ __all__ = [
     "GraspPoseGenerator",
     "IKSolver",
     "JointAngles",
+    "JointTrajectory",
+    "KinematicsConfig",
     "MotionPhase",
     "MotionPlanner",
     "MotionPlannerConfig",
@@ -44,12 +62,23 @@ __all__ = [
     "RoboticsConfig",
     "RoboticsPipeline",
     "RobotController",
+    "SerialRobotController",
+    "ServoArmIKSolver",
+    "ServoArmKinematics",
+    "ServoConfig",
+    "ServoPhase",
     "TargetSelector",
+    "TrajectoryConfig",
+    "TrajectoryGenerator",
     "UnconfiguredIKSolver",
+    "UnreachablePoseError",
+    "VisualServoController",
     "configure_logging",
     "create_detection_bridge",
     "create_robotics_pipeline",
     "normalized_depth_to_meters",
+    "normalized_depths_to_meters",
     "pixel_to_camera",
+    "pixels_to_camera",
     "start_robotics_bridge",
 ]
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import logging
 
+import numpy as np
+
 from robotics.config import CameraIntrinsics, DepthConfig
 from robotics.pose import Point3D
 
@@ -47,6 +49,36 @@ def pixel_to_camera(
     return point
 
 
+def pixels_to_camera(
+    pixels: np.ndarray,
+    depths_m: np.ndarray,
+    inverse_intrinsics: np.ndarray,
+) -> np.ndarray:
+    """
+    Batch form of pixel_to_camera: (N, 2) pixels and (N,) metric depths to
+    (N, 3) camera-frame points.
+
+    Each point is Z * K^-1 [u, v, 1]^T, so the whole batch is one matrix
+    multiply. Pass inverse_intrinsics = intrinsics.inverse_matrix(), computed
+    once by the caller. Non-positive depths produce NaN rows instead of raising.
+    """
+    pixels = np.asarray(pixels, dtype=np.float64).reshape(-1, 2)
+    depths = np.asarray(depths_m, dtype=np.float64).reshape(-1)
+    if len(depths) != len(pixels):
+        raise ValueError(f"Got {len(pixels)} pixels but {len(depths)} depths")
+
+    rays = pixels @ inverse_intrinsics[:, :2].T + inverse_intrinsics[:, 2]
+    points = rays * depths[:, None]
+    points[depths <= 0.0] = np.nan
+    return points
+
+
 def normalized_depth_to_meters(z_normalized: float, depth_config: DepthConfig) -> float:
     """Map API normalized depth [0, 1] to metric depth for pinhole projection."""
     return depth_config.normalized_to_meters(z_normalized)
+
+
+def normalized_depths_to_meters(z_normalized: np.ndarray, depth_config: DepthConfig) -> np.ndarray:
+    """Vectorized normalized_depth_to_meters for an (N,) array."""
+    z = np.clip(np.asarray(z_normalized, dtype=np.float64), 0.0, 1.0)
+    return depth_config.z_near_m + z * (depth_config.z_far_m - depth_config.z_near_m)
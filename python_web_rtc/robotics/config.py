@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any
 
@@ -31,6 +31,17 @@ class CameraIntrinsics:
             dtype=np.float64,
         )
 
+    def inverse_matrix(self) -> np.ndarray:
+        """Return K^-1, mapping homogeneous pixels to unit-depth camera rays."""
+        return np.array(
+            [
+                [1.0 / self.fx, 0.0, -self.cx / self.fx],
+                [0.0, 1.0 / self.fy, -self.cy / self.fy],
+                [0.0, 0.0, 1.0],
+            ],
+            dtype=np.float64,
+        )
+
 
 @dataclass(frozen=True)
 class DepthConfig:
@@ -76,6 +87,106 @@ class PipelineConfig:
     enabled: bool = False
 
 
+@dataclass(frozen=True)
+class ServoConfig:
+    """Closed-loop visual servoing (streamed joint setpoints instead of timed steps)."""
+
+    enabled: bool = False
+    control_rate_hz: float = 30.0
+    max_joint_speed_deg_s: float = 90.0
+    # Per-tick blend toward the newest re-projected target (1.0 = jump straight to it)
+    goal_smoothing: float = 0.5
+    # Joint error (degrees) under which a phase counts as reached
+    joint_tolerance_deg: float = 1.0
+    # Goal must move less than this between detections before descending
+    settle_tolerance_m: float = 0.005
+    lost_target_timeout_s: float = 1.0
+    # Start position of servo_arm2.ino: base, shoulder, elbow, wrist, wrist rot, gripper
+    home_joints_deg: tuple[float, ...] = (90.0, 140.0, 180.0, 0.0, 90.0, 10.0)
+
+
+@dataclass(frozen=True)
+class TrajectoryConfig:
+    """
+    Time-parameterized pick motion: one joint trajectory through every phase,
+    limited by joint speed and acceleration, instead of timed step_delay_s waits.
+    """
+
+    enabled: bool = False
+    sample_rate_hz: float = 50.0
+    max_joint_speed_deg_s: float = 90.0
+    max_joint_accel_deg_s2: float = 360.0
+    # Hold at GRASP so the fingers close on the object before lifting
+    grasp_dwell_s: float = 0.2
+    # Points per streamed chunk (the firmware accepts at most 10)
+    chunk_points: int = 10
+
+
+@dataclass(frozen=True)
+class ArmConfig:
+    """
+    Serial link to the arm firmware (servo_arm.ino): a fixed port, or an arm
+    id from SERIAL_ARMS (core/device_manager.py) to share that arm's
+    connection. Neither keeps the logging controller.
+    """
+
+    port: str = ""
+    baudrate: int = 115200
+    arm_id: str = ""
+
+
+@dataclass(frozen=True)
+class KinematicsConfig:
+    """
+    Servo arm geometry for the IK solver (servo_arm2.ino joint layout).
+
+    Joints j1-j5 are base yaw, shoulder, elbow and wrist pitch, and wrist roll;
+    j6 is the gripper. Kinematic angle = (servo angle - offset) * direction.
+    Measure the links and calibrate the offsets on the real arm.
+    """
+
+    base_height_m: float = 0.075
+    upper_arm_m: float = 0.105
+    forearm_m: float = 0.100
+    # Wrist pitch axis to the grasp point between the gripper fingers
+    tool_length_m: float = 0.150
+    servo_offsets_deg: tuple[float, ...] = (90.0, 0.0, 180.0, 90.0, 90.0)
+    servo_directions: tuple[float, ...] = (1.0, 1.0, 1.0, 1.0, 1.0)
+    joint_min_deg: float = 0.0
+    joint_max_deg: float = 180.0
+    # Step gain of the secondary orientation task (0 = position only); the
+    # 5-axis arm cannot match every orientation, so orientation is best effort
+    orientation_gain: float = 0.5
+    damping: float = 0.02
+    max_iterations: int = 60
+    position_tolerance_m: float = 0.001
+    cache_size: int = 512
+    cache_position_quantum_m: float = 0.0005
+    cache_angle_quantum_deg: float = 0.5
+
+
+@dataclass(frozen=True)
+class BoardConfig:
+    """
+    Work board layout (as in media/yolo/mixeg_grid_pi.py) and its placement in
+    the robot-base frame, used for the precomputed reachability / IK table.
+    """
+
+    width_cm: float = 80.0
+    height_cm: float = 80.0
+    cell_width_cm: float = 7.0
+    cell_height_cm: float = 5.0
+    # Robot-frame position of the board's (0, 0) corner and its surface height
+    origin_m: tuple[float, ...] = (0.10, 0.40, 0.0)
+    # Angle of the board's x axis from the robot's x axis (-90: board rows run
+    # away from the arm along robot +x)
+    yaw_deg: float = -90.0
+    # Spacing of the tabulated IK nodes
+    resolution_m: float = 0.02
+    # Table written by `python -m robotics.reachability`; unused when missing
+    ik_table_path: str = "robotics/ik_table.npy"
+
+
 @dataclass
 class RoboticsConfig:
     """Root configuration object for the robotics stack."""
@@ -87,6 +198,11 @@ class RoboticsConfig:
     grasp_orientation: GraspOrientationConfig = field(default_factory=GraspOrientationConfig)
     motion: MotionPlannerConfig = field(default_factory=MotionPlannerConfig)
     pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    servo: ServoConfig = field(default_factory=ServoConfig)
+    kinematics: KinematicsConfig = field(default_factory=KinematicsConfig)
+    board: BoardConfig = field(default_factory=BoardConfig)
+    trajectory: TrajectoryConfig = field(default_factory=TrajectoryConfig)
+    arm: ArmConfig = field(default_factory=ArmConfig)
     # 4x4 homogeneous transform: maps camera-frame points into robot-base frame.
     camera_to_robot_transform: np.ndarray = field(
         default_factory=lambda: np.eye(4, dtype=np.float64)
@@ -97,6 +213,16 @@ class RoboticsConfig:
         if matrix.shape != (4, 4):
             raise ValueError("camera_to_robot_transform must be 4x4")
         self.camera_to_robot_transform = matrix
+        if len(self.servo.home_joints_deg) != 6:
+            raise ValueError("servo.home_joints_deg must have 6 joint angles")
+        if len(self.kinematics.servo_offsets_deg) != 5 or len(self.kinematics.servo_directions) != 5:
+            raise ValueError("kinematics servo_offsets_deg / servo_directions need 5 values (j1-j5)")
+        if len(self.board.origin_m) != 3:
+            raise ValueError("board.origin_m must be an (x, y, z) position")
+        if self.trajectory.sample_rate_hz <= 0 or self.trajectory.max_joint_speed_deg_s <= 0:
+            raise ValueError("trajectory sample_rate_hz / max_joint_speed_deg_s must be positive")
+        if self.trajectory.max_joint_accel_deg_s2 <= 0:
+            raise ValueError("trajectory.max_joint_accel_deg_s2 must be positive")
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> RoboticsConfig:
@@ -105,6 +231,11 @@ class RoboticsConfig:
         grasp_data = data.get("grasp_orientation", {})
         motion_data = data.get("motion", {})
         pipeline_data = data.get("pipeline", {})
+        servo_data = data.get("servo", {})
+        kinematics_data = data.get("kinematics", {})
+        board_data = data.get("board", {})
+        trajectory_data = data.get("trajectory", {})
+        arm_data = data.get("arm", {})
 
         transform = data.get("camera_to_robot_transform")
         if transform is None:
@@ -147,6 +278,75 @@ class RoboticsConfig:
                 cooldown_after_pick_s=float(pipeline_data.get("cooldown_after_pick_s", 3.0)),
                 enabled=bool(pipeline_data.get("enabled", False)),
             ),
+            servo=ServoConfig(
+                enabled=bool(servo_data.get("enabled", False)),
+                control_rate_hz=float(servo_data.get("control_rate_hz", 30.0)),
+                max_joint_speed_deg_s=float(servo_data.get("max_joint_speed_deg_s", 90.0)),
+                goal_smoothing=float(servo_data.get("goal_smoothing", 0.5)),
+                joint_tolerance_deg=float(servo_data.get("joint_tolerance_deg", 1.0)),
+                settle_tolerance_m=float(servo_data.get("settle_tolerance_m", 0.005)),
+                lost_target_timeout_s=float(servo_data.get("lost_target_timeout_s", 1.0)),
+                home_joints_deg=tuple(
+                    float(angle)
+                    for angle in servo_data.get(
+                        "home_joints_deg", (90.0, 140.0, 180.0, 0.0, 90.0, 10.0)
+                    )
+                ),
+            ),
+            kinematics=KinematicsConfig(
+                base_height_m=float(kinematics_data.get("base_height_m", 0.075)),
+                upper_arm_m=float(kinematics_data.get("upper_arm_m", 0.105)),
+                forearm_m=float(kinematics_data.get("forearm_m", 0.100)),
+                tool_length_m=float(kinematics_data.get("tool_length_m", 0.150)),
+                servo_offsets_deg=tuple(
+                    float(angle)
+                    for angle in kinematics_data.get(
+                        "servo_offsets_deg", (90.0, 0.0, 180.0, 90.0, 90.0)
+                    )
+                ),
+                servo_directions=tuple(
+                    float(sign)
+                    for sign in kinematics_data.get("servo_directions", (1.0, 1.0, 1.0, 1.0, 1.0))
+                ),
+                joint_min_deg=float(kinematics_data.get("joint_min_deg", 0.0)),
+                joint_max_deg=float(kinematics_data.get("joint_max_deg", 180.0)),
+                orientation_gain=float(kinematics_data.get("orientation_gain", 0.5)),
+                damping=float(kinematics_data.get("damping", 0.02)),
+                max_iterations=int(kinematics_data.get("max_iterations", 60)),
+                position_tolerance_m=float(kinematics_data.get("position_tolerance_m", 0.001)),
+                cache_size=int(kinematics_data.get("cache_size", 512)),
+                cache_position_quantum_m=float(
+                    kinematics_data.get("cache_position_quantum_m", 0.0005)
+                ),
+                cache_angle_quantum_deg=float(kinematics_data.get("cache_angle_quantum_deg", 0.5)),
+            ),
+            board=BoardConfig(
+                width_cm=float(board_data.get("width_cm", 80.0)),
+                height_cm=float(board_data.get("height_cm", 80.0)),
+                cell_width_cm=float(board_data.get("cell_width_cm", 7.0)),
+                cell_height_cm=float(board_data.get("cell_height_cm", 5.0)),
+                origin_m=tuple(
+                    float(value) for value in board_data.get("origin_m", (0.10, 0.40, 0.0))
+                ),
+                yaw_deg=float(board_data.get("yaw_deg", -90.0)),
+                resolution_m=float(board_data.get("resolution_m", 0.02)),
+                ik_table_path=str(board_data.get("ik_table_path", "robotics/ik_table.npy")),
+            ),
+            trajectory=TrajectoryConfig(
+                enabled=bool(trajectory_data.get("enabled", False)),
+                sample_rate_hz=float(trajectory_data.get("sample_rate_hz", 50.0)),
+                max_joint_speed_deg_s=float(trajectory_data.get("max_joint_speed_deg_s", 90.0)),
+                max_joint_accel_deg_s2=float(
+                    trajectory_data.get("max_joint_accel_deg_s2", 360.0)
+                ),
+                grasp_dwell_s=float(trajectory_data.get("grasp_dwell_s", 0.2)),
+                chunk_points=int(trajectory_data.get("chunk_points", 10)),
+            ),
+            arm=ArmConfig(
+                port=str(arm_data.get("port", "")),
+                baudrate=int(arm_data.get("baudrate", 115200)),
+                arm_id=str(arm_data.get("arm_id", "")),
+            ),
             camera_to_robot_transform=transform_matrix,
         )
 
@@ -171,11 +371,27 @@ class RoboticsConfig:
             cooldown_after_pick_s=config.pipeline.cooldown_after_pick_s,
             enabled=enabled or config.pipeline.enabled,
         )
+        servo_mode = os.environ.get("ROBOTICS_SERVO", "").lower() in ("1", "true", "yes")
+        servo = replace(config.servo, enabled=servo_mode or config.servo.enabled)
+        trajectory_mode = os.environ.get("ROBOTICS_TRAJECTORY", "").lower() in ("1", "true", "yes")
+        trajectory = replace(
+            config.trajectory, enabled=trajectory_mode or config.trajectory.enabled
+        )
+        arm = replace(
+            config.arm,
+            port=os.environ.get("ROBOTICS_SERIAL_PORT", config.arm.port),
+            arm_id=os.environ.get("ROBOTICS_ARM", config.arm.arm_id),
+        )
         return RoboticsConfig(
             intrinsics=config.intrinsics,
             depth=config.depth,
             grasp_orientation=config.grasp_orientation,
             motion=config.motion,
             pipeline=pipeline,
+            servo=servo,
+            kinematics=config.kinematics,
+            board=config.board,
+            trajectory=trajectory,
+            arm=arm,
             camera_to_robot_transform=config.camera_to_robot_transform,
         )
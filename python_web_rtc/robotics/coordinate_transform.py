@@ -53,3 +53,8 @@ class CoordinateTransformer:
             robot_point.z,
         )
         return robot_point
+
+    def cameras_to_robot(self, camera_points: np.ndarray) -> np.ndarray:
+        """Batch form of camera_to_robot: (N, 3) camera points to (N, 3) robot points."""
+        points = np.asarray(camera_points, dtype=np.float64).reshape(-1, 3)
+        return points @ self._transform[:3, :3].T + self._transform[:3, 3]
@@ -7,11 +7,15 @@ from typing import Callable, Optional
 
 from robotics.config import RoboticsConfig
 from robotics.coordinate_transform import CoordinateTransformer
-from robotics.ik_solver import IKSolver, UnconfiguredIKSolver
+from robotics.ik_solver import IKSolver
 from robotics.motion_planner import MotionPlanner
-from robotics.pipeline import DetectionRoboticsBridge, RoboticsPipeline
+from robotics.pipeline import DetectionRoboticsBridge, DetectionUpdates, RoboticsPipeline
 from robotics.pose_generator import GraspPoseGenerator
 from robotics.robot_controller import NullRobotController, RobotController
+from robotics.pose import JointAngles
+from robotics.servo_arm_ik import ServoArmIKSolver
+from robotics.trajectory import TrajectoryGenerator
+from robotics.visual_servo import VisualServoController
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +26,39 @@ def _default_detection_source() -> list[dict]:
     return get_latest_detections()
 
 
+def _default_detection_updates(after_version: int, timeout: Optional[float] = None):
+    from media.yolo.detection_feed import detection_feed
+
+    return detection_feed.wait_snapshot(after_version, timeout)
+
+
+def _default_robot_controller(config: RoboticsConfig) -> RobotController:
+    if not (config.arm.port or config.arm.arm_id):
+        return NullRobotController()
+    from robotics.serial_controller import SerialRobotController
+
+    return SerialRobotController(
+        config.arm.port,
+        config.arm.baudrate,
+        chunk_points=config.trajectory.chunk_points,
+        arm_id=config.arm.arm_id,
+    )
+
+
 def create_robotics_pipeline(
     config: Optional[RoboticsConfig] = None,
     ik_solver: Optional[IKSolver] = None,
     robot_controller: Optional[RobotController] = None,
 ) -> RoboticsPipeline:
+    from robotics.reachability import LookupIKSolver, ReachabilityTable
+
     config = config or RoboticsConfig.from_env()
-    ik_solver = ik_solver or UnconfiguredIKSolver()
-    robot = robot_controller or NullRobotController()
+    reachability = ReachabilityTable.load(config.board.ik_table_path, config)
+    if ik_solver is None:
+        ik_solver = ServoArmIKSolver(config.kinematics)
+        if reachability is not None:
+            ik_solver = LookupIKSolver(reachability, fallback=ik_solver)
+    robot = robot_controller or _default_robot_controller(config)
     robot.bind_ik_solver(ik_solver)
 
     coordinate_transformer = CoordinateTransformer(config.camera_to_robot_transform)
@@ -38,6 +67,9 @@ def create_robotics_pipeline(
         robot=robot,
         ik_solver=ik_solver,
         config=config.motion,
+        trajectory=TrajectoryGenerator(config.trajectory) if config.trajectory.enabled else None,
+        home_joints=JointAngles(*config.servo.home_joints_deg),
+        grasp_dwell_s=config.trajectory.grasp_dwell_s,
     )
 
     return RoboticsPipeline(
@@ -46,6 +78,7 @@ def create_robotics_pipeline(
         motion_planner=motion_planner,
         pose_generator=pose_generator,
         coordinate_transformer=coordinate_transformer,
+        reachability=reachability,
     )
 
 
@@ -54,18 +87,38 @@ def create_detection_bridge(
     ik_solver: Optional[IKSolver] = None,
     robot_controller: Optional[RobotController] = None,
     detection_source: Optional[Callable[[], list[dict]]] = None,
+    detection_updates: Optional[DetectionUpdates] = None,
 ) -> DetectionRoboticsBridge:
+    """
+    Build the bridge. Without an explicit detection_source it subscribes to the
+    in-process detection feed (push); a custom detection_source is polled.
+
+    With config.servo.enabled (or ROBOTICS_SERVO=1) picks run as a closed-loop
+    visual servo instead of timed open-loop sequences.
+    """
     config = config or RoboticsConfig.from_env()
     pipeline = create_robotics_pipeline(
         config=config,
         ik_solver=ik_solver,
         robot_controller=robot_controller,
     )
-    source = detection_source or _default_detection_source
+    if detection_source is None and detection_updates is None:
+        detection_updates = _default_detection_updates
+
+    servo = None
+    if config.servo.enabled:
+        servo = VisualServoController(
+            pipeline=pipeline,
+            ik_solver=pipeline.ik_solver,
+            motion_config=config.motion,
+            servo_config=config.servo,
+        )
     return DetectionRoboticsBridge(
         pipeline=pipeline,
-        detection_source=source,
+        detection_source=detection_source or _default_detection_source,
         config=config,
+        detection_updates=detection_updates,
+        servo=servo,
     )
 
 
@@ -74,12 +127,14 @@ def start_robotics_bridge(
     ik_solver: Optional[IKSolver] = None,
     robot_controller: Optional[RobotController] = None,
     detection_source: Optional[Callable[[], list[dict]]] = None,
+    detection_updates: Optional[DetectionUpdates] = None,
 ) -> DetectionRoboticsBridge:
     bridge = create_detection_bridge(
         config=config,
         ik_solver=ik_solver,
         robot_controller=robot_controller,
         detection_source=detection_source,
+        detection_updates=detection_updates,
     )
     bridge.start()
     return bridge
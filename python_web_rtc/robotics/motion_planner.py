@@ -6,11 +6,13 @@ import logging
 import time
 from dataclasses import dataclass
 from enum import Enum, auto
+from typing import Optional
 
 from robotics.config import MotionPlannerConfig
 from robotics.ik_solver import IKSolver
 from robotics.pose import JointAngles, Pose
 from robotics.robot_controller import RobotController
+from robotics.trajectory import JointTrajectory, TrajectoryGenerator
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,10 @@ class MotionPlanner:
     Plans and executes a vertical pick sequence:
 
         Home -> Above object -> Down -> Close gripper -> Up
+
+    With a trajectory generator the whole sequence becomes one velocity- and
+    acceleration-limited joint trajectory, handed to the robot in one go, so
+    motion time is set by the arm's limits rather than step_delay_s.
     """
 
     def __init__(
@@ -42,10 +48,24 @@ class MotionPlanner:
         robot: RobotController,
         ik_solver: IKSolver,
         config: MotionPlannerConfig,
+        trajectory: Optional[TrajectoryGenerator] = None,
+        home_joints: Optional[JointAngles] = None,
+        grasp_dwell_s: float = 0.0,
     ) -> None:
         self._robot = robot
         self._ik = ik_solver
         self._config = config
+        self._trajectory = trajectory
+        self._home_joints = home_joints
+        self._grasp_dwell_s = grasp_dwell_s
+        # Where the last trajectory left the arm; None = assume home
+        self._last_joints: Optional[JointAngles] = None
+        # Set when a trajectory was cut short: the arm is somewhere unknown
+        self._position_lost = False
+
+    @property
+    def ik_solver(self) -> IKSolver:
+        return self._ik
 
     def plan_pick_sequence(self, grasp_pose: Pose) -> list[MotionStep]:
         approach_z = grasp_pose.z + self._config.approach_height_m
@@ -72,12 +92,33 @@ class MotionPlanner:
             ),
         ]
 
+    def plan_pick_trajectory(self, grasp_pose: Pose, start: JointAngles) -> JointTrajectory:
+        """The pick sequence as one joint trajectory starting at start."""
+        if self._trajectory is None:
+            raise RuntimeError("plan_pick_trajectory requires a TrajectoryGenerator")
+
+        waypoints = []
+        if self._config.move_home_before_pick and self._home_joints is not None:
+            waypoints.append((MotionPhase.HOME.name, self._home_joints))
+        for step in self.plan_pick_sequence(grasp_pose):
+            if step.phase == MotionPhase.HOME:
+                continue
+            waypoints.append((step.phase.name, self._phase_joints(step)))
+
+        return self._trajectory.plan(
+            start, waypoints, dwell_s={MotionPhase.GRASP.name: self._grasp_dwell_s}
+        )
+
     def execute_pick(self, grasp_pose: Pose) -> None:
         """
         Run the pick sequence (blocking).
 
         Must be called from the robotics worker thread, never from the YOLO thread.
         """
+        if self._trajectory is not None:
+            self._execute_trajectory(grasp_pose)
+            return
+
         steps = self.plan_pick_sequence(grasp_pose)
         logger.info("Starting pick sequence with %d steps", len(steps))
 
@@ -91,18 +132,62 @@ class MotionPlanner:
                 continue
 
             logger.info("Phase %s -> pose (%.3f, %.3f, %.3f)", step.phase.name, step.target_pose.x, step.target_pose.y, step.target_pose.z)
-            joints = self._ik.solve(step.target_pose)
-
-            if step.phase == MotionPhase.GRASP:
-                joints = joints.with_gripper(self._config.gripper_close_angle_deg)
-            else:
-                joints = joints.with_gripper(self._config.gripper_open_angle_deg)
-
-            self._robot.move_joints(joints)
+            self._robot.move_joints(self._phase_joints(step))
             self._wait()
 
         logger.info("Pick sequence complete")
 
+    def _execute_trajectory(self, grasp_pose: Pose) -> None:
+        start = self._trajectory_start()
+        trajectory = self.plan_pick_trajectory(grasp_pose, start)
+        phases = ", ".join(
+            f"{phase}@{index * trajectory.period_s:.2f}s"
+            for phase, index in trajectory.phase_starts
+        )
+        logger.info(
+            "Starting pick trajectory: %d points, %.2f s (%s)",
+            len(trajectory.points),
+            trajectory.duration_s,
+            phases,
+        )
+        if self._robot.execute_trajectory(trajectory):
+            self._last_joints = trajectory.final()
+            self._position_lost = False
+            logger.info("Pick trajectory complete")
+        else:
+            self._last_joints = None
+            self._position_lost = True
+            logger.warning("Pick trajectory interrupted")
+
+    def _trajectory_start(self) -> JointAngles:
+        """Where the arm is now, so the first streamed point does not jump."""
+        if not self._position_lost:
+            start = self._last_joints or self._home_joints
+            if start is None:
+                raise RuntimeError("Trajectory mode needs home_joints for the first pick")
+            return start
+
+        # Cut short last time: trust the arm's own report of where it stopped
+        measured = self._robot.measured_joints()
+        if measured is not None:
+            logger.info("Resuming from reported joints after interrupted trajectory")
+            self._position_lost = False
+            return measured
+        if self._home_joints is None:
+            raise RuntimeError("Arm position unknown and no home_joints to return to")
+        # No feedback: park the arm at home before planning from there
+        logger.info("Arm position unknown; homing before the next trajectory")
+        self._robot.home()
+        self._wait()
+        self._position_lost = False
+        return self._home_joints
+
+    def _phase_joints(self, step: MotionStep) -> JointAngles:
+        joints = self._ik.solve(step.target_pose)
+        if step.phase == MotionPhase.GRASP:
+            return joints.with_gripper(self._config.gripper_close_angle_deg)
+        return joints.with_gripper(self._config.gripper_open_angle_deg)
+
     def _wait(self) -> None:
         if self._config.step_delay_s > 0:
             time.sleep(self._config.step_delay_s)
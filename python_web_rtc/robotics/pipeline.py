@@ -6,14 +6,27 @@ import logging
 import queue
 import threading
 import time
-from typing import Callable, Optional, Protocol
+from typing import TYPE_CHECKING, Callable, Optional, Protocol
 
-from robotics.camera_geometry import normalized_depth_to_meters, pixel_to_camera
+import numpy as np
+
+from robotics.camera_geometry import (
+    normalized_depth_to_meters,
+    normalized_depths_to_meters,
+    pixel_to_camera,
+)
 from robotics.config import RoboticsConfig
 from robotics.coordinate_transform import CoordinateTransformer
+from robotics.ik_solver import IKSolver
 from robotics.motion_planner import MotionPlanner
+from robotics.pose import Point3D, Pose
 from robotics.pose_generator import DetectedObject, GraspPoseGenerator
 from robotics.robot_controller import RobotController
+from robotics.servo_arm_ik import UnreachablePoseError
+
+if TYPE_CHECKING:
+    from robotics.reachability import ReachabilityTable
+    from robotics.visual_servo import VisualServoController
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +36,52 @@ class DetectionSource(Protocol):
         """Return the latest detection dictionaries."""
 
 
+class DetectionUpdates(Protocol):
+    def __call__(
+        self, after_version: int, timeout: Optional[float] = None
+    ) -> Optional[tuple[int, list[dict]]]:
+        """Block until detections differ from after_version; return (version, detections)."""
+
+
 class TargetSelector:
-    """Selects the best detection for manipulation."""
+    """
+    Selects the best detection for manipulation.
+
+    With locate, every detection is projected into the robot frame in one
+    batch per frame; a reachable mask over those positions then rejects
+    detections the arm cannot reach up front instead of failing in IK
+    mid-sequence.
+    """
 
-    def __init__(self, min_confidence: float) -> None:
+    def __init__(
+        self,
+        min_confidence: float,
+        locate: Optional[Callable[[list[DetectedObject]], np.ndarray]] = None,
+        reachable: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ) -> None:
         self._min_confidence = min_confidence
+        self._locate = locate
+        self._reachable = reachable
+
+    def score(self, detections: list[DetectedObject]) -> np.ndarray:
+        """Per-detection score (its confidence); -inf where it cannot be picked."""
+        scores = np.array([d.confidence for d in detections], dtype=np.float64)
+        scores[scores < self._min_confidence] = -np.inf
+        if self._locate is not None and len(detections) > 0:
+            positions = self._locate(detections)
+            scores[~np.isfinite(positions).all(axis=1)] = -np.inf
+            if self._reachable is not None:
+                scores[~self._reachable(positions)] = -np.inf
+        return scores
 
     def choose_target(self, detections: list[DetectedObject]) -> Optional[DetectedObject]:
-        eligible = [d for d in detections if d.confidence >= self._min_confidence]
-        if not eligible:
+        if not detections:
+            return None
+        scores = self.score(detections)
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
             return None
-        return max(eligible, key=lambda item: item.confidence)
+        return detections[best]
 
 
 class RoboticsPipeline:
@@ -51,18 +99,60 @@ class RoboticsPipeline:
         motion_planner: MotionPlanner,
         pose_generator: GraspPoseGenerator,
         coordinate_transformer: CoordinateTransformer,
+        reachability: Optional[ReachabilityTable] = None,
     ) -> None:
         self._config = config
         self._robot = robot
         self._motion_planner = motion_planner
         self._pose_generator = pose_generator
         self._coordinate_transformer = coordinate_transformer
-        self._target_selector = TargetSelector(config.pipeline.min_confidence)
+        self._reachability = reachability
+
+        # pixel (u, v) at depth Z -> robot frame is Z * (R K^-1) [u, v, 1]^T + t
+        transform = coordinate_transformer.transform
+        self._pixel_to_robot = transform[:3, :3] @ config.intrinsics.inverse_matrix()
+        self._robot_offset = transform[:3, 3]
+
+        self._target_selector = TargetSelector(
+            config.pipeline.min_confidence,
+            locate=self.locate_many,
+            reachable=reachability.reachable_mask if reachability is not None else None,
+        )
 
     @property
     def robot(self) -> RobotController:
         return self._robot
 
+    @property
+    def target_selector(self) -> TargetSelector:
+        return self._target_selector
+
+    @property
+    def ik_solver(self) -> IKSolver:
+        return self._motion_planner.ik_solver
+
+    def locate(self, target: DetectedObject) -> Point3D:
+        """Project a detection into the robot-base frame."""
+        depth_m = normalized_depth_to_meters(target.z, self._config.depth)
+        camera_point = pixel_to_camera(
+            u=float(target.x),
+            v=float(target.y),
+            depth_m=depth_m,
+            intrinsics=self._config.intrinsics,
+        )
+        return self._coordinate_transformer.camera_to_robot(camera_point)
+
+    def locate_many(self, targets: list[DetectedObject]) -> np.ndarray:
+        """Project detections into the robot-base frame as an (N, 3) array."""
+        if not targets:
+            return np.empty((0, 3), dtype=np.float64)
+        pixels = np.array([(t.x, t.y, 1.0) for t in targets], dtype=np.float64)
+        depths = normalized_depths_to_meters([t.z for t in targets], self._config.depth)
+        return (pixels @ self._pixel_to_robot.T) * depths[:, None] + self._robot_offset
+
+    def grasp_pose_for(self, target: DetectedObject) -> Pose:
+        return self._pose_generator.generate_grasp_pose(self.locate(target))
+
     def process_detections(self, raw_detections: list[dict]) -> bool:
         """
         Process the latest detections and enqueue a pick if a valid target exists.
@@ -74,15 +164,7 @@ class RoboticsPipeline:
         if target is None:
             return False
 
-        depth_m = normalized_depth_to_meters(target.z, self._config.depth)
-        camera_point = pixel_to_camera(
-            u=float(target.x),
-            v=float(target.y),
-            depth_m=depth_m,
-            intrinsics=self._config.intrinsics,
-        )
-        robot_point = self._coordinate_transformer.camera_to_robot(camera_point)
-        grasp_pose = self._pose_generator.generate_grasp_pose(robot_point)
+        grasp_pose = self.grasp_pose_for(target)
 
         logger.info(
             "Target '%s' conf=%.2f pixel=(%d,%d) depth_norm=%.3f",
@@ -103,6 +185,12 @@ class DetectionRoboticsBridge:
     Two threads:
       - polling thread: reads detections, schedules work when idle
       - motion thread: executes pick sequences without blocking detection
+
+    With detection_updates the polling thread instead blocks until the
+    detections change, so it reacts within one frame and idles otherwise.
+
+    With a servo controller the motion thread runs its fixed-rate control loop
+    instead, and every detection update is handed to it as it arrives.
     """
 
     def __init__(
@@ -110,9 +198,14 @@ class DetectionRoboticsBridge:
         pipeline: RoboticsPipeline,
         detection_source: DetectionSource,
         config: RoboticsConfig,
+        detection_updates: Optional[DetectionUpdates] = None,
+        servo: Optional[VisualServoController] = None,
     ) -> None:
         self._pipeline = pipeline
+        self._servo = servo
         self._detection_source = detection_source
+        self._detection_updates = detection_updates
+        self._seen_version = 0
         self._config = config
         self._motion_queue: queue.Queue[Optional[dict]] = queue.Queue(maxsize=1)
         self._stop_event = threading.Event()
@@ -125,13 +218,17 @@ class DetectionRoboticsBridge:
         if self._poll_thread and self._poll_thread.is_alive():
             return
         self._stop_event.clear()
+        if self._servo is not None:
+            poll_target, motion_target = self._servo_feed_loop, self._servo_loop
+        else:
+            poll_target, motion_target = self._poll_loop, self._motion_loop
         self._poll_thread = threading.Thread(
-            target=self._poll_loop,
+            target=poll_target,
             name="robotics-detection-poll",
             daemon=True,
         )
         self._motion_thread = threading.Thread(
-            target=self._motion_loop,
+            target=motion_target,
             name="robotics-motion-worker",
             daemon=True,
         )
@@ -163,7 +260,14 @@ class DetectionRoboticsBridge:
                 time.sleep(self._config.pipeline.polling_interval_s)
                 continue
 
-            detections = self._detection_source()
+            if self._detection_updates is not None:
+                update = self._detection_updates(self._seen_version, timeout=0.5)
+                if update is None:
+                    continue
+                self._seen_version, detections = update
+            else:
+                detections = self._detection_source()
+
             if detections:
                 try:
                     self._motion_queue.put_nowait({"detections": detections})
@@ -171,7 +275,8 @@ class DetectionRoboticsBridge:
                 except queue.Full:
                     pass
 
-            time.sleep(self._config.pipeline.polling_interval_s)
+            if self._detection_updates is None:
+                time.sleep(self._config.pipeline.polling_interval_s)
 
     def _motion_loop(self) -> None:
         while not self._stop_event.is_set():
@@ -188,8 +293,33 @@ class DetectionRoboticsBridge:
                 self._last_pick_time = time.time()
             except NotImplementedError as exc:
                 logger.error("IK not configured: %s", exc)
+            except UnreachablePoseError as exc:
+                # Back off like after a pick instead of retrying every poll
+                logger.warning("Target skipped: %s", exc)
+                self._last_pick_time = time.time()
             except Exception:
                 logger.exception("Robotics motion failed")
             finally:
+                # Re-read the current detections after a pick even if unchanged
+                self._seen_version = 0
                 self._busy.clear()
                 self._motion_queue.task_done()
+
+    def _servo_feed_loop(self) -> None:
+        while not self._stop_event.is_set():
+            if self._detection_updates is not None:
+                update = self._detection_updates(self._seen_version, timeout=0.5)
+                if update is None:
+                    continue
+                self._seen_version, detections = update
+            else:
+                detections = self._detection_source()
+                time.sleep(self._config.pipeline.polling_interval_s)
+
+            self._servo.update_detections(detections)
+
+    def _servo_loop(self) -> None:
+        try:
+            self._servo.run(self._stop_event)
+        except Exception:
+            logger.exception("Visual servo loop failed")
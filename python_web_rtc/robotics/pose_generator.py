@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
+from typing import Optional
 
 from robotics.config import GraspOrientationConfig
 from robotics.pose import Point3D, Pose, degrees_to_radians
@@ -21,6 +22,8 @@ class DetectedObject:
     x: int
     y: int
     z: float
+    # ByteTrack track ID; stable while the same object stays in view
+    track_id: Optional[int] = None
 
     @classmethod
     def from_dict(cls, data: dict) -> DetectedObject:
@@ -31,6 +34,7 @@ class DetectedObject:
             x=int(data["x"]),
             y=int(data["y"]),
             z=float(data["z"]),
+            track_id=int(data["id"]) if data.get("id") is not None else None,
         )
 
 
@@ -0,0 +1,405 @@
+"""
+Precomputed reachability / IK lookup table over the work board.
+
+IK solutions are tabulated on a regular 3D grid (spacing board.resolution_m)
+over the board and the heights a pick moves through (grasp up to approach /
+retreat height), for the configured grasp orientation. The table is a float32
+.npy array of servo angles, (levels, rows, cols, 5), NaN where the arm cannot
+reach, with a JSON sidecar describing what it was built for. It is
+memory-mapped at load, so startup cost is independent of its size.
+
+LookupIKSolver serves poses from the table by trilinear interpolation between
+the surrounding nodes and falls back to the numeric solver elsewhere;
+TargetSelector uses reachable_mask() to reject targets before any motion.
+
+    python -m robotics.reachability --config robotics/robotics_config.example.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import asdict, replace
+from typing import Optional
+
+import numpy as np
+
+from robotics.config import BoardConfig, RoboticsConfig
+from robotics.ik_solver import IKSolver
+from robotics.pose import JointAngles, Point3D, Pose, degrees_to_radians
+from robotics.servo_arm_ik import HOME_JOINTS, ServoArmIKSolver, UnreachablePoseError
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSION = 1
+# Poses whose orientation differs from the table's by more than this use the fallback
+ORIENTATION_TOLERANCE_RAD = 1e-3
+# Heights within this of the outermost table levels still count as inside
+LEVEL_TOLERANCE_M = 1e-6
+
+
+def table_levels(config: RoboticsConfig) -> list[float]:
+    """
+    Tabulated tool heights: evenly spaced (about board.resolution_m apart) from
+    the lowest to the highest of the grasp, approach and retreat heights.
+    """
+    surface = config.board.origin_m[2]
+    motion = config.motion
+    heights = [
+        surface + motion.grasp_depth_offset_m,
+        surface + motion.approach_height_m,
+        surface + motion.retreat_height_m,
+    ]
+    low, high = min(heights), max(heights)
+    count = int(math.ceil((high - low) / config.board.resolution_m - 1e-9)) + 1
+    return [round(float(z), 6) for z in np.linspace(low, high, max(count, 1))]
+
+
+def table_orientation(config: RoboticsConfig) -> tuple[float, float, float]:
+    grasp = config.grasp_orientation
+    return (
+        degrees_to_radians(grasp.roll_deg),
+        degrees_to_radians(grasp.pitch_deg),
+        degrees_to_radians(grasp.yaw_deg),
+    )
+
+
+def table_fingerprint(config: RoboticsConfig) -> str:
+    """Hash of everything the tabulated solutions depend on."""
+    board = replace(config.board, ik_table_path="")
+    payload = repr(
+        (
+            TABLE_VERSION,
+            asdict(board),
+            asdict(config.kinematics),
+            table_levels(config),
+            table_orientation(config),
+        )
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _sidecar_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+class ReachabilityTable:
+    """Tabulated servo angles over the board, indexed by board position and height."""
+
+    def __init__(
+        self,
+        joints: np.ndarray,
+        levels: list[float],
+        board: BoardConfig,
+        orientation: tuple[float, float, float],
+    ) -> None:
+        if joints.ndim != 4 or joints.shape[1] < 2 or joints.shape[2] < 2 or joints.shape[3] != 5:
+            raise ValueError(f"IK table must be (levels, rows >= 2, cols >= 2, 5), got {joints.shape}")
+        if joints.shape[0] != len(levels):
+            raise ValueError("IK table level count does not match its heights")
+
+        self.joints = joints
+        self.levels = np.asarray(levels, dtype=np.float64)
+        self.board = board
+        self.orientation = orientation
+        self.resolution = board.resolution_m
+
+        self._origin = np.asarray(board.origin_m[:2], dtype=np.float64)
+        yaw = math.radians(board.yaw_deg)
+        # Columns: board x and y axes expressed in the robot frame
+        self._axes = np.array(
+            [[math.cos(yaw), -math.sin(yaw)], [math.sin(yaw), math.cos(yaw)]], dtype=np.float64
+        )
+        # Node usable at every height (a pick needs all of them)
+        self._column_valid = ~np.isnan(joints).any(axis=(0, 3))
+
+    @classmethod
+    def load(
+        cls, path: str, config: Optional[RoboticsConfig] = None
+    ) -> Optional[ReachabilityTable]:
+        """
+        Memory-map a table written by save(). Returns None when the file is
+        missing or was built for a different board, arm or pick geometry.
+        """
+        sidecar = _sidecar_path(path)
+        if not (os.path.isfile(path) and os.path.isfile(sidecar)):
+            return None
+
+        with open(sidecar, encoding="utf-8") as handle:
+            meta = json.load(handle)
+        if config is not None and meta.get("fingerprint") != table_fingerprint(config):
+            logger.warning(
+                "IK table %s was built for a different configuration; rebuild it with "
+                "`python -m robotics.reachability`",
+                path,
+            )
+            return None
+
+        joints = np.load(path, mmap_mode="r")
+        board = BoardConfig(**{**meta["board"], "origin_m": tuple(meta["board"]["origin_m"])})
+        table = cls(joints, meta["levels_m"], board, tuple(meta["orientation_rad"]))
+        logger.info(
+            "Loaded IK table %s: %d x %d nodes x %d heights, %.0f%% of the board reachable",
+            path,
+            joints.shape[2],
+            joints.shape[1],
+            joints.shape[0],
+            100.0 * table.reachable_fraction(),
+        )
+        return table
+
+    def save(self, path: str, fingerprint: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.save(path, np.asarray(self.joints, dtype=np.float32))
+        meta = {
+            "version": TABLE_VERSION,
+            "fingerprint": fingerprint,
+            "levels_m": self.levels.tolist(),
+            "orientation_rad": list(self.orientation),
+            "board": asdict(self.board),
+        }
+        with open(_sidecar_path(path), "w", encoding="utf-8") as handle:
+            json.dump(meta, handle, indent=2)
+
+    def board_to_robot(self, u: float, v: float) -> tuple[float, float]:
+        """Robot-frame x, y of board position (u, v) in metres."""
+        x, y = self._origin + self._axes @ np.array([u, v])
+        return float(x), float(y)
+
+    def robot_to_board(self, x: float, y: float) -> tuple[float, float]:
+        u, v = self._axes.T @ (np.array([x, y]) - self._origin)
+        return float(u), float(v)
+
+    def _stencil(self, x: float, y: float) -> Optional[tuple[int, int, float, float]]:
+        """Lower node indices and fractions of the grid cell containing (x, y)."""
+        u, v = self.robot_to_board(x, y)
+        fu, fv = u / self.resolution, v / self.resolution
+        rows, cols = self.joints.shape[1:3]
+        if not (0.0 <= fu <= cols - 1 and 0.0 <= fv <= rows - 1):
+            return None
+        i = min(int(fu), cols - 2)
+        j = min(int(fv), rows - 2)
+        return i, j, fu - i, fv - j
+
+    def lookup(self, x: float, y: float, z: float) -> Optional[np.ndarray]:
+        """
+        Servo angles (5,) in degrees for a tool position, interpolated from the
+        eight surrounding nodes; None if any of them is unreachable or the
+        position is off the board or outside the tabulated heights.
+        """
+        stencil = self._stencil(x, y)
+        if stencil is None:
+            return None
+        i, j, tu, tv = stencil
+
+        levels = self.levels
+        if not (levels[0] - LEVEL_TOLERANCE_M <= z <= levels[-1] + LEVEL_TOLERANCE_M):
+            return None
+        if len(levels) == 1:
+            k, tz = 0, 0.0
+            block = self.joints[0:1, j:j + 2, i:i + 2]
+        else:
+            k = int(min(max(np.searchsorted(levels, z) - 1, 0), len(levels) - 2))
+            tz = float(np.clip((z - levels[k]) / (levels[k + 1] - levels[k]), 0.0, 1.0))
+            block = self.joints[k:k + 2, j:j + 2, i:i + 2]
+
+        block = np.asarray(block, dtype=np.float64)
+        if np.isnan(block).any():
+            return None
+
+        wz = np.array([1.0 - tz, tz])[: len(block)]
+        wv = np.array([1.0 - tv, tv])
+        wu = np.array([1.0 - tu, tu])
+        return np.einsum("k,j,i,kjid->d", wz, wv, wu, block)
+
+    def is_reachable(self, point: Point3D) -> bool:
+        """True if the arm can work at this board position at every pick height."""
+        stencil = self._stencil(point.x, point.y)
+        if stencil is None:
+            return False
+        i, j, _, _ = stencil
+        return bool(self._column_valid[j:j + 2, i:i + 2].all())
+
+    def reachable_mask(self, points: np.ndarray) -> np.ndarray:
+        """is_reachable for an (N, 3) array of robot-frame points; returns (N,) bool."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        board = (points[:, :2] - self._origin) @ self._axes / self.resolution
+        rows, cols = self.joints.shape[1:3]
+        fu, fv = board[:, 0], board[:, 1]
+        # NaN rows (invalid depth) compare False and are rejected here
+        inside = (fu >= 0.0) & (fu <= cols - 1) & (fv >= 0.0) & (fv <= rows - 1)
+
+        i = np.clip(np.nan_to_num(fu), 0, cols - 2).astype(np.intp)
+        j = np.clip(np.nan_to_num(fv), 0, rows - 2).astype(np.intp)
+        valid = self._column_valid
+        return inside & valid[j, i] & valid[j, i + 1] & valid[j + 1, i] & valid[j + 1, i + 1]
+
+    def reachable_cells(self) -> np.ndarray:
+        """(rows, cols) bool map of board cells reachable over their whole area."""
+        board = self.board
+        cols = int(board.width_cm / board.cell_width_cm)
+        rows = int(board.height_cm / board.cell_height_cm)
+        cells = np.zeros((rows, cols), dtype=bool)
+        step = self.resolution * 100.0
+        for gy in range(rows):
+            j0 = int(math.floor(gy * board.cell_height_cm / step))
+            j1 = int(math.ceil((gy + 1) * board.cell_height_cm / step))
+            for gx in range(cols):
+                i0 = int(math.floor(gx * board.cell_width_cm / step))
+                i1 = int(math.ceil((gx + 1) * board.cell_width_cm / step))
+                cells[gy, gx] = self._column_valid[j0:j1 + 1, i0:i1 + 1].all()
+        return cells
+
+    def reachable_fraction(self) -> float:
+        return float(self._column_valid.mean())
+
+
+class LookupIKSolver(IKSolver):
+    """
+    IKSolver backed by a ReachabilityTable.
+
+    Poses in the table's orientation, on the board and within the tabulated
+    heights are interpolated from the table (tens of microseconds). With a
+    fallback ServoArmIKSolver each interpolated answer is checked with one
+    forward-kinematics call; if it misses by more than the solver's position
+    tolerance (near the edge of the workspace, where the solutions curve) it
+    seeds a numeric solve instead. Poses the table does not cover go straight
+    to the fallback.
+    """
+
+    def __init__(
+        self, table: ReachabilityTable, fallback: Optional[ServoArmIKSolver] = None
+    ) -> None:
+        self._table = table
+        self._fallback = fallback
+        self.table_hits = 0
+        self.refined = 0
+        self.fallbacks = 0
+
+    @property
+    def table(self) -> ReachabilityTable:
+        return self._table
+
+    def solve(self, target_pose: Pose) -> JointAngles:
+        roll, pitch, yaw = self._table.orientation
+        if (
+            abs(target_pose.roll - roll) <= ORIENTATION_TOLERANCE_RAD
+            and abs(target_pose.pitch - pitch) <= ORIENTATION_TOLERANCE_RAD
+            and abs(target_pose.yaw - yaw) <= ORIENTATION_TOLERANCE_RAD
+        ):
+            joints = self._table.lookup(target_pose.x, target_pose.y, target_pose.z)
+            if joints is not None:
+                solution = JointAngles(*(float(angle) for angle in joints), j6=HOME_JOINTS.j6)
+                if self._fallback is None or self._is_accurate(joints, target_pose):
+                    self.table_hits += 1
+                    return solution
+                self.refined += 1
+                return self._fallback.solve(target_pose, seed=solution)
+
+        if self._fallback is None:
+            raise UnreachablePoseError(
+                f"Pose ({target_pose.x:.3f}, {target_pose.y:.3f}, {target_pose.z:.3f}) "
+                "is not covered by the IK table"
+            )
+        self.fallbacks += 1
+        return self._fallback.solve(target_pose)
+
+    def _is_accurate(self, joints: np.ndarray, target_pose: Pose) -> bool:
+        position, _ = self._fallback.kinematics.forward(np.radians(joints)[None])
+        error = np.linalg.norm(position[0] - (target_pose.x, target_pose.y, target_pose.z))
+        return error <= self._fallback.kinematics.config.position_tolerance_m
+
+
+def build_ik_table(
+    config: RoboticsConfig, solver: Optional[ServoArmIKSolver] = None
+) -> ReachabilityTable:
+    """Solve IK at every board node and pick height (offline; can take minutes)."""
+    board = config.board
+    resolution = board.resolution_m
+    cols = int(round(board.width_cm / 100.0 / resolution)) + 1
+    rows = int(round(board.height_cm / 100.0 / resolution)) + 1
+    levels = table_levels(config)
+    orientation = table_orientation(config)
+
+    joints = np.full((len(levels), rows, cols, 5), np.nan, dtype=np.float32)
+    table = ReachabilityTable(joints, levels, board, orientation)
+    solver = solver or ServoArmIKSolver(replace(config.kinematics, cache_size=1))
+
+    kinematics = config.kinematics
+    max_reach = kinematics.upper_arm_m + kinematics.forearm_m + kinematics.tool_length_m
+    shoulder = np.array([0.0, 0.0, kinematics.base_height_m])
+
+    for k, z in enumerate(levels):
+        for j in range(rows):
+            # Serpentine order keeps every solve warm-started from its neighbour
+            order = range(cols) if j % 2 == 0 else range(cols - 1, -1, -1)
+            for i in order:
+                x, y = table.board_to_robot(i * resolution, j * resolution)
+                if np.linalg.norm(np.array([x, y, z]) - shoulder) > max_reach:
+                    continue
+                try:
+                    solution = solver.solve(Pose(x, y, z, *orientation))
+                except UnreachablePoseError:
+                    continue
+                joints[k, j, i] = solution.as_tuple()[:5]
+
+    # Fresh table so the reachability masks reflect the filled-in solutions
+    return ReachabilityTable(joints, levels, board, orientation)
+
+
+def interpolation_error(
+    table: ReachabilityTable, config: RoboticsConfig, samples: int = 500, seed: int = 0
+) -> Optional[float]:
+    """Largest position error (metres) of interpolated solutions at random reachable points."""
+    solver = ServoArmIKSolver(config.kinematics)
+    rng = np.random.default_rng(seed)
+    levels = table.levels
+    errors = []
+    for _ in range(samples):
+        u = rng.uniform(0.0, config.board.width_cm / 100.0)
+        v = rng.uniform(0.0, config.board.height_cm / 100.0)
+        z = rng.uniform(levels[0], levels[-1])
+        x, y = table.board_to_robot(u, v)
+        joints = table.lookup(x, y, z)
+        if joints is None:
+            continue
+        position, _ = solver.kinematics.forward(np.radians(joints)[None])
+        errors.append(float(np.linalg.norm(position[0] - (x, y, z))))
+    return max(errors) if errors else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", help="robotics JSON config (default: ROBOTICS_CONFIG_PATH / defaults)")
+    parser.add_argument("--out", help="table path (default: board.ik_table_path)")
+    args = parser.parse_args()
+
+    config = RoboticsConfig.from_file(args.config) if args.config else RoboticsConfig.from_env()
+    path = args.out or config.board.ik_table_path
+
+    started = time.perf_counter()
+    table = build_ik_table(config)
+    elapsed = time.perf_counter() - started
+    table.save(path, table_fingerprint(config))
+
+    levels, rows, cols, _ = table.joints.shape
+    print(f"IK table: {path} ({cols} x {rows} nodes x {levels} heights, {elapsed:.1f} s)")
+    print(f"Reachable at every pick height: {100.0 * table.reachable_fraction():.0f}% of nodes")
+    error = interpolation_error(table, config)
+    if error is not None:
+        print(f"Worst interpolation error: {error * 1000:.2f} mm")
+
+    print("Reachable cells (row = board y, # = reachable):")
+    for row in table.reachable_cells():
+        print("  " + "".join("#" if ok else "." for ok in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from typing import Optional
 
 from robotics.ik_solver import IKSolver
 from robotics.pose import JointAngles, Pose
+from robotics.trajectory import JointTrajectory
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,38 @@ class RobotController(ABC):
         joints = self._ik_solver.solve(pose)
         self.move_joints(joints)
 
+    def execute_trajectory(self, trajectory: JointTrajectory) -> bool:
+        """
+        Play a sampled joint trajectory (blocking); returns False if it was cut short.
+
+        The default interpolates on the host: every sample goes through
+        stream_joints on the host clock, skipping samples it has fallen behind
+        on. Drivers that can buffer on the device override this.
+        """
+        period = trajectory.period_s
+        last = len(trajectory.points) - 1
+        start = time.monotonic()
+        for index, angles in enumerate(trajectory.points):
+            delay = start + index * period - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif index < last and -delay > period:
+                continue
+            self.stream_joints(JointAngles(*(float(angle) for angle in angles)))
+        return True
+
+    def stream_joints(self, joints: JointAngles) -> None:
+        """
+        Command one sample of an already-smoothed trajectory. Defaults to
+        move_joints; drivers whose move_joints interpolates on the device
+        override this with a direct setpoint.
+        """
+        self.move_joints(joints)
+
+    def measured_joints(self) -> Optional[JointAngles]:
+        """Joint angles the arm last reported, or None without position feedback."""
+        return None
+
     @abstractmethod
     def home(self) -> None:
         """Move the arm to a safe home configuration."""
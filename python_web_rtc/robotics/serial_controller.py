@@ -0,0 +1,89 @@
+"""Robot controller for the ESP32 servo arm firmware (servo_arm/servo_arm.ino)."""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from robotics.ik_solver import IKSolver
+from robotics.pose import JointAngles
+from robotics.robot_controller import RobotController
+from robotics.trajectory import JointTrajectory
+
+logger = logging.getLogger(__name__)
+
+
+class SerialRobotController(RobotController):
+    """
+    Drives the arm through the shared serial writer (core/serial_service.py).
+
+    move_joints sends a "MOVE" line, which the firmware eases into with
+    smoothMove(). Trajectories are streamed in chunks into the firmware's
+    ring buffer, which plays them on its own clock; firmware without one gets
+    them through the host-timed default, as direct setpoints (binary frames
+    or "MOVE" lines, whichever the firmware negotiated).
+
+    A fixed port takes precedence; otherwise arm_id leases that arm from the
+    device manager (core/device_manager.py), sharing its connection with
+    the other controllers driving it.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baudrate: int,
+        chunk_points: int = 10,
+        ik_solver: Optional[IKSolver] = None,
+        arm_id: str = "",
+    ) -> None:
+        from core.device_manager import lease_arm
+        from core.serial_service import open_serial_port
+
+        super().__init__(ik_solver=ik_solver)
+        if port:
+            self._port = open_serial_port(port, baudrate, negotiate=True)
+        else:
+            self._port = lease_arm(arm_id, negotiate=True)
+        self._chunk_points = chunk_points
+
+    def move_joints(self, joints: JointAngles) -> None:
+        # Always text: binary frames skip the firmware's smoothMove()
+        self._port.send(_move_line(joints), key="joints")
+
+    def stream_joints(self, joints: JointAngles) -> None:
+        self._port.send_joints(_angles(joints), _move_line(joints), key="joints")
+
+    def measured_joints(self) -> Optional[JointAngles]:
+        feedback = self._port.feedback if self._port is not None else None
+        if not (self._port is not None and self._port.connected and feedback):
+            return None
+        return JointAngles(*(float(angle) for angle in feedback[:6]))
+
+    def execute_trajectory(self, trajectory: JointTrajectory) -> bool:
+        if not self._port.trajectory_buffer:
+            return super().execute_trajectory(trajectory)
+        played = self._port.stream_trajectory(
+            trajectory.points, trajectory.period_s, self._chunk_points
+        )
+        if not played:
+            logger.warning("Trajectory stream on %s did not complete", self._port.port)
+        return played
+
+    def home(self) -> None:
+        self._port.send(b"HOME\n", key="home")
+
+    def stop(self) -> None:
+        self._port.abort_trajectory()
+
+    def close(self) -> None:
+        if self._port is not None:
+            self._port.release()
+            self._port = None
+
+
+def _angles(joints: JointAngles) -> list[int]:
+    return [int(round(angle)) for angle in joints.as_tuple()]
+
+
+def _move_line(joints: JointAngles) -> bytes:
+    return ("MOVE " + " ".join(str(angle) for angle in _angles(joints)) + "\n").encode()
@@ -0,0 +1,389 @@
+"""Damped-least-squares IK for the 5-axis + gripper servo arm."""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from robotics.config import KinematicsConfig
+from robotics.ik_solver import IKSolver
+from robotics.pose import JointAngles, Pose
+
+logger = logging.getLogger(__name__)
+
+# Start position of servo_arm2.ino; the default warm start
+HOME_JOINTS = JointAngles(90.0, 140.0, 180.0, 0.0, 90.0, 10.0)
+
+# Finite-difference step for the Jacobian (radians)
+JACOBIAN_EPS = 1e-5
+# Largest joint change per iteration (radians); keeps early iterations stable
+MAX_STEP_RAD = 0.25
+# Cap on the orientation error fed to the secondary task per iteration (radians)
+MAX_ORIENTATION_STEP_RAD = 0.2
+# Kinematic shoulder / elbow / wrist angles (degrees) tried when the warm start fails
+RESTART_POSTURES_DEG = (
+    (90.0, -90.0, -90.0),
+    (60.0, -100.0, -50.0),
+    (120.0, -120.0, -90.0),
+    (45.0, -45.0, -90.0),
+)
+# Iterations spent refining orientation once the position is solved
+ORIENTATION_ITERATIONS = 15
+# Iteration stops once no joint moves more than this (radians)
+STEP_TOLERANCE_RAD = 1e-3
+
+
+class UnreachablePoseError(ValueError):
+    """No joint configuration within the servo limits reaches the pose."""
+
+
+def pose_rotation(pose: Pose) -> np.ndarray:
+    """Rotation matrix of a Pose: Rz(yaw) @ Ry(pitch) @ Rx(roll)."""
+    cr, sr = math.cos(pose.roll), math.sin(pose.roll)
+    cp, sp = math.cos(pose.pitch), math.sin(pose.pitch)
+    cy, sy = math.cos(pose.yaw), math.sin(pose.yaw)
+    return np.array(
+        [
+            [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+            [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+            [-sp, cp * sr, cp * cr],
+        ],
+        dtype=np.float64,
+    )
+
+
+def _rotation_log(rotations: np.ndarray) -> np.ndarray:
+    """Axis-angle vectors of a (N, 3, 3) rotation stack."""
+    cos = np.clip((np.trace(rotations, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    theta = np.arccos(cos)
+    skew = np.stack(
+        [
+            rotations[:, 2, 1] - rotations[:, 1, 2],
+            rotations[:, 0, 2] - rotations[:, 2, 0],
+            rotations[:, 1, 0] - rotations[:, 0, 1],
+        ],
+        axis=1,
+    ) / 2.0
+    sin = np.sin(theta)
+    scale = np.where(sin > 1e-6, theta / np.maximum(sin, 1e-12), 1.0)
+    vectors = skew * scale[:, None]
+
+    # Near 180 degrees the skew part vanishes; take the axis from R + I instead
+    flipped = (sin <= 1e-6) & (cos < 0.0)
+    for i in np.flatnonzero(flipped):
+        sym = rotations[i] + np.eye(3)
+        axis = sym[:, np.argmax(np.linalg.norm(sym, axis=0))]
+        vectors[i] = axis / np.linalg.norm(axis) * math.pi
+    return vectors
+
+
+def _damped_pinv(jacobian: np.ndarray, damping: np.ndarray) -> np.ndarray:
+    """Damped pseudo-inverse J^T (J J^T + lambda^2 I)^-1 of a (n, 3, dof) stack."""
+    jt = jacobian.transpose(0, 2, 1)
+    return jt @ np.linalg.inv(jacobian @ jt + damping)
+
+
+class ServoArmKinematics:
+    """
+    Forward kinematics of the servo arm, vectorized over joint configurations.
+
+    Chain: base yaw (j1) at the origin, then shoulder (j2), elbow (j3) and
+    wrist (j4) pitch in the arm's vertical plane, then wrist roll (j5) about
+    the tool axis. Tool z is the approach direction, so a tool pointing
+    straight down matches the default grasp orientation (roll 180 deg).
+    """
+
+    def __init__(self, config: KinematicsConfig) -> None:
+        self.config = config
+        self._offsets = np.radians(np.asarray(config.servo_offsets_deg, dtype=np.float64))
+        self._directions = np.asarray(config.servo_directions, dtype=np.float64)
+        self.lower = math.radians(config.joint_min_deg)
+        self.upper = math.radians(config.joint_max_deg)
+
+    def to_servo(self, kinematic_rad: np.ndarray) -> np.ndarray:
+        """Servo angles (radians) for kinematic joint angles; inverse of the mapping in forward()."""
+        return self._offsets + kinematic_rad * self._directions
+
+    def forward(self, servo_rad: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Tool positions (N, 3) and rotations (N, 3, 3) for (N, 5) servo angles
+        in radians.
+        """
+        c = self.config
+        q = (servo_rad - self._offsets) * self._directions
+        base, shoulder, elbow, wrist, roll = q.T
+
+        upper = shoulder
+        fore = shoulder + elbow
+        tool = fore + wrist
+        reach = c.upper_arm_m * np.cos(upper) + c.forearm_m * np.cos(fore) + c.tool_length_m * np.cos(tool)
+        height = (
+            c.base_height_m
+            + c.upper_arm_m * np.sin(upper)
+            + c.forearm_m * np.sin(fore)
+            + c.tool_length_m * np.sin(tool)
+        )
+        cb, sb = np.cos(base), np.sin(base)
+        positions = np.stack([reach * cb, reach * sb, height], axis=1)
+
+        # R = Rz(base) @ Ry(pi/2 - tool) @ Rz(roll)
+        ct, st = np.sin(tool), np.cos(tool)  # cos / sin of (pi/2 - tool)
+        cr, sr = np.cos(roll), np.sin(roll)
+        rotations = np.empty((len(q), 3, 3))
+        rotations[:, 0, 0] = cb * ct * cr - sb * sr
+        rotations[:, 0, 1] = -cb * ct * sr - sb * cr
+        rotations[:, 0, 2] = cb * st
+        rotations[:, 1, 0] = sb * ct * cr + cb * sr
+        rotations[:, 1, 1] = -sb * ct * sr + cb * cr
+        rotations[:, 1, 2] = sb * st
+        rotations[:, 2, 0] = -st * cr
+        rotations[:, 2, 1] = st * sr
+        rotations[:, 2, 2] = ct
+        return positions, rotations
+
+
+class ServoArmIKSolver(IKSolver):
+    """
+    Numeric IK for the servo arm (damped least squares).
+
+    Each iteration evaluates the arm and all finite-difference perturbations
+    in one vectorized forward-kinematics call, then takes a damped
+    least-squares step. Position is the primary task and is matched to
+    position_tolerance_m; orientation is a secondary task in the position null
+    space and is matched as far as the five axes allow.
+
+    solve() warm-starts from the previous solution, so the approach, descend
+    and retreat poses of a pick (which differ only in z) converge in a few
+    iterations. Results are kept in an LRU cache keyed on the pose quantized
+    to cache_position_quantum_m / cache_angle_quantum_deg. If the warm start
+    fails, a small batch of seeds aimed at the target is solved in parallel.
+    """
+
+    def __init__(
+        self,
+        config: Optional[KinematicsConfig] = None,
+        seed: Optional[JointAngles] = None,
+    ) -> None:
+        self._config = config or KinematicsConfig()
+        self._kinematics = ServoArmKinematics(self._config)
+        self._last = seed or HOME_JOINTS
+        self._cache: OrderedDict[tuple, JointAngles] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_iterations = 0
+
+        mid = (self._config.joint_min_deg + self._config.joint_max_deg) / 2.0
+        self._servo_seeds = np.radians(
+            np.array(
+                [
+                    [mid, mid, mid, mid, mid],
+                    [mid, 120.0, 120.0, 30.0, mid],
+                    [mid, 60.0, 150.0, 60.0, mid],
+                    [mid, 150.0, 60.0, 150.0, mid],
+                ],
+                dtype=np.float64,
+            )
+        )
+
+    @property
+    def kinematics(self) -> ServoArmKinematics:
+        return self._kinematics
+
+    def solve(self, target_pose: Pose, seed: Optional[JointAngles] = None) -> JointAngles:
+        key = self._cache_key(target_pose)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            self._last = cached
+            return cached
+        self.cache_misses += 1
+
+        start = seed or self._last
+        joints = self._solve_uncached(target_pose, start)
+
+        self._cache[key] = joints
+        while len(self._cache) > self._config.cache_size:
+            self._cache.popitem(last=False)
+        self._last = joints
+        return joints
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _solve_uncached(self, target_pose: Pose, start: JointAngles) -> JointAngles:
+        target_position = np.array([target_pose.x, target_pose.y, target_pose.z])
+        target_rotation = pose_rotation(target_pose)
+        limit = self._config.max_iterations
+
+        # 1. Position only, from the previous solution, then from the restart seeds
+        warm = np.radians(np.array([start.as_tuple()[:5]], dtype=np.float64))
+        warm = warm.clip(self._kinematics.lower, self._kinematics.upper)
+        q, error, iterations = self._iterate(warm, target_position, target_rotation, 0.0, limit)
+        if error > self._config.position_tolerance_m:
+            q, error, restart_iterations = self._iterate(
+                self._restart_seeds(target_position), target_position, target_rotation, 0.0, limit
+            )
+            iterations += restart_iterations
+
+        if error > self._config.position_tolerance_m:
+            self.last_iterations = iterations
+            raise UnreachablePoseError(
+                f"Pose ({target_pose.x:.3f}, {target_pose.y:.3f}, {target_pose.z:.3f}) "
+                f"unreachable: closest solution is {error * 1000:.1f} mm away"
+            )
+
+        # 2. Orientation in the position null space, then a position-only polish;
+        #    kept only if it improves the orientation without losing the position
+        if self._config.orientation_gain > 0.0:
+            refined, _, refine_iterations = self._iterate(
+                q[None], target_position, target_rotation,
+                self._config.orientation_gain, ORIENTATION_ITERATIONS,
+            )
+            refined, refined_error, polish_iterations = self._iterate(
+                refined[None], target_position, target_rotation, 0.0, limit
+            )
+            iterations += refine_iterations + polish_iterations
+            if refined_error <= self._config.position_tolerance_m and self._orientation_error(
+                refined, target_rotation
+            ) < self._orientation_error(q, target_rotation):
+                q, error = refined, refined_error
+        self.last_iterations = iterations
+
+        servo_deg = np.degrees(q)
+        logger.debug(
+            "IK solved in %d iterations, error %.2f mm, orientation off by %.1f deg",
+            iterations,
+            error * 1000,
+            math.degrees(self._orientation_error(q, target_rotation)),
+        )
+        return JointAngles(*(float(angle) for angle in servo_deg), j6=start.j6)
+
+    def _restart_seeds(self, target_position: np.ndarray) -> np.ndarray:
+        """
+        Seeds aimed at the target: the base turned towards it with each canned
+        arm posture, plus the mirrored posture reaching back over the base
+        (needed when the target's bearing is outside the base servo's range),
+        plus a few fixed servo-space postures.
+        """
+        azimuth = math.atan2(target_position[1], target_position[0])
+        flipped = azimuth - math.copysign(math.pi, azimuth)
+        rows = []
+        for shoulder, elbow, wrist in np.radians(RESTART_POSTURES_DEG):
+            rows.append((azimuth, shoulder, elbow, wrist, 0.0))
+            rows.append((flipped, math.pi - shoulder, -elbow, -wrist, 0.0))
+        seeds = np.concatenate(
+            [self._kinematics.to_servo(np.array(rows, dtype=np.float64)), self._servo_seeds]
+        )
+        return seeds.clip(self._kinematics.lower, self._kinematics.upper)
+
+    def _orientation_error(self, q: np.ndarray, target_rotation: np.ndarray) -> float:
+        _, rotations = self._kinematics.forward(q[None])
+        return float(np.linalg.norm(_rotation_log(target_rotation[None] @ rotations[0].T[None])))
+
+    def _iterate(
+        self,
+        seeds: np.ndarray,
+        target_position: np.ndarray,
+        target_rotation: np.ndarray,
+        orientation_gain: float,
+        max_iterations: int,
+    ) -> tuple[np.ndarray, float, int]:
+        """Run DLS on a batch of seeds in lockstep; return the best (q, position error, iterations)."""
+        c = self._config
+        kin = self._kinematics
+        q = seeds.copy()
+        n, dof = q.shape
+        perturb = np.eye(dof) * JACOBIAN_EPS
+
+        for iteration in range(1, max_iterations + 1):
+            # Current configs plus one perturbation per joint, in a single FK call
+            batch = np.concatenate([q[:, None, :], q[:, None, :] + perturb[None]], axis=1)
+            positions, rotations = kin.forward(batch.reshape(-1, dof))
+            positions = positions.reshape(n, dof + 1, 3)
+            rotations = rotations.reshape(n, dof + 1, 3, 3)
+
+            position_error = target_position - positions[:, 0]
+            linear = ((positions[:, 1:] - positions[:, :1]) / JACOBIAN_EPS).transpose(0, 2, 1)
+
+            if orientation_gain > 0.0:
+                base_rot = rotations[:, 0]
+                rotation_error = _rotation_log(target_rotation[None] @ base_rot.transpose(0, 2, 1))
+                relative = rotations[:, 1:] @ base_rot[:, None].transpose(0, 1, 3, 2)
+                angular = (
+                    _rotation_log(relative.reshape(-1, 3, 3)).reshape(n, dof, 3) / JACOBIAN_EPS
+                ).transpose(0, 2, 1)
+            else:
+                rotation_error = angular = None
+
+            step = self._step(linear, position_error, angular, rotation_error, orientation_gain)
+            # Joints pinned at a servo limit and pushed outward are locked and
+            # the step re-solved with the remaining joints
+            blocked = ((q <= kin.lower) & (step < 0)) | ((q >= kin.upper) & (step > 0))
+            if blocked.any():
+                free = (~blocked)[:, None, :]
+                step = self._step(
+                    linear * free,
+                    position_error,
+                    None if angular is None else angular * free,
+                    rotation_error,
+                    orientation_gain,
+                )
+
+            step = np.clip(step, -MAX_STEP_RAD, MAX_STEP_RAD)
+            q = np.clip(q + step, kin.lower, kin.upper)
+
+            position_norm = np.linalg.norm(position_error, axis=1)
+            converged = (position_norm <= c.position_tolerance_m) & (
+                np.abs(step).max(axis=1) <= STEP_TOLERANCE_RAD
+            )
+            if converged.any():
+                break
+
+        positions, _ = kin.forward(q)
+        position_norm = np.linalg.norm(target_position - positions, axis=1)
+        best = int(np.argmin(position_norm))
+        return q[best], float(position_norm[best]), iteration
+
+    def _step(
+        self,
+        linear: np.ndarray,
+        position_error: np.ndarray,
+        angular: Optional[np.ndarray],
+        rotation_error: Optional[np.ndarray],
+        orientation_gain: float,
+    ) -> np.ndarray:
+        """
+        Joint step (n, dof). Position is the primary task; orientation, when
+        enabled, uses what is left of the five axes (the position null space).
+        """
+        damping = np.eye(3) * self._config.damping**2
+        pinv = _damped_pinv(linear, damping)
+        step = (pinv @ position_error[:, :, None])[:, :, 0]
+        if angular is None:
+            return step
+
+        null = np.eye(linear.shape[2]) - pinv @ linear
+        residual = rotation_error - (angular @ step[:, :, None])[:, :, 0]
+        norm = np.linalg.norm(residual, axis=1, keepdims=True)
+        residual *= orientation_gain * np.minimum(
+            1.0, MAX_ORIENTATION_STEP_RAD / np.maximum(norm, 1e-12)
+        )
+        secondary = null @ _damped_pinv(angular @ null, damping) @ residual[:, :, None]
+        return step + secondary[:, :, 0]
+
+    def _cache_key(self, pose: Pose) -> tuple:
+        p = self._config.cache_position_quantum_m
+        a = math.radians(self._config.cache_angle_quantum_deg)
+        return (
+            round(pose.x / p),
+            round(pose.y / p),
+            round(pose.z / p),
+            round(pose.roll / a),
+            round(pose.pitch / a),
+            round(pose.yaw / a),
+        )
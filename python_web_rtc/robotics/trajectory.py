@@ -0,0 +1,128 @@
+"""Time-parameterized joint trajectories with velocity and acceleration limits."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from robotics.config import TrajectoryConfig
+from robotics.pose import JointAngles
+
+
+@dataclass(frozen=True)
+class JointTrajectory:
+    """Joint angles in degrees, one row of six every period_s, and where each phase starts."""
+
+    period_s: float
+    points: np.ndarray
+    # (phase name, index of its first point)
+    phase_starts: tuple[tuple[str, int], ...] = ()
+
+    @property
+    def duration_s(self) -> float:
+        return max(len(self.points) - 1, 0) * self.period_s
+
+    def final(self) -> JointAngles:
+        return JointAngles(*(float(angle) for angle in self.points[-1]))
+
+    def sample(self, t: float) -> JointAngles:
+        """Joint angles at time t, linearly interpolated between samples."""
+        position = min(max(t / self.period_s, 0.0), len(self.points) - 1.0)
+        index = min(int(position), len(self.points) - 2) if len(self.points) > 1 else 0
+        fraction = position - index
+        row = self.points[index]
+        if fraction > 0.0:
+            row = row + fraction * (self.points[index + 1] - row)
+        return JointAngles(*(float(angle) for angle in row))
+
+
+class TrajectoryGenerator:
+    """
+    Builds a trajectory through joint-space waypoints, stopping at each one.
+
+    Every segment is a straight line in joint space with a trapezoidal
+    (or, for short moves, triangular) velocity profile. All joints share one
+    time scaling, set by the joint with the furthest to go, so they start and
+    arrive together and none exceeds the speed or acceleration limit. Segment
+    durations are rounded up to whole sample periods.
+    """
+
+    def __init__(self, config: TrajectoryConfig) -> None:
+        self._config = config
+        self._period = 1.0 / config.sample_rate_hz
+
+    @property
+    def period_s(self) -> float:
+        return self._period
+
+    def segment_duration(self, distance_deg: float) -> float:
+        """Minimum time to move distance_deg from rest to rest."""
+        v_max = self._config.max_joint_speed_deg_s
+        a_max = self._config.max_joint_accel_deg_s2
+        if distance_deg <= 0.0:
+            return 0.0
+        if distance_deg < v_max * v_max / a_max:
+            return 2.0 * math.sqrt(distance_deg / a_max)
+        return distance_deg / v_max + v_max / a_max
+
+    def segment(self, start: np.ndarray, goal: np.ndarray) -> np.ndarray:
+        """Samples after start up to and including goal, (n, 6)."""
+        delta = goal - start
+        distance = float(np.max(np.abs(delta)))
+        duration = self.segment_duration(distance)
+        if duration <= 0.0:
+            return np.empty((0, len(start)), dtype=np.float64)
+
+        count = max(int(math.ceil(duration / self._period - 1e-9)), 1)
+        # Stretch to whole periods: slower by at most one sample, still within limits
+        t = np.arange(1, count + 1, dtype=np.float64) * (duration / count)
+        fraction = self._profile(t, distance, duration) / distance
+        return start + fraction[:, None] * delta
+
+    def _profile(self, t: np.ndarray, distance: float, duration: float) -> np.ndarray:
+        """Distance covered at times t along a rest-to-rest profile of that duration."""
+        v_max = self._config.max_joint_speed_deg_s
+        a_max = self._config.max_joint_accel_deg_s2
+        t_acc = min(v_max / a_max, duration / 2.0)
+        v_peak = a_max * t_acc
+        accel = 0.5 * a_max * t * t
+        cruise = 0.5 * a_max * t_acc * t_acc + v_peak * (t - t_acc)
+        decel = distance - 0.5 * a_max * (duration - t) ** 2
+        covered = np.where(t < t_acc, accel, np.where(t <= duration - t_acc, cruise, decel))
+        return np.clip(covered, 0.0, distance)
+
+    def plan(
+        self,
+        start: JointAngles,
+        waypoints: list[tuple[str, JointAngles]],
+        dwell_s: Optional[dict[str, float]] = None,
+    ) -> JointTrajectory:
+        """
+        Trajectory from start through each (phase name, joints) waypoint.
+        dwell_s holds the arm at a phase's waypoint for that long.
+        """
+        dwell_s = dwell_s or {}
+        current = np.asarray(start.as_tuple(), dtype=np.float64)
+        blocks = [current[None, :]]
+        phase_starts = []
+        length = 1
+
+        for phase, joints in waypoints:
+            goal = np.asarray(joints.as_tuple(), dtype=np.float64)
+            block = self.segment(current, goal)
+            hold = int(round(dwell_s.get(phase, 0.0) / self._period))
+            if hold:
+                block = np.vstack([block, np.repeat(goal[None, :], hold, axis=0)])
+            phase_starts.append((phase, length))
+            blocks.append(block)
+            length += len(block)
+            current = goal
+
+        return JointTrajectory(
+            period_s=self._period,
+            points=np.vstack(blocks),
+            phase_starts=tuple(phase_starts),
+        )
@@ -0,0 +1,275 @@
+"""Closed-loop visual servoing: stream joint setpoints toward a tracked target."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from enum import Enum, auto
+from typing import Optional
+
+from robotics.config import MotionPlannerConfig, ServoConfig
+from robotics.ik_solver import IKSolver
+from robotics.pipeline import RoboticsPipeline
+from robotics.pose import JointAngles, Point3D, Pose
+from robotics.pose_generator import DetectedObject
+from robotics.servo_arm_ik import UnreachablePoseError
+
+logger = logging.getLogger(__name__)
+
+# Track IDs already picked (or unreachable) are not selected again; replaces
+# the fixed cooldown
+PICKED_HISTORY = 32
+# Goal snaps onto the measurement once this close, so IK is not re-solved forever
+GOAL_SNAP_M = 0.0005
+
+
+class ServoPhase(Enum):
+    IDLE = auto()
+    APPROACH = auto()
+    DESCEND = auto()
+    GRASP = auto()
+    RETREAT = auto()
+
+
+class VisualServoController:
+    """
+    Streaming alternative to MotionPlanner.execute_pick.
+
+    A fixed-rate control loop keeps one target, identified by its ByteTrack
+    track ID. Every new detection list re-projects that target into the robot
+    frame and blends it into the goal; each tick solves IK for the current
+    phase goal and commands a joint setpoint no further than
+    max_joint_speed_deg_s * dt from the previous one. Setpoints go out as
+    direct writes (stream_joints), so all joints move together at the loop
+    rate. Phases advance as soon as the setpoint reaches the goal and, when the
+    driver reports positions, the arm does too, so there are no fixed step
+    delays; picked track IDs are skipped instead of waiting out a cooldown.
+
+        IDLE -> APPROACH (tracks target) -> DESCEND (tracks target)
+             -> GRASP (goal frozen) -> RETREAT -> IDLE
+    """
+
+    def __init__(
+        self,
+        pipeline: RoboticsPipeline,
+        ik_solver: IKSolver,
+        motion_config: MotionPlannerConfig,
+        servo_config: ServoConfig,
+    ) -> None:
+        self._pipeline = pipeline
+        self._ik = ik_solver
+        self._motion = motion_config
+        self._config = servo_config
+        self._lock = threading.Lock()
+        self._detections: list[DetectedObject] = []
+        self._fresh = False
+
+        self._phase = ServoPhase.IDLE
+        self._track_id: Optional[int] = None
+        self._template: Optional[Pose] = None
+        self._goal: Optional[Point3D] = None
+        self._measured: Optional[Point3D] = None
+        self._last_seen = 0.0
+        self._picked: deque[int] = deque(maxlen=PICKED_HISTORY)
+
+        self._commanded = JointAngles(*servo_config.home_joints_deg)
+        self._target_pose: Optional[Pose] = None
+        self._target_joints: Optional[JointAngles] = None
+
+    @property
+    def phase(self) -> ServoPhase:
+        return self._phase
+
+    def update_detections(self, raw_detections: list[dict]) -> None:
+        """Hand the latest detection list to the control loop (non-blocking)."""
+        detections = [DetectedObject.from_dict(item) for item in raw_detections]
+        with self._lock:
+            self._detections = detections
+            self._fresh = True
+
+    def run(self, stop_event: threading.Event) -> None:
+        """Control loop; blocks until stop_event is set. Run on the robotics thread."""
+        period = 1.0 / self._config.control_rate_hz
+        robot = self._pipeline.robot
+
+        if self._motion.move_home_before_pick:
+            robot.home()
+        self._commanded = JointAngles(*self._config.home_joints_deg)
+
+        logger.info("Visual servo running at %.0f Hz", self._config.control_rate_hz)
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            try:
+                self.step(time.monotonic(), period)
+            except NotImplementedError as exc:
+                logger.error("IK not configured: %s", exc)
+                return
+            except UnreachablePoseError as exc:
+                logger.warning("Servo target track=%s skipped: %s", self._track_id, exc)
+                if self._track_id is not None:
+                    self._picked.append(self._track_id)
+                self._reset()
+            except Exception:
+                logger.exception("Visual servo step failed")
+                self._reset()
+
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                stop_event.wait(delay)
+            else:
+                # Overran (slow transport); start a fresh schedule instead of bursting
+                next_tick = time.monotonic()
+
+    def step(self, now: float, dt: float) -> None:
+        """Run one control tick."""
+        with self._lock:
+            detections, fresh, self._fresh = self._detections, self._fresh, False
+
+        if self._phase is ServoPhase.IDLE:
+            if not self._acquire(detections, now):
+                return
+        elif self._phase in (ServoPhase.APPROACH, ServoPhase.DESCEND):
+            self._track(detections, fresh, now)
+            if self._phase is ServoPhase.IDLE:
+                return
+            self._blend_goal()
+
+        target_joints = self._phase_joints()
+        setpoint = self._rate_limit(target_joints, self._config.max_joint_speed_deg_s * dt)
+        if setpoint != self._commanded:
+            self._pipeline.robot.stream_joints(setpoint)
+            self._commanded = setpoint
+
+        if self._reached(target_joints):
+            self._advance()
+
+    def _acquire(self, detections: list[DetectedObject], now: float) -> bool:
+        candidates = [d for d in detections if d.track_id is None or d.track_id not in self._picked]
+        target = self._pipeline.target_selector.choose_target(candidates)
+        if target is None:
+            return False
+
+        self._template = self._pipeline.grasp_pose_for(target)
+        self._goal = self._measured = self._template.position()
+        self._track_id = target.track_id
+        self._last_seen = now
+        self._phase = ServoPhase.APPROACH
+        logger.info(
+            "Servo target '%s' track=%s conf=%.2f pixel=(%d,%d)",
+            target.name,
+            target.track_id,
+            target.confidence,
+            target.x,
+            target.y,
+        )
+        return True
+
+    def _track(self, detections: list[DetectedObject], fresh: bool, now: float) -> None:
+        match = next((d for d in detections if d.track_id == self._track_id), None)
+        if match is None:
+            if now - self._last_seen > self._config.lost_target_timeout_s:
+                if self._phase is ServoPhase.APPROACH:
+                    logger.warning("Servo target track=%s lost; reselecting", self._track_id)
+                    self._reset()
+                # While descending the gripper usually hides the object; keep the last goal
+            return
+
+        self._last_seen = now
+        if not fresh:
+            return
+
+        self._measured = self._pipeline.locate(match)
+
+    def _blend_goal(self) -> None:
+        # Per-tick smoothing toward the latest measurement, so the goal converges
+        # even when the detection feed goes quiet on a static scene
+        goal, measured = self._goal, self._measured
+        if self._goal_error() < GOAL_SNAP_M:
+            self._goal = measured
+            return
+        alpha = self._config.goal_smoothing
+        self._goal = Point3D(
+            x=goal.x + alpha * (measured.x - goal.x),
+            y=goal.y + alpha * (measured.y - goal.y),
+            z=goal.z + alpha * (measured.z - goal.z),
+        )
+
+    def _goal_error(self) -> float:
+        goal, measured = self._goal, self._measured
+        return math.dist((goal.x, goal.y, goal.z), (measured.x, measured.y, measured.z))
+
+    def _phase_joints(self) -> JointAngles:
+        goal = self._goal
+        if self._phase is ServoPhase.APPROACH:
+            z = goal.z + self._motion.approach_height_m
+        elif self._phase is ServoPhase.RETREAT:
+            z = goal.z + self._motion.retreat_height_m
+        else:
+            z = goal.z + self._motion.grasp_depth_offset_m
+        pose = self._template.with_position(goal.x, goal.y, z)
+
+        if pose != self._target_pose:
+            self._target_pose = pose
+            self._target_joints = self._ik.solve(pose)
+
+        if self._phase in (ServoPhase.GRASP, ServoPhase.RETREAT):
+            return self._target_joints.with_gripper(self._motion.gripper_close_angle_deg)
+        return self._target_joints.with_gripper(self._motion.gripper_open_angle_deg)
+
+    def _rate_limit(self, target: JointAngles, max_step: float) -> JointAngles:
+        return JointAngles(
+            *(
+                current + max(-max_step, min(max_step, goal - current))
+                for current, goal in zip(self._commanded.as_tuple(), target.as_tuple())
+            )
+        )
+
+    def _reached(self, target: JointAngles) -> bool:
+        tolerance = self._config.joint_tolerance_deg
+        if _max_error(target, self._commanded) > tolerance:
+            return False
+        # The setpoint is only what was sent; with feedback, wait for the arm
+        # (e.g. so the gripper does not close while it is still descending)
+        measured = self._pipeline.robot.measured_joints()
+        if measured is None:
+            return True
+        # The board reports whole degrees
+        if _max_error(target, measured) <= tolerance + 0.5:
+            return True
+        # Resend the unchanged setpoint so the board confirms its final pose
+        self._pipeline.robot.stream_joints(self._commanded)
+        return False
+
+    def _advance(self) -> None:
+        if self._phase is ServoPhase.APPROACH:
+            # Only descend once the goal has caught up with the target
+            if self._goal_error() <= self._config.settle_tolerance_m:
+                self._phase = ServoPhase.DESCEND
+        elif self._phase is ServoPhase.DESCEND:
+            self._phase = ServoPhase.GRASP
+        elif self._phase is ServoPhase.GRASP:
+            self._phase = ServoPhase.RETREAT
+        elif self._phase is ServoPhase.RETREAT:
+            if self._track_id is not None:
+                self._picked.append(self._track_id)
+            logger.info("Servo pick complete (track=%s)", self._track_id)
+            self._reset()
+            return
+        logger.debug("Servo phase -> %s", self._phase.name)
+
+    def _reset(self) -> None:
+        self._phase = ServoPhase.IDLE
+        self._track_id = None
+        self._template = None
+        self._goal = None
+        self._measured = None
+        self._target_pose = None
+        self._target_joints = None
+
+
+def _max_error(a: JointAngles, b: JointAngles) -> float:
+    return max(abs(x - y) for x, y in zip(a.as_tuple(), b.as_tuple()))
@@ -1,23 +1,25 @@
+import asyncio
+
 from aiortc import RTCPeerConnection, RTCConfiguration, RTCIceServer
 from webRTC.tracks import VideoTrack
 from media.video_source import OpenCVCameraSource
 from core.config import STUN_SERVERS
 from robot_control import RobotController
 from hand_robot_control import get_hand_controller
-from media.webrtc_camera_source import WebRTCCameraSource
+from media.broadcast_hub import PassthroughProcessor, broadcast_hub
 
-from media.pi_track_store import get_pi_track
+from media.pi_track_store import get_pi_source
 
 
 def create_camera():
     print("📡 waiting WebRTC stream")
 
-    track = get_pi_track()
+    source = get_pi_source()
 
-    if track is None:
+    if source is None:
         raise RuntimeError("Pi stream not connected")
 
-    return WebRTCCameraSource(track)
+    return source
 
 
 def _create_processor(processor_type: str):
@@ -36,18 +38,45 @@ def _create_processor(processor_type: str):
     return YoloFrameProcessor(robot_controller=RobotController())
 
 
-def create_peer(processor_type: str = "yolo"):
+def _subscribe(processor_type: str, pi_source=None):
+    """
+    Join the shared processing channel for this processor type and camera.
+    Blocks while a new channel opens its webcam or loads its model.
+    """
+    if processor_type == "hand_mirror":
+        return broadcast_hub.subscribe(
+            (processor_type, "webcam"),
+            OpenCVCameraSource,
+            lambda: _create_processor(processor_type),
+            owns_source=True,
+        )
+
+    # One channel per processor type on the Pi stream; when the Pi reconnects
+    # set_pi_track() rebinds it to the new source
+    return broadcast_hub.subscribe(
+        (processor_type, "pi"),
+        lambda: pi_source,
+        lambda: _create_processor(processor_type),
+    )
+
+
+async def create_peer(processor_type: str = "yolo"):
     processor_type = (processor_type or "yolo").strip().lower()
+    if processor_type in ("mixedgrid", "grid"):
+        processor_type = "mixed_grid"
 
-    config = RTCConfiguration(iceServers=[RTCIceServer(urls=STUN_SERVERS)])
+    # The Pi source reads its track on the event loop, so it is created here;
+    # the rest of a new channel is built on a worker thread so the loop keeps
+    # serving other peers meanwhile
+    pi_source = None if processor_type == "hand_mirror" else create_camera()
+    loop = asyncio.get_running_loop()
 
-    pc = RTCPeerConnection(configuration=config)
+    # Processing happens once per frame in the hub; each viewer track only
+    # wraps and encodes the shared annotated frames, so it runs inline
+    subscription = await loop.run_in_executor(None, _subscribe, processor_type, pi_source)
 
-    if processor_type == "hand_mirror":
-        source = OpenCVCameraSource()
-    else:
-        source = create_camera()
+    config = RTCConfiguration(iceServers=[RTCIceServer(urls=STUN_SERVERS)])
 
-    processor = _create_processor(processor_type)
-    pc.addTrack(VideoTrack(source, processor))
+    pc = RTCPeerConnection(configuration=config)
+    pc.addTrack(VideoTrack(subscription, PassthroughProcessor()))
     return pc
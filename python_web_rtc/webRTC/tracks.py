@@ -1,30 +1,195 @@
-import cv2
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from aiortc import VideoStreamTrack
+from aiortc.mediastreams import VIDEO_CLOCK_RATE, VIDEO_TIME_BASE
 from av import VideoFrame
+from core.frame import Frame, as_frame
 from core.interface import VideoSource, frameProcessor
+from core.metrics import StageMetrics
+
+# How long recv waits for a fresh frame before sending a black keep-alive frame
+FRAME_WAIT_TIMEOUT_S = 1.0
 
 
 class VideoTrack(VideoStreamTrack):
-    def __init__(self, source: VideoSource, processor: frameProcessor = frameProcessor):
+    """
+    Outgoing video track: source frame -> processor -> BGR VideoFrame.
+
+    The source's read-only frame is handed to the processor as-is and the
+    processor's output goes straight into the VideoFrame as bgr24, so the only
+    colour conversion left is the encoder's own BGR -> YUV pass.
+
+    With workers=0 the processing runs inline in recv() on the event loop.
+    This is the mode for BroadcastHub viewers: their PassthroughProcessor does
+    no work, the hub channel's thread already ran the real processor.
+
+    workers>0 is for a track that runs a real processor on its own source
+    (not a hub subscription): a per-track thread pool does the CV work, new
+    frames wait in a bounded queue (oldest dropped when full) and recv() only
+    hands out finished frames, so a slow frame never stalls ICE/RTCP or other
+    peers.
+    """
+
+    def __init__(
+        self,
+        source: VideoSource,
+        processor: frameProcessor = frameProcessor,
+        workers: int = 0,
+        queue_size: int = 2,
+    ):
         super().__init__()
         self.source = source
         self.processor = processor
+        self._last_seq = 0
+        self._start_time = None
+
+        self.metrics = StageMetrics("wait", "queue", "process", "convert", "total")
+
+        self.workers = workers
+        self._executor = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="video-track"
+            )
+        self._pending: deque = deque(maxlen=max(1, queue_size))
+        self._inflight = 0
+        self._output = None
+        self._output_seq = 0
+        self._output_ready = asyncio.Event()
+        self._pump_task = None
 
     async def recv(self):
-        pts, time_base = await self.next_timestamp()
+        if self._executor is None:
+            return await self._recv_inline()
+        return await self._recv_from_executor()
 
-        frame = self.source.read()
+    # ================= INLINE MODE =================
+    async def _recv_inline(self):
+        wait_start = time.perf_counter()
+        # Only do work once the source has a frame we have not sent yet
+        entry = await self.source.next_frame(self._last_seq, timeout=FRAME_WAIT_TIMEOUT_S)
+        self.metrics.add("wait", time.perf_counter() - wait_start)
+        pts, time_base = self._timestamp()
 
         # Guard: if no frame yet (Pi stream not started), send black frame
-        if frame is None:
-            frame = np.zeros((640, 640, 3), dtype=np.uint8)
+        if entry is None:
+            frame = as_frame(np.zeros((640, 640, 3), dtype=np.uint8))
+        else:
+            self._last_seq, frame = entry
+
+        video_frame = self._render(frame)
+        video_frame.pts = pts
+        video_frame.time_base = time_base
+
+        return video_frame
 
-        frame = self.processor.process(frame)
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    # ================= EXECUTOR MODE =================
+    async def _recv_from_executor(self):
+        if self._pump_task is None:
+            self._pump_task = asyncio.get_running_loop().create_task(self._pump())
 
-        video_frame = VideoFrame.from_ndarray(frame, format="rgb24")
+        wait_start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._output_ready.wait(), FRAME_WAIT_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            pass
+        self.metrics.add("wait", time.perf_counter() - wait_start)
+
+        if self._output_ready.is_set():
+            self._output_ready.clear()
+            video_frame = self._output
+        else:
+            # Keep the stream alive while nothing new has been processed
+            video_frame = VideoFrame.from_ndarray(
+                np.zeros((640, 640, 3), dtype=np.uint8), format="bgr24"
+            )
+
+        pts, time_base = self._timestamp()
         video_frame.pts = pts
         video_frame.time_base = time_base
+        return video_frame
+
+    async def _pump(self):
+        loop = asyncio.get_running_loop()
+        while self.readyState == "live":
+            entry = await self.source.next_frame(self._last_seq, timeout=FRAME_WAIT_TIMEOUT_S)
+            if entry is None:
+                continue
+            self._last_seq = entry[0]
+
+            if len(self._pending) == self._pending.maxlen:
+                self.metrics.incr("dropped")
+            self._pending.append((entry[0], entry[1], time.perf_counter()))
+            self._dispatch(loop)
+
+    def _dispatch(self, loop):
+        while self._inflight < self.workers and self._pending:
+            seq, frame, queued_at = self._pending.popleft()
+            self._inflight += 1
+            future = loop.run_in_executor(self._executor, self._render_job, frame, queued_at)
+            future.add_done_callback(
+                lambda fut, seq=seq: self._on_rendered(loop, seq, fut)
+            )
+
+    def _render_job(self, frame, queued_at):
+        self.metrics.add("queue", time.perf_counter() - queued_at)
+        video_frame = self._render(frame)
+        self.metrics.add("total", time.perf_counter() - queued_at)
+        return video_frame
+
+    def _on_rendered(self, loop, seq, future):
+        self._inflight -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.metrics.incr("errors")
+            print("VideoTrack processing error:", future.exception())
+        elif seq > self._output_seq:
+            # Workers can finish out of order; never go back in time
+            self._output_seq = seq
+            if self._output_ready.is_set():
+                self.metrics.incr("unsent")
+            self._output = future.result()
+            self._output_ready.set()
+        else:
+            self.metrics.incr("stale")
+        self._dispatch(loop)
+
+    # ================= SHARED =================
+    def _render(self, frame: Frame):
+        start = time.perf_counter()
+        output = self.processor.process(frame.bgr())
+        processed = time.perf_counter()
+        self.metrics.add("process", processed - start)
+
+        video_frame = VideoFrame.from_ndarray(output, format="bgr24")
+        self.metrics.add("convert", time.perf_counter() - processed)
+        return video_frame
+
+    def _timestamp(self):
+        # Frames arrive at the source's pace, so stamp them by wall clock
+        # instead of the fixed 30 fps cadence of VideoStreamTrack.next_timestamp()
+        now = time.time()
+        if self._start_time is None:
+            self._start_time = now
+        return int((now - self._start_time) * VIDEO_CLOCK_RATE), VIDEO_TIME_BASE
+
+    def stats(self) -> dict:
+        data = self.metrics.to_dict()
+        data["mode"] = "executor" if self._executor is not None else "inline"
+        data["workers"] = self.workers
+        data["pending"] = len(self._pending)
+        data["inflight"] = self._inflight
+        return data
 
-        return video_frame
\ No newline at end of file
+    def stop(self):
+        super().stop()
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.source.stop()
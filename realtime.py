@@ -4,12 +4,21 @@ import numpy as np
 from collections import deque, Counter
 from ultralytics import YOLO
 
+from python_web_rtc.media.yolo.liquid_color import GAMMA_LUT, classify_hsv
+from python_web_rtc.media.yolo.tiling import TILED_INFERENCE, TiledDetector
+from python_web_rtc.media.yolo.tracking import apply_tracker, create_tracker
+
 # =====================================================
 # LOAD MODEL
 # =====================================================
 
 model = YOLO("best (7).pt")
 
+# Tiled detection (YOLO_TILED=1): a 320 coarse pass plus native-resolution
+# crops instead of one imgsz=960 pass over the 1280x720 frame
+tiler = TiledDetector() if TILED_INFERENCE else None
+tracker = create_tracker("bytetrack.yaml") if tiler is not None else None
+
 # =====================================================
 # CAMERA
 # =====================================================
@@ -38,19 +47,7 @@ box_history = {}
 def normalize_lighting(img):
 
     # Gamma correction
-    gamma = 1.1
-
-    look_up_table = np.empty((1, 256), np.uint8)
-
-    for i in range(256):
-
-        look_up_table[0, i] = np.clip(
-            pow(i / 255.0, gamma) * 255.0,
-            0,
-            255
-        )
-
-    img = cv2.LUT(img, look_up_table)
+    img = cv2.LUT(img, GAMMA_LUT)
 
     # CLAHE
     lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
@@ -105,6 +102,22 @@ def smooth_box(object_id, box, alpha=0.5):
 # LIQUID COLOR DETECTION  (FIXED)
 # =====================================================
 
+# --------------------------------------------------
+# FIX 5: Elliptical center mask to exclude glass walls
+# --------------------------------------------------
+LIQUID_MASK = np.zeros((100, 100), dtype=np.uint8)
+
+cv2.ellipse(
+    LIQUID_MASK,
+    (50, 50),
+    (35, 45),
+    0, 0, 360,
+    255,
+    -1
+)
+
+LIQUID_MASK = LIQUID_MASK.astype(bool)
+
 def detect_liquid_color(roi):
 
     if roi.size == 0:
@@ -116,112 +129,15 @@ def detect_liquid_color(roi):
 
     roi = cv2.GaussianBlur(roi, (5, 5), 0)
 
-    # --------------------------------------------------
-    # FIX 5: Elliptical center mask to exclude glass walls
-    # --------------------------------------------------
-    mask_base = np.zeros((100, 100), dtype=np.uint8)
-
-    cv2.ellipse(
-        mask_base,
-        (50, 50),
-        (35, 45),
-        0, 0, 360,
-        255,
-        -1
-    )
-
     hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
 
     # =====================================================
-    # COLOR RANGES  (FIXED)
-    # =====================================================
-
-    colors = {
-
-        # FIX 2: Tightened transparent range — narrower
-        # saturation ceiling to avoid swallowing real colors
-        "transparent": [
-            ((0, 0, 200), (180, 30, 255))
-        ],
-
-        "red": [
-            ((0,  80,  40), (10,  255, 255)),
-            ((170, 80, 40), (180, 255, 255))
-        ],
-
-        "blue": [
-            ((95, 60, 40), (140, 255, 255))
-        ],
-
-        "green": [
-            ((35, 40, 40), (85, 255, 255))
-        ],
-
-        "yellow": [
-            ((18, 70, 80), (35, 255, 255))
-        ],
-
-        "orange": [
-            ((8, 70, 70), (24, 255, 255))
-        ],
-
-        "purple": [
-            ((120, 40, 40), (160, 255, 255))
-        ],
-
-        # FIX 4: Brown range narrowed to reduce red/orange overlap
-        "brown": [
-            ((5, 80, 20), (18, 200, 140))
-        ]
-    }
-
-    detected_color = "unknown"
-    max_pixels     = 0
-
-    # =====================================================
-    # FIND DOMINANT COLOR
+    # DOMINANT COLOR
+    # One lookup-table gather + bincount over the elliptical
+    # centre mask (FIX 5); "unknown" below 8% coverage (FIX 1)
     # =====================================================
 
-    for color_name, ranges in colors.items():
-
-        total_pixels = 0
-
-        for lower, upper in ranges:
-
-            color_mask = cv2.inRange(
-                hsv,
-                np.array(lower),
-                np.array(upper)
-            )
-
-            # FIX 5: Apply elliptical mask before counting
-            color_mask = cv2.bitwise_and(
-                color_mask,
-                mask_base
-            )
-
-            total_pixels += cv2.countNonZero(color_mask)
-
-        if total_pixels > max_pixels:
-
-            max_pixels     = total_pixels
-            detected_color = color_name
-
-    # =====================================================
-    # CONFIDENCE CHECK  (FIXED)
-    # =====================================================
-
-    # FIX 1: Use masked area as denominator (not full frame)
-    total_area = cv2.countNonZero(mask_base)
-
-    coverage = max_pixels / total_area
-
-    # FIX 1: Return "unknown" when coverage is too low
-    # (previously both branches returned detected_color)
-    if coverage < 0.08:
-        return "unknown"
-
-    return detected_color
+    return classify_hsv(hsv, LIQUID_MASK)
 
 # =====================================================
 # LIQUID ROI
@@ -306,6 +222,36 @@ def get_liquid_roi(frame, x1, y1, x2, y2, object_name):
     # rectangle always matches the analysed region  (FIX 3)
     return roi, rx1_off, ry1_off, rx2_off, ry2_off
 
+# =====================================================
+# TILED DETECTION
+# =====================================================
+
+def detect_tiled(frame):
+
+    def predict(frames, imgsz, conf):
+        return model.predict(
+            frames,
+            conf=conf,
+            iou=0.35,
+            imgsz=imgsz,
+            agnostic_nms=True,
+            max_det=20,
+            verbose=False
+        )
+
+    result = tiler.detect(
+        frame,
+        predict,
+        model.names,
+        conf=0.60,
+        iou=0.35,
+        imgsz=960,
+        max_det=20,
+        agnostic_nms=True
+    )
+
+    return [apply_tracker(tracker, result, frame)]
+
 # =====================================================
 # MAIN LOOP
 # =====================================================
@@ -325,7 +271,10 @@ while True:
     # DETECTION + TRACKING
     # =====================================================
 
-    results = model.track(
+    if tiler is not None:
+        results = detect_tiled(frame)
+    else:
+        results = model.track(
     source=frame,
     persist=True,
     tracker="bytetrack.yaml",
@@ -26,6 +26,37 @@ int srv6Angle = 10;
 
 String incoming = "";
 
+Servo *servos[6] = {&servoBase, &servoShoulder, &servoElbow, &servoWrist, &servoWristRot, &servoGrip};
+int *angles[6] = {&srv1Angle, &srv2Angle, &srv3Angle, &srv4Angle, &srv5Angle, &srv6Angle};
+
+// ================= BINARY FRAMES =================
+// Layout in python_web_rtc/core/servo_protocol.py. Frames start with 0xA5,
+// which never appears in the text commands, so both share the link.
+const uint8_t FRAME_SYNC = 0xA5;
+const uint8_t CMD_JOINTS = 0x01;
+const uint8_t CMD_STATE = 0x02;
+const uint8_t CMD_TRAJECTORY = 0x03;
+const uint8_t CMD_BUFFER = 0x04;
+const uint8_t CMD_ABORT = 0x05;
+const uint8_t FLAG_ACK = 0x80;
+const uint8_t MAX_CHUNK_POINTS = 10;
+const uint8_t MAX_PAYLOAD = 2 + MAX_CHUNK_POINTS * 6;  // period, count, points
+const unsigned long FRAME_TIMEOUT = 50; // ms; a truncated frame is dropped
+
+uint8_t frameBuf[3 + MAX_PAYLOAD + 1];  // len, seq, cmd, payload, crc
+uint8_t frameLen = 0;
+bool inFrame = false;
+unsigned long frameStart = 0;
+
+// ================= TRAJECTORY BUFFER =================
+// Streamed points are played one per period; the host keeps it topped up
+const int RING_SIZE = 64;
+uint8_t ring[RING_SIZE][6];
+int ringHead = 0;
+int ringCount = 0;
+uint8_t trajPeriodMs = 20;
+unsigned long lastPointMs = 0;
+
 // ================= SPEED CONTROL =================
 const int STEP_DELAY = 12;
 const int STEP_SIZE = 1;
@@ -63,6 +94,114 @@ void setAllAngles(int base, int shoulder, int elbow, int wrist, int wristRot, in
   smoothMove(servoGrip, srv6Angle, grip);
 }
 
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendState(uint8_t seq) {
+  uint8_t body[3 + 6] = {6, seq, CMD_STATE};
+  for (int i = 0; i < 6; i++) body[3 + i] = *angles[i];
+  Serial.write(FRAME_SYNC);
+  Serial.write(body, sizeof(body));
+  Serial.write(crc8(body, sizeof(body)));
+}
+
+void sendBuffer(uint8_t seq) {
+  uint8_t body[3 + 1 + 6] = {7, seq, CMD_BUFFER, (uint8_t)(RING_SIZE - ringCount)};
+  for (int i = 0; i < 6; i++) body[4 + i] = *angles[i];
+  Serial.write(FRAME_SYNC);
+  Serial.write(body, sizeof(body));
+  Serial.write(crc8(body, sizeof(body)));
+}
+
+void handleTrajectory(uint8_t seq, uint8_t len, const uint8_t *payload) {
+  if (len < 2) return;
+  uint8_t count = payload[1];
+  if (len != 2 + count * 6) return;
+
+  if (count > 0) {
+    trajPeriodMs = max(payload[0], (uint8_t)1);
+    if (ringCount == 0) lastPointMs = millis() - trajPeriodMs;  // start at once
+  }
+  for (uint8_t p = 0; p < count && ringCount < RING_SIZE; p++) {
+    int tail = (ringHead + ringCount) % RING_SIZE;
+    memcpy(ring[tail], payload + 2 + p * 6, 6);
+    ringCount++;
+  }
+  sendBuffer(seq);
+}
+
+void playTrajectory() {
+  if (ringCount == 0) return;
+  unsigned long now = millis();
+  if (now - lastPointMs < trajPeriodMs) return;
+  // After a stall (blocking text command) restart the clock instead of catching up
+  lastPointMs = (now - lastPointMs >= 2UL * trajPeriodMs) ? now : lastPointMs + trajPeriodMs;
+
+  for (int i = 0; i < 6; i++) {
+    *angles[i] = constrain(ring[ringHead][i], 0, 180);
+    servos[i]->write(*angles[i]);
+  }
+  ringHead = (ringHead + 1) % RING_SIZE;
+  ringCount--;
+}
+
+// Host streams already-smoothed setpoints at camera rate, so joints are
+// written directly instead of through the blocking smoothMove()
+void handleFrame() {
+  uint8_t len = frameBuf[0];
+  uint8_t seq = frameBuf[1];
+  uint8_t cmd = frameBuf[2];
+  const uint8_t *payload = frameBuf + 3;
+
+  if (cmd == CMD_TRAJECTORY) {
+    handleTrajectory(seq, len, payload);
+    return;
+  }
+  if (cmd == CMD_ABORT) {
+    ringCount = 0;
+    sendBuffer(seq);
+    return;
+  }
+  if ((cmd & ~FLAG_ACK) != CMD_JOINTS || len < 1) return;
+
+  uint8_t mask = payload[0];
+  uint8_t count = 0;
+  for (int i = 0; i < 6; i++) if (mask & (1 << i)) count++;
+  if (count != len - 1) return;
+
+  uint8_t k = 1;
+  for (int i = 0; i < 6; i++) {
+    if (mask & (1 << i)) {
+      *angles[i] = constrain(payload[k++], 0, 180);
+      servos[i]->write(*angles[i]);
+    }
+  }
+  if (cmd & FLAG_ACK) sendState(seq);
+}
+
+void readFrameByte(uint8_t c) {
+  frameBuf[frameLen++] = c;
+  if (frameLen == 1 && c > MAX_PAYLOAD) {
+    inFrame = false;  // not a frame length; resync
+    return;
+  }
+  uint8_t total = 3 + frameBuf[0] + 1;
+  if (frameLen < total) return;
+
+  inFrame = false;
+  if (crc8(frameBuf, total - 1) == frameBuf[total - 1]) {
+    handleFrame();
+  }
+}
+
 void handleVisionStyleCommand(String cmd) {
   int xIndex = cmd.indexOf("X:");
   int yIndex = cmd.indexOf(",Y:");
@@ -102,6 +241,12 @@ void handleVisionStyleCommand(String cmd) {
     return;
   }
 
+  if (cmd.equalsIgnoreCase("PROTO?")) {
+    Serial.print("PROTO BIN 2 ");
+    Serial.println(RING_SIZE);
+    return;
+  }
+
   if (cmd.equalsIgnoreCase("HOME")) {
     moveToHome();
     Serial.println("ARM: HOME");
@@ -155,12 +300,29 @@ void setup() {
   moveToHome();
   delay(500);
   Serial.println("ARM READY");
-  Serial.println("Commands: HOME, OPEN, CLOSE, MOVE <6 angles>, or X:..,Y:..,Z:..");
+  Serial.println("Commands: HOME, OPEN, CLOSE, MOVE <6 angles>, PROTO?, or X:..,Y:..,Z:..");
 }
 
 void loop() {
+  if (inFrame && millis() - frameStart > FRAME_TIMEOUT) {
+    inFrame = false;
+  }
+  playTrajectory();
+
   while (Serial.available()) {
-    char c = Serial.read();
+    uint8_t b = Serial.read();
+    if (inFrame) {
+      readFrameByte(b);
+      continue;
+    }
+    if (b == FRAME_SYNC && incoming.length() == 0) {
+      inFrame = true;
+      frameLen = 0;
+      frameStart = millis();
+      continue;
+    }
+
+    char c = (char)b;
     if (c == '\n') {
       incoming.trim();
       if (incoming.length() > 0) {
@@ -26,7 +26,26 @@ int srv4Angle = 0;    // Wrist
 int srv5Angle = 90;   // Wrist rotation
 int srv6Angle = 10;   // Gripper
 
+Servo *servos[6] = {&servoBase, &servoShoulder, &servoElbow, &servoWrist, &servoWristRot, &servoGrip};
+int *angles[6] = {&srv1Angle, &srv2Angle, &srv3Angle, &srv4Angle, &srv5Angle, &srv6Angle};
 
+String command = "";
+
+// ================= BINARY FRAMES =================
+// Layout in python_web_rtc/core/servo_protocol.py; this sketch speaks version
+// 1 (joint frames and state replies, no trajectory buffer). Frames start with
+// 0xA5, which never appears in the text commands, so both share the link.
+const uint8_t FRAME_SYNC = 0xA5;
+const uint8_t CMD_JOINTS = 0x01;
+const uint8_t CMD_STATE = 0x02;
+const uint8_t FLAG_ACK = 0x80;
+const uint8_t MAX_PAYLOAD = 7;           // joint mask + 6 angles
+const unsigned long FRAME_TIMEOUT = 50;  // ms; a truncated frame is dropped
+
+uint8_t frameBuf[3 + MAX_PAYLOAD + 1];   // len, seq, cmd, payload, crc
+uint8_t frameLen = 0;
+bool inFrame = false;
+unsigned long frameStart = 0;
 
 void setup() {
   Serial.begin(115200);
@@ -49,38 +68,156 @@ void setup() {
 
   Serial.println("🟢 6DOF Arm Ready");
 }
-@@ -55,34 +54,34 @@ void loop() {
-    command.trim();
 
-    if (command == "MOVE_UP") {
-      srv2Angle = constrain(srv2Angle - 30, 0, 180);
-      servoShoulder.write(srv2Angle);
-    }
-    else if (command == "MOVE_DOWN") {
-      srv2Angle = constrain(srv2Angle + 30, 0, 180);
-      servoShoulder.write(srv2Angle);
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
     }
-    else if (command == "MOVE_LEFT") {
-      srv1Angle = constrain(srv1Angle - 30, 0, 180);
-      servoBase.write(srv1Angle);
-    }
-    else if (command == "MOVE_RIGHT") {
-      srv1Angle = constrain(srv1Angle + 30, 0, 180);
-      servoBase.write(srv1Angle);
+  }
+  return crc;
+}
+
+void sendState(uint8_t seq) {
+  uint8_t body[3 + 6] = {6, seq, CMD_STATE};
+  for (int i = 0; i < 6; i++) body[3 + i] = *angles[i];
+  Serial.write(FRAME_SYNC);
+  Serial.write(body, sizeof(body));
+  Serial.write(crc8(body, sizeof(body)));
+}
+
+// Hand mirroring streams setpoints at camera rate, so frames write the
+// joints directly and never wait like the word commands do
+void handleFrame() {
+  uint8_t len = frameBuf[0];
+  uint8_t seq = frameBuf[1];
+  uint8_t cmd = frameBuf[2];
+  const uint8_t *payload = frameBuf + 3;
+  if ((cmd & ~FLAG_ACK) != CMD_JOINTS || len < 1) return;
+
+  uint8_t mask = payload[0];
+  uint8_t count = 0;
+  for (int i = 0; i < 6; i++) if (mask & (1 << i)) count++;
+  if (count != len - 1) return;
+
+  uint8_t k = 1;
+  for (int i = 0; i < 6; i++) {
+    if (mask & (1 << i)) {
+      *angles[i] = constrain(payload[k++], 0, 180);
+      servos[i]->write(*angles[i]);
     }
-    else if (command == "GRIP") {
-      srv6Angle = 0;   // close
-      servoGrip.write(srv6Angle);
+  }
+  if (cmd & FLAG_ACK) sendState(seq);
+}
+
+void readFrameByte(uint8_t c) {
+  frameBuf[frameLen++] = c;
+  if (frameLen == 1 && c > MAX_PAYLOAD) {
+    inFrame = false;  // not a frame length; resync
+    return;
+  }
+  uint8_t total = 3 + frameBuf[0] + 1;
+  if (frameLen < total) return;
+
+  inFrame = false;
+  if (crc8(frameBuf, total - 1) == frameBuf[total - 1]) {
+    handleFrame();
+  }
+}
+
+// "base,shoulder,elbow,wrist,wristRot,grip" from the hand mirror (text mode)
+bool handleAngleLine(String line) {
+  int a[6];
+  int index = 0;
+  while (index < 6) {
+    int comma = line.indexOf(',');
+    String value = (comma >= 0) ? line.substring(0, comma) : line;
+    a[index++] = value.toInt();
+    if (comma < 0) break;
+    line = line.substring(comma + 1);
+  }
+  if (index != 6) return false;
+  for (int i = 0; i < 6; i++) {
+    *angles[i] = constrain(a[i], 0, 180);
+    servos[i]->write(*angles[i]);
+  }
+  return true;
+}
+
+void handleCommand() {
+  if (command.equalsIgnoreCase("PROTO?")) {
+    Serial.println("PROTO BIN 1");
+    return;
+  }
+  if (command.indexOf(',') >= 0) {
+    if (!handleAngleLine(command)) {
+      Serial.print("⚠️ Bad angle line: ");
+      Serial.println(command);
     }
-    else if (command == "RELEASE") {
-      srv6Angle = 90;  // open
-      servoGrip.write(srv6Angle);
+    return;
+  }
+
+  if (command == "MOVE_UP") {
+    srv2Angle = constrain(srv2Angle - 30, 0, 180);
+    servoShoulder.write(srv2Angle);
+  }
+  else if (command == "MOVE_DOWN") {
+    srv2Angle = constrain(srv2Angle + 30, 0, 180);
+    servoShoulder.write(srv2Angle);
+  }
+  else if (command == "MOVE_LEFT") {
+    srv1Angle = constrain(srv1Angle - 30, 0, 180);
+    servoBase.write(srv1Angle);
+  }
+  else if (command == "MOVE_RIGHT") {
+    srv1Angle = constrain(srv1Angle + 30, 0, 180);
+    servoBase.write(srv1Angle);
+  }
+  else if (command == "GRIP") {
+    srv6Angle = 0;   // close
+    servoGrip.write(srv6Angle);
+  }
+  else if (command == "RELEASE") {
+    srv6Angle = 90;  // open
+    servoGrip.write(srv6Angle);
+  }
+  else {
+    Serial.print("⚠️ Unknown command: ");
+    Serial.println(command);
+  }
+
+  delay(500); // allow servo movement
+}
+
+void loop() {
+  if (inFrame && millis() - frameStart > FRAME_TIMEOUT) {
+    inFrame = false;
+  }
+
+  while (Serial.available()) {
+    uint8_t b = Serial.read();
+    if (inFrame) {
+      readFrameByte(b);
+      continue;
     }
-    else {
-      Serial.print("⚠️ Unknown command: ");
-      Serial.println(command);
+    if (b == FRAME_SYNC && command.length() == 0) {
+      inFrame = true;
+      frameLen = 0;
+      frameStart = millis();
+      continue;
     }
 
-    delay(500); // allow servo movement
+    char c = (char)b;
+    if (c == '\n') {
+      command.trim();
+      if (command.length() > 0) {
+        handleCommand();
+      }
+      command = "";
+    } else {
+      command += c;
+    }
   }
-}0
\ No newline at end of file
+}